@@ -1,4 +1,8 @@
 import contactregister
+import sys
 
-# Run the interactive session in the contactregister module
+# Run a batch command if one is given as arguments, and otherwise the interactive session
+if len(sys.argv) > 1:
+    import batch
+    sys.exit(batch.run_batch_session(sys.argv[1:]))
 contactregister.run_interactive_session()
@@ -0,0 +1,260 @@
+"""
+ContactRegister Batch Module
+
+This script defines a non-interactive command line for scripted use of
+the contactregister API:
+    * run_batch_session - runs a command given as command line arguments
+    * build_parser - returns the parser for batch commands
+    * parse_command - parses and checks a single batch command
+    * run_command - runs a single parsed batch command
+    * read_contact_batches - streams contact records from a file in batches
+    * write_contacts - writes contacts to a file as records
+
+The following commands are provided, and report their results on stdout
+as records or as a single JSON summary line:
+    * add - adds one contact, or a stream of contact records read from stdin
+    * search - writes the contacts matching a query as records
+    * import - imports all contacts from a specified format
+    * export - exports all contacts to a specified format
+    * display - displays all contacts in a specified format
+    * script - runs the commands read from stdin, one per line
+
+Records are either CSV rows laid out as in a CSV export (with an optional
+header row) or NDJSON objects. Contacts only outlive a single command when
+run through a script, or when the register is journaled with --journal.
+
+This script should be imported wherever needed as module.
+"""
+
+from models.Contact import Contact
+import contactregister
+import serialisation
+import itertools
+import argparse
+import display
+import helpers
+import shlex
+import json
+import csv
+import sys
+
+
+# Define module constants
+RECORD_FORMATS = ["csv", "ndjson"]
+BATCH_SIZE = 10000
+
+
+def run_batch_session(arguments) -> int:
+    """
+    A module function to run a batch command given as command line arguments,
+    reporting any error on stderr
+    ...
+    Parameters
+    ----------
+    arguments : [str]
+        the command line arguments, without the program name
+    ...
+    Returns
+    -------
+    int
+        the exit status, 0 on success and 1 on error
+    """
+    parser = build_parser()
+    options = parse_command(parser, arguments)
+    if options.journal:
+        contactregister.open_journal()
+    try:
+        if options.command == "script":
+            # Run each command of the script in turn, skipping blank and comment lines
+            for line in sys.stdin:
+                words = shlex.split(line, comments=True)
+                if not words:
+                    continue
+                run_command(parse_command(parser, words, in_script=True))
+        else:
+            run_command(options)
+    except helpers.NonexistentFile as error:
+        # Handle bad file case
+        print(f'File "{error.filepath}" could not be found', file=sys.stderr)
+        return 1
+    except helpers.UnknownQueryField as error:
+        # Handle unknown field case
+        print(f'Query field "{error.field}" is not searchable', file=sys.stderr)
+        return 1
+    except helpers.MalformedQuery as error:
+        # Handle bad query case
+        print(f'Could not search on malformed query "{error.query}"', file=sys.stderr)
+        return 1
+    finally:
+        if options.journal:
+            contactregister.close_journal()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    A module function to return the parser for batch commands
+    ...
+    Returns
+    -------
+    argparse.ArgumentParser
+        a parser of the batch command line
+    """
+    parser = argparse.ArgumentParser(prog="contactregister",
+                                     description="Runs contactregister commands without prompting. "
+                                                 "Run with no arguments for an interactive session.")
+    parser.add_argument("--journal", action="store_true",
+                        help="load the register from its snapshot and journal, and journal any changes")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+    add = commands.add_parser("add", help="add one contact, or a stream of contact records read from stdin")
+    add.add_argument("fields", nargs="*", metavar="field", help="the name, address and phone of a single contact")
+    add.add_argument("--input", choices=RECORD_FORMATS, default="csv", help="the format of the records on stdin")
+    add.add_argument("--dedup", choices=contactregister.DEDUP_MODES, help="how to handle duplicates")
+    search = commands.add_parser("search", help="write the contacts matching a query as records")
+    search.add_argument("query", help="the query, e.g. name=Jon*,phone=+61*")
+    search.add_argument("--distance", type=int, default=contactregister.FUZZY_DISTANCE,
+                        help="the greatest edit distance a fuzzy filter accepts")
+    search.add_argument("--output", choices=RECORD_FORMATS, default="ndjson", help="the format of the records")
+    import_command = commands.add_parser("import", help="import all contacts from a format")
+    import_command.add_argument("format", choices=serialisation.get_formats())
+    import_command.add_argument("--workers", type=int, help="the number of processes to parse the file with")
+    import_command.add_argument("--dedup", choices=contactregister.DEDUP_MODES, help="how to handle duplicates")
+    export = commands.add_parser("export", help="export all contacts to a format")
+    export.add_argument("format", choices=serialisation.get_formats())
+    export.add_argument("--delta", action="store_true", help="append only the contacts added since the last export")
+    display_command = commands.add_parser("display", help="display all contacts in a format")
+    display_command.add_argument("format", choices=display.get_formats())
+    commands.add_parser("script", help="run the commands read from stdin, one per line")
+    return parser
+
+
+def parse_command(parser, words, in_script=False) -> argparse.Namespace:
+    """
+    A module function to parse and check a single batch command, exiting
+    with a usage message if it is invalid
+    ...
+    Parameters
+    ----------
+    parser : argparse.ArgumentParser
+        the parser for batch commands
+    words : [str]
+        the words of the command
+    in_script : bool
+        whether the command is part of a script, which takes up stdin
+        (default is False)
+    ...
+    Returns
+    -------
+    argparse.Namespace
+        the parsed command
+    """
+    options = parser.parse_args(words)
+    if options.command == "add" and options.fields and len(options.fields) != len(Contact.supported_search_fields):
+        parser.error(f'add takes a name, address and phone, not "{" ".join(options.fields)}"')
+    if in_script and (options.command == "script" or (options.command == "add" and not options.fields)):
+        # Handle commands which would read stdin, which is taken by the script
+        parser.error(f'"{" ".join(words)}" cannot read from stdin within a script')
+    return options
+
+
+def run_command(options) -> None:
+    """
+    A module function to run a single parsed batch command
+    ...
+    Parameters
+    ----------
+    options : argparse.Namespace
+        the parsed command
+    """
+    # ADD CONTACTS
+    if options.command == "add":
+        start, dropped = len(contactregister.contacts), contactregister.get_duplicate_index().dropped
+        if options.fields:
+            contactregister.add_contact(*options.fields, dedup=options.dedup)
+        else:
+            # Stream the records on stdin into the store a batch at a time
+            for new_contacts in read_contact_batches(sys.stdin, options.input):
+                contactregister.add_contacts(new_contacts, dedup=options.dedup)
+        print(json.dumps({"added": len(contactregister.contacts) - start,
+                          "dropped": contactregister.get_duplicate_index().dropped - dropped}))
+
+    # SEARCH CONTACTS
+    elif options.command == "search":
+        write_contacts(sys.stdout, contactregister.search_contacts(options.query, options.distance), options.output)
+
+    # IMPORT CONTACTS
+    elif options.command == "import":
+        dropped = contactregister.get_duplicate_index().dropped
+        new_contacts = contactregister.import_contacts(options.format, workers=options.workers, dedup=options.dedup)
+        print(json.dumps({"imported": len(new_contacts),
+                          "dropped": contactregister.get_duplicate_index().dropped - dropped}))
+
+    # EXPORT CONTACTS
+    elif options.command == "export":
+        export_file = contactregister.export_contacts(options.format, delta=options.delta)
+        print(json.dumps({"exported": len(contactregister.contacts), "path": str(export_file)}))
+
+    # DISPLAY CONTACTS
+    elif options.command == "display":
+        contactregister.display_contacts(options.format)
+
+
+def read_contact_batches(file, record_format, batch_size=BATCH_SIZE):
+    """
+    A module generator to stream contact records from a file in batches
+    ...
+    Parameters
+    ----------
+    file : io.TextIOBase
+        the file to read the records from
+    record_format : str
+        the format of the records, csv or ndjson
+    batch_size : int
+        the maximum number of contacts per batch (default is BATCH_SIZE)
+    ...
+    Yields
+    ------
+    [Contact]
+        the next batch of contacts
+    """
+    if record_format == "csv":
+        # Read each row as a contact, skipping a header row
+        rows = csv.reader(file, delimiter=',', quotechar='"')
+        first = next(rows, None)
+        if first is not None and first != Contact.supported_search_fields:
+            rows = itertools.chain([first], rows)
+        contacts = (Contact.from_list(row) for row in rows if row)
+    else:
+        # Read each non-blank line as a contact
+        decode = json.JSONDecoder().decode
+        contacts = (Contact.from_dict(decode(line)) for line in file if line.strip())
+    while True:
+        batch = list(itertools.islice(contacts, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_contacts(file, contacts, record_format) -> None:
+    """
+    A module function to write contacts to a file as records
+    ...
+    Parameters
+    ----------
+    file : io.TextIOBase
+        the file to write the records to
+    contacts : [Contact]
+        a list of contact objects to write
+    record_format : str
+        the format of the records, csv or ndjson
+    """
+    if record_format == "csv":
+        # Write a header row, and then rows for each contact
+        writer = csv.writer(file, quoting=csv.QUOTE_ALL)
+        writer.writerow(Contact.supported_search_fields)
+        writer.writerows(contact.to_list() for contact in contacts)
+    else:
+        # Write each contact as a JSON object on its own line
+        encode = json.JSONEncoder().encode
+        file.writelines(encode(contact.to_dict()) + '\n' for contact in contacts)
@@ -0,0 +1,168 @@
+"""
+ContactRegister Benchmarks
+
+This package contains performance benchmarks for the contactregister
+system. Each benchmark is a script run as a module from the project's app
+directory, e.g.:
+    $ cd contactregister
+    $ python -m benchmarks.memory
+
+The package defines the following shared helpers:
+    * generate_contacts - returns a reproducible list of synthetic contacts
+    * generate_rows - generates reproducible synthetic contact rows one at a time
+
+Synthetic contacts are drawn from pools of names, streets and suburbs with
+a long tail, so common names recur as in a real register while most full
+names stay rare. A few contacts have a middle initial, a flat number or a
+missing field, and phone numbers are written in several of the forms
+people enter them in. The same seed always gives the same rows, the rows of
+a smaller register being the first rows of a larger one.
+"""
+
+from models.Contact import Contact
+from models import NULL_FIELD
+import itertools
+import random
+
+
+# Define package constants
+FIRST_NAMES = ["Jon", "Ron", "Bon", "Ann", "Mia", "Leo", "Ava", "Sam", "Zoe", "Max", "Olivia", "Jack", "Amelia",
+               "Noah", "Isla", "Oliver", "Charlotte", "Liam", "Harper", "William", "Sophie", "James", "Ella",
+               "Lucas", "Grace", "Mason", "Ruby", "Hunter", "Emily", "George", "Aria", "Thomas", "Lily", "Arlo",
+               "Willow", "Hudson", "Evelyn", "Theo", "Hazel", "Levi", "Isabella", "Luca", "Matilda", "Archie",
+               "Frankie", "Wiremu", "Aroha", "Nikau", "Anahera", "Tama", "Mere", "Hemi", "Priya", "Arjun",
+               "Mei", "Wei", "Hiroshi", "Yuki", "Siosaia", "Mele", "Sione", "Losa", "Fatima", "Omar", "Elena",
+               "Mateo", "Ingrid", "Lars", "Chloe", "Daniel", "Hannah", "Ethan", "Zara", "Jacob", "Maia"]
+LAST_NAMES = ["Smith", "Jones", "Brown", "Wilson", "Taylor", "Nguyen", "Walker", "Ngata", "Williams", "Thompson",
+              "Anderson", "Campbell", "Martin", "Clarke", "Harris", "Robinson", "Young", "Scott", "King", "Wright",
+              "Mitchell", "Edwards", "Hall", "Green", "Turner", "Stewart", "Cooper", "Morris", "Kelly", "Singh",
+              "Patel", "Kumar", "Wang", "Li", "Chen", "Zhang", "Lee", "Kim", "Tuhiwai", "Parata", "Tipene",
+              "Ruatapu", "Henare", "Rangi", "Tautahi", "Fonoti", "Tupou", "Faleolo", "Vaifale", "MacDonald",
+              "O'Brien", "O'Connor", "McKenzie", "Murphy", "Fitzgerald", "van der Berg", "de Vries", "Muller",
+              "Rossi", "Garcia", "Fernandez", "Sato", "Tanaka", "Ivanova", "Kowalski", "Johansson", "Okafor"]
+STREETS = ["Hello Rd", "Welcome Plc", "Goodbye St", "A Street", "Main Rd", "Queen St", "King St", "High St",
+           "Victoria St", "Albert Rd", "Great North Rd", "Dominion Rd", "Ponsonby Rd", "Karangahape Rd",
+           "Lambton Quay", "Cuba St", "Riccarton Rd", "Colombo St", "George St", "Princes St", "Church St",
+           "Station Rd", "Beach Rd", "Park Ave", "Hill St", "Bridge St", "Rata St", "Kowhai Ave", "Totara Cres",
+           "Pohutukawa Dr", "Manuka Rd", "Nikau Way", "Harbour View Tce", "Sunnyside Lane", "Maple Grove"]
+SUBURBS = ["Auckland Central", "Ponsonby", "Grey Lynn", "Mt Eden", "Newmarket", "Remuera", "Takapuna",
+           "Manukau", "Otahuhu", "Henderson", "Wellington Central", "Te Aro", "Newtown", "Lower Hutt",
+           "Porirua", "Christchurch Central", "Riccarton", "Sumner", "Hamilton", "Tauranga", "Dunedin",
+           "Napier", "Nelson", "Rotorua", "Whangarei", "Palmerston North", "Queenstown", "Invercargill"]
+MIDDLE_INITIAL_RATE = 0.1
+FLAT_RATE = 0.15
+MISSING_ADDRESS_RATE = 0.03
+MISSING_PHONE_RATE = 0.05
+CHUNK_SIZE = 10000
+
+
+def long_tail_weights(pool) -> [float]:
+    """
+    A package helper function to return the cumulative weights drawing a
+    pool's values with a long tail, each as likely as 1 / its rank
+    ...
+    Parameters
+    ----------
+    pool : [str]
+        the values to weight, most common first
+    ...
+    Returns
+    -------
+    [float]
+        the cumulative weight of each value
+    """
+    return list(itertools.accumulate(1 / rank for rank in range(1, len(pool) + 1)))
+
+
+def format_phone(generator) -> str:
+    """
+    A package helper function to return a random phone number in one of
+    the forms people enter them in
+    ...
+    Parameters
+    ----------
+    generator : random.Random
+        the random number generator to draw from
+    ...
+    Returns
+    -------
+    str
+        the formatted phone number
+    """
+    form = generator.random()
+    if form < 0.6:
+        # Mobile numbers, written internationally or nationally
+        prefix, number = generator.choice(["21", "22", "27", "29"]), generator.randint(0, 9999999)
+        if form < 0.35:
+            return f'+64 {prefix} {number // 10000:03} {number % 10000:04}'
+        if form < 0.45:
+            return f'+64{prefix}{number:07}'
+        return f'0{prefix} {number // 10000:03} {number % 10000:04}'
+    # Landline numbers, written nationally or internationally
+    area, number = generator.choice(["3", "4", "6", "7", "9"]), generator.randint(2000000, 9999999)
+    if form < 0.9:
+        return f'(0{area}) {number // 10000:03} {number % 10000:04}'
+    if form < 0.95:
+        return f'+64 {area} {number // 10000:03} {number % 10000:04}'
+    return f'0064{area}{number:07}'
+
+
+def generate_rows(count, seed=0):
+    """
+    A package generator to generate reproducible synthetic contact rows one
+    at a time, drawing names a chunk at a time so even registers of
+    millions of contacts are generated without being held in memory
+    ...
+    Parameters
+    ----------
+    count : int
+        the number of rows to generate
+    seed : int
+        the random seed to generate from (default is 0)
+    ...
+    Yields
+    ------
+    (str, str, str)
+        the name, address and phone of the next contact
+    """
+    generator = random.Random(seed)
+    first_weights, last_weights = long_tail_weights(FIRST_NAMES), long_tail_weights(LAST_NAMES)
+    street_weights, suburb_weights = long_tail_weights(STREETS), long_tail_weights(SUBURBS)
+    for start in range(0, count, CHUNK_SIZE):
+        # Draw the pooled values for a whole chunk at once, even when fewer rows are left, so
+        # the rows of a smaller register are always the first rows of a larger one
+        firsts = generator.choices(FIRST_NAMES, cum_weights=first_weights, k=CHUNK_SIZE)
+        lasts = generator.choices(LAST_NAMES, cum_weights=last_weights, k=CHUNK_SIZE)
+        streets = generator.choices(STREETS, cum_weights=street_weights, k=CHUNK_SIZE)
+        suburbs = generator.choices(SUBURBS, cum_weights=suburb_weights, k=CHUNK_SIZE)
+        for _, first, last, street, suburb in zip(range(start, count), firsts, lasts, streets, suburbs):
+            # Then fill in the less common parts of each contact
+            if generator.random() < MIDDLE_INITIAL_RATE:
+                first = f'{first} {chr(generator.randint(65, 90))}.'
+            if generator.random() < MISSING_ADDRESS_RATE:
+                address = NULL_FIELD
+            elif generator.random() < FLAT_RATE:
+                address = f'{generator.randint(1, 40)}/{generator.randint(1, 999)} {street}, {suburb}'
+            else:
+                address = f'{generator.randint(1, 999)} {street}, {suburb}'
+            phone = NULL_FIELD if generator.random() < MISSING_PHONE_RATE else format_phone(generator)
+            yield f'{first} {last}', address, phone
+
+
+def generate_contacts(count, seed=0) -> [Contact]:
+    """
+    A package function to generate a reproducible list of synthetic contacts
+    ...
+    Parameters
+    ----------
+    count : int
+        the number of contacts to generate
+    seed : int
+        the random seed to generate from (default is 0)
+    ...
+    Returns
+    -------
+    [Contact]
+        a list of newly created contact objects
+    """
+    return [Contact(*row) for row in generate_rows(count, seed)]
@@ -0,0 +1,62 @@
+"""
+ContactRegister Bulk Add Benchmark
+
+This script times adding synthetic contacts to an empty register one call
+at a time through add_contact, and all at once through add_contacts, given
+as contact objects, dictionaries and tuples, e.g.:
+    $ python -m benchmarks.bulk_add 100000
+"""
+
+from models.ContactStore import ContactStore
+from benchmarks import generate_contacts
+import contactregister
+import time
+import sys
+
+
+def time_add(run) -> float:
+    """
+    A module function to time adding contacts to an empty register
+    ...
+    Parameters
+    ----------
+    run : callable
+        a function adding the contacts
+    ...
+    Returns
+    -------
+    float
+        the number of seconds adding took
+    """
+    contactregister.contacts = ContactStore()
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+
+
+def run(count) -> None:
+    """
+    A module function to run the benchmark and print its results
+    ...
+    Parameters
+    ----------
+    count : int
+        the number of contacts to add
+    """
+    contacts = generate_contacts(count)
+    dicts = [contact.to_dict() for contact in contacts]
+    tuples = [tuple(contact.to_list()) for contact in contacts]
+
+    def add_one_at_a_time():
+        [contactregister.add_contact(*values) for values in tuples]
+
+    one_at_a_time = time_add(add_one_at_a_time)
+    print(f'Adding {count} contacts:')
+    print(f'    {"add_contact":<30} {one_at_a_time:8.2f} s')
+    for name, records in [("contact objects", contacts), ("dicts", dicts), ("tuples", tuples)]:
+        elapsed = time_add(lambda: contactregister.add_contacts(records))
+        print(f'    {f"add_contacts ({name})":<30} {elapsed:8.2f} s  {one_at_a_time / elapsed:6.1f}x')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,72 @@
+"""
+ContactRegister Memory Benchmark
+
+This script compares the memory held by a plain list of Contact objects
+with that held by a ContactStore for the same synthetic contacts, e.g.:
+    $ python -m benchmarks.memory 100000
+"""
+
+from models.ContactStore import ContactStore
+from benchmarks import generate_contacts
+import tracemalloc
+import sys
+
+
+def measure(build) -> int:
+    """
+    A module function to measure the memory retained by a built object
+    ...
+    Parameters
+    ----------
+    build : callable
+        a function building the object to measure
+    ...
+    Returns
+    -------
+    int
+        the number of bytes still allocated once the object is built
+    """
+    tracemalloc.start()
+    built = build()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return size
+
+
+def build_store(count) -> ContactStore:
+    """
+    A module function to build a contact store of synthetic contacts
+    ...
+    Parameters
+    ----------
+    count : int
+        the number of contacts to store
+    ...
+    Returns
+    -------
+    ContactStore
+        the populated store
+    """
+    store = ContactStore()
+    store.extend(generate_contacts(count))
+    return store
+
+
+def run(count) -> None:
+    """
+    A module function to run the benchmark and print its results
+    ...
+    Parameters
+    ----------
+    count : int
+        the number of contacts to measure with
+    """
+    print(f'Memory held by {count} contacts:')
+    for name, build in [("list of Contact", generate_contacts), ("ContactStore", build_store)]:
+        size = measure(lambda: build(count))
+        print(f'    {name:<16} {size / 2 ** 20:10.1f} MiB  {size / count:8.1f} bytes/contact')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,97 @@
+"""
+ContactRegister Parallel Import Benchmark
+
+This script times importing a register split across CSV shards, first
+one shard after another in this process and then through process pools of
+increasing size, e.g.:
+    $ python -m benchmarks.parallel_import 1000000 32
+"""
+
+from models.ContactStore import ContactStore
+from benchmarks import generate_contacts
+from serialisation import csv
+import contactregister
+import tempfile
+import glob
+import time
+import sys
+import os
+
+
+def write_shards(directory, count, shards) -> str:
+    """
+    A module function to write synthetic contacts out as CSV shards
+    ...
+    Parameters
+    ----------
+    directory : str
+        the directory to write the shards to
+    count : int
+        the total number of contacts to write
+    shards : int
+        the number of shards to split the contacts across
+    ...
+    Returns
+    -------
+    str
+        a glob pattern matching every shard
+    """
+    contacts = generate_contacts(count)
+    size = -(-count // shards)
+    for shard in range(shards):
+        csv.export_contacts(contacts[shard * size:(shard + 1) * size],
+                            path=os.path.join(directory, f'shard-{shard:04}.csv'))
+    return os.path.join(directory, 'shard-*.csv')
+
+
+def time_import(run) -> float:
+    """
+    A module function to time an import into an empty register
+    ...
+    Parameters
+    ----------
+    run : callable
+        a function performing the import
+    ...
+    Returns
+    -------
+    float
+        the number of seconds the import took
+    """
+    contactregister.contacts = ContactStore()
+    started = time.perf_counter()
+    run()
+    return time.perf_counter() - started
+
+
+def run(count, shards) -> None:
+    """
+    A module function to run the benchmark and print its results
+    ...
+    Parameters
+    ----------
+    count : int
+        the total number of contacts to import
+    shards : int
+        the number of shards to split the contacts across
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        pattern = write_shards(directory, count, shards)
+
+        def import_sequentially():
+            for path in sorted(glob.glob(pattern)):
+                contactregister.contacts.extend(csv.import_contacts(path))
+            contactregister.sync_search_index()
+
+        sequential = time_import(import_sequentially)
+        print(f'Importing {count} contacts from {shards} shards:')
+        print(f'    {"sequential":<12} {sequential:8.2f} s')
+        workers = 1
+        while workers <= os.cpu_count():
+            elapsed = time_import(lambda: contactregister.import_contact_shards("csv", pattern, workers))
+            print(f'    {f"{workers} workers":<12} {elapsed:8.2f} s  {sequential / elapsed:5.2f}x')
+            workers *= 2
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000, int(sys.argv[2]) if len(sys.argv) > 2 else 32)
@@ -0,0 +1,201 @@
+"""
+ContactRegister Startup Benchmark
+
+This script times how long a fresh interpreter takes to reach the first
+prompt of the interactive session, against a bare interpreter, and breaks
+down the import time of each module contactregister imports, e.g.:
+    $ python -m benchmarks.startup 20
+
+The timings can be written to a JSON file and later runs checked against
+it, failing if importing contactregister or reaching the first prompt has
+grown slower, e.g.:
+    $ python -m benchmarks.startup 20 --output baseline.json
+    $ python -m benchmarks.startup 20 --compare baseline.json
+"""
+
+import subprocess
+import statistics
+import platform
+import argparse
+import json
+import time
+import sys
+import os
+
+
+# Define module constants
+APP_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+SHOWN_IMPORTS = 15
+RUNS = 20
+THRESHOLD = 0.2
+COMPARED = ["import", "session"]
+
+
+def time_launch(arguments, stdin=None) -> float:
+    """
+    A module function to time a fresh interpreter from launch to exit
+    ...
+    Parameters
+    ----------
+    arguments : [str]
+        the arguments to run the interpreter with
+    stdin : str
+        the input to send the interpreter (default is None)
+    ...
+    Returns
+    -------
+    float
+        the number of seconds the interpreter ran for
+    """
+    started = time.perf_counter()
+    subprocess.run([sys.executable] + arguments, input=stdin, cwd=APP_DIR, check=True,
+                   stdout=subprocess.DEVNULL, universal_newlines=True)
+    return time.perf_counter() - started
+
+
+def import_times() -> [(int, int, str)]:
+    """
+    A module function to measure the import time of each module imported
+    while importing contactregister, using the interpreter's -X importtime
+    ...
+    Returns
+    -------
+    [(int, int, str)]
+        the cumulative and self import time of each module in microseconds,
+        and its indented name showing which module imported it
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import contactregister"], cwd=APP_DIR,
+                            check=True, stderr=subprocess.PIPE, universal_newlines=True)
+    times = []
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            # Skip the header line and anything else which is not a timing
+            continue
+        times.append((int(fields[1]), int(fields[0].split(":")[1]), fields[2].rstrip()))
+    return times
+
+
+def import_total(times) -> int:
+    """
+    A module function to return the time importing contactregister took
+    ...
+    Parameters
+    ----------
+    times : [(int, int, str)]
+        the import times, as returned by import_times
+    ...
+    Returns
+    -------
+    int
+        the cumulative import time of contactregister in microseconds
+    """
+    return next(cumulative for cumulative, _own, name in times if name.strip() == "contactregister")
+
+
+def run(runs=RUNS) -> dict:
+    """
+    A module function to run the benchmark and print its results
+    ...
+    Parameters
+    ----------
+    runs : int
+        the number of times to launch each interpreter, keeping the median
+        (default is RUNS)
+    ...
+    Returns
+    -------
+    dict
+        the results of the run, with the median seconds of each timing
+        under "timings"
+    """
+    bare = statistics.median(time_launch(["-c", "pass"]) for _run in range(runs))
+    session = statistics.median(time_launch(["."], stdin="q\n") for _run in range(runs))
+    print(f'Time to first prompt (median of {runs} launches):')
+    print(f'    {"bare interpreter":<20} {bare * 1000:8.1f} ms')
+    print(f'    {"interactive session":<20} {session * 1000:8.1f} ms  (+{(session - bare) * 1000:.1f} ms)')
+    # Time the import over as many launches, as a single launch is too noisy to compare
+    imported = statistics.median(import_total(import_times()) for _run in range(runs)) / 1000000
+    times = import_times()
+    print(f'Importing contactregister: {imported * 1000:.1f} ms (median), slowest imports:')
+    print(f'    {"cumulative":>10} {"self":>8}  module')
+    shown = [(cumulative, own, name) for cumulative, own, name in times if name.strip() != "contactregister"]
+    for cumulative, own, name in sorted(shown, reverse=True)[:SHOWN_IMPORTS]:
+        print(f'    {cumulative / 1000:7.1f} ms {own / 1000:5.1f} ms  {name}')
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": runs,
+            "timings": {"bare": bare, "session": session, "import": imported}}
+
+
+def compare_results(results, baseline, threshold=THRESHOLD) -> [str]:
+    """
+    A module function to compare a run's import and session timings
+    against an earlier run's, printing the ratio of each
+    ...
+    Parameters
+    ----------
+    results : dict
+        the results of the new run
+    baseline : dict
+        the results of the earlier run
+    threshold : float
+        the fraction a timing may grow by before it counts as a regression
+        (default is THRESHOLD)
+    ...
+    Returns
+    -------
+    [str]
+        the name of each timing which regressed
+    """
+    if results["python"] != baseline["python"]:
+        print(f'Warning: comparing runs on different Pythons ({results["python"]} and {baseline["python"]})')
+    regressions = []
+    print('Compared with baseline:')
+    for name in COMPARED:
+        ratio = results["timings"][name] / baseline["timings"][name]
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f'    {name:<20} {ratio:6.2f}x{"  regression" if regressed else ""}')
+    return regressions
+
+
+def main(arguments) -> int:
+    """
+    A module function to run the benchmark from the command line
+    ...
+    Parameters
+    ----------
+    arguments : [str]
+        the command line arguments, without the program name
+    ...
+    Returns
+    -------
+    int
+        the exit status, 1 if a timing regressed against the baseline and 0
+        otherwise
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup",
+                                     description="Times contactregister's startup and imports.")
+    parser.add_argument("runs", nargs="?", type=int, default=RUNS,
+                        help="the number of times to launch each interpreter")
+    parser.add_argument("--output", help="a JSON file to write the results to")
+    parser.add_argument("--compare", metavar="baseline", help="an earlier results file to compare the timings with")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="the fraction a timing may grow by before it counts as a regression")
+    options = parser.parse_args(arguments)
+    results = run(options.runs)
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=4)
+        print(f'Results written to {options.output}')
+    if not options.compare:
+        return 0
+    with open(options.compare) as file:
+        baseline = json.load(file)
+    return 1 if compare_results(results, baseline, options.threshold) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,314 @@
+"""
+ContactRegister Benchmark Suite
+
+This script builds a register of synthetic contacts at each of several
+scales and times the main operations on it, writing the timings to a JSON
+file so runs can be compared for regressions, e.g.:
+    $ python -m benchmarks.suite 1000 100000 --output before.json
+    $ python -m benchmarks.suite 1000 100000 --output after.json --compare before.json
+
+At each scale the suite times:
+    * add_contacts - building the register a batch at a time, indexes included
+    * index - building the search, phone and duplicate indexes from scratch
+    * search - prefix, suffix, infix and multi-field queries, each uncached
+    * export - writing the register out as CSV and as JSON
+    * import - reading each export back into an empty store
+    * display - displaying the register as text and as HTML
+
+Exports and HTML pages are written to a temporary directory rather than
+the data directory, so exports and imports go through the format modules
+rather than export_contacts and import_contacts. Imports leave the indexes
+to be built by the first search, so the cost of an import followed by a
+search is the import timing plus the index timings. Text is displayed to
+os.devnull, and no browser is opened. Every timing is the fastest of the
+given number of runs.
+"""
+
+from search.duplicates import DuplicateIndex
+from models.ContactStore import ContactStore
+from benchmarks import generate_rows
+from search.phones import PhoneIndex
+from search.index import SearchIndex
+from models.Contact import Contact
+from pathlib import Path
+import contactregister
+import serialisation
+import contextlib
+import itertools
+import datetime
+import argparse
+import tempfile
+import platform
+import display
+import json
+import time
+import sys
+import os
+
+
+# Define module constants
+SCALES = [1000, 100000, 1000000, 10000000]
+QUERIES = {"prefix": "name=Ann*",
+           "suffix": "name=*Smith",
+           "infix": "address=*Queen St*",
+           "multi-field": "name=Jon*,phone=+64 21*"}
+FORMATS = ["csv", "json"]
+DISPLAY_FORMATS = ["text", "html"]
+BATCH_SIZE = 100000
+REPEAT = 3
+THRESHOLD = 0.1
+
+
+def time_best(run, repeat, setup=None) -> float:
+    """
+    A module function to time the fastest of several runs of an operation
+    ...
+    Parameters
+    ----------
+    run : callable
+        a function performing the operation
+    repeat : int
+        the number of times to run it
+    setup : callable
+        a function called untimed before each run (default is None)
+    ...
+    Returns
+    -------
+    float
+        the number of seconds the fastest run took
+    """
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def build_register(count, seed) -> float:
+    """
+    A module function to replace the register with one of synthetic
+    contacts, added a batch at a time
+    ...
+    Parameters
+    ----------
+    count : int
+        the number of contacts to add
+    seed : int
+        the random seed to generate them from
+    ...
+    Returns
+    -------
+    float
+        the number of seconds adding the batches took, leaving out the time
+        taken to generate them
+    """
+    contactregister.contacts = ContactStore()
+    # Build the indexes over the empty store, so each batch is indexed as it is added
+    contactregister.get_search_index().sync(contactregister.contacts)
+    contactregister.get_phone_index().sync(contactregister.contacts)
+    rows = generate_rows(count, seed)
+    elapsed = 0
+    while True:
+        batch = list(itertools.islice(rows, BATCH_SIZE))
+        if not batch:
+            return elapsed
+        started = time.perf_counter()
+        contactregister.add_contacts(batch)
+        elapsed += time.perf_counter() - started
+
+
+def import_into_store(module, path) -> ContactStore:
+    """
+    A module function to import a file into an empty store the way
+    contactregister.import_contacts does, streaming it in batches where the
+    format allows
+    ...
+    Parameters
+    ----------
+    module : module
+        the serialisation format module to import with
+    path : str
+        the path of the file to import
+    ...
+    Returns
+    -------
+    ContactStore
+        the store of imported contacts
+    """
+    store = ContactStore()
+    if hasattr(module, 'import_contact_batches'):
+        for batch in module.import_contact_batches(path=path):
+            store.extend(batch)
+    else:
+        store.extend(module.import_contacts(path))
+    return store
+
+
+def run_scale(count, seed, repeat, directory) -> {str: dict}:
+    """
+    A module function to time each operation on a register of one size
+    ...
+    Parameters
+    ----------
+    count : int
+        the number of contacts in the register
+    seed : int
+        the random seed to generate them from
+    repeat : int
+        the number of runs to time each operation over
+    directory : str
+        the directory to write exports and pages to
+    ...
+    Returns
+    -------
+    {str: dict}
+        the seconds each operation took under "timings", and the number of
+        contacts each query matched under "matches"
+    """
+    timings, matches = {}, {}
+    print(f'{count} contacts:')
+
+    def record(name, elapsed):
+        timings[name] = elapsed
+        print(f'    {name:<30} {elapsed:10.4f} s')
+
+    record("add_contacts", build_register(count, seed))
+    # Time building each index over the whole register from scratch
+    fields, fuzzy_fields = Contact.supported_search_fields, Contact.supported_fuzzy_fields
+    for name, build in [("search", lambda: SearchIndex(fields, fuzzy_fields)), ("phones", PhoneIndex),
+                        ("duplicates", DuplicateIndex)]:
+        record(f'index.{name}', time_best(lambda: build().sync(contactregister.contacts), repeat))
+    # Time each query from a cold cache, the indexes having been built alongside the register
+    for name, query in QUERIES.items():
+        record(f'search.{name}', time_best(lambda: contactregister.search_contacts(query), repeat,
+                                           setup=contactregister.get_search_cache().clear))
+        matches[name] = len(contactregister.search_contacts(query))
+    # Time each format's export, then its import of that export
+    for export_format in FORMATS:
+        module = serialisation.formats.load(export_format)
+        path = os.path.join(directory, f'contacts.{export_format}')
+        record(f'export.{export_format}',
+               time_best(lambda: module.export_contacts(contactregister.contacts, path=path), repeat))
+        record(f'import.{export_format}', time_best(lambda: import_into_store(module, path), repeat))
+    # Time displaying as text to os.devnull, and writing HTML pages without opening them
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        text = time_best(lambda: contactregister.display_contacts("text"), repeat)
+    record("display.text", text)
+    html = display.formats.load("html")
+    path = Path(directory) / "contacts.html"
+    record("display.html", time_best(lambda: html.write_pages(contactregister.contacts, path=path), repeat))
+    return {"timings": timings, "matches": matches}
+
+
+def run(scales, seed=0, repeat=REPEAT) -> dict:
+    """
+    A module function to run the suite at each scale and print its results
+    ...
+    Parameters
+    ----------
+    scales : [int]
+        the numbers of contacts to run the suite with
+    seed : int
+        the random seed to generate contacts from (default is 0)
+    repeat : int
+        the number of runs to time each operation over (default is REPEAT)
+    ...
+    Returns
+    -------
+    dict
+        the results of the run, as written to its JSON file
+    """
+    results = {"started": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+               "python": platform.python_version(),
+               "platform": platform.platform(),
+               "seed": seed,
+               "repeat": repeat,
+               "scales": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in scales:
+            results["scales"][str(count)] = run_scale(count, seed, repeat, directory)
+    # Leave an empty register behind rather than holding on to the largest one
+    contactregister.contacts = ContactStore()
+    return results
+
+
+def compare_results(results, baseline, threshold=THRESHOLD) -> [str]:
+    """
+    A module function to compare a run's timings against an earlier run's,
+    printing the ratio of each timing the two runs share
+    ...
+    Parameters
+    ----------
+    results : dict
+        the results of the new run
+    baseline : dict
+        the results of the earlier run
+    threshold : float
+        the fraction a timing may grow by before it counts as a regression
+        (default is THRESHOLD)
+    ...
+    Returns
+    -------
+    [str]
+        the scale and name of each timing which regressed
+    """
+    if results["seed"] != baseline["seed"]:
+        print(f'Warning: comparing runs with different seeds ({results["seed"]} and {baseline["seed"]})')
+    regressions = []
+    print('Compared with baseline:')
+    for scale, scale_results in results["scales"].items():
+        earlier = baseline["scales"].get(scale, {}).get("timings", {})
+        for name, elapsed in scale_results["timings"].items():
+            if not earlier.get(name):
+                continue
+            ratio = elapsed / earlier[name]
+            regressed = ratio > 1 + threshold
+            if regressed:
+                regressions.append(f'{scale}/{name}')
+            print(f'    {f"{scale}/{name}":<40} {ratio:6.2f}x{"  regression" if regressed else ""}')
+    return regressions
+
+
+def main(arguments) -> int:
+    """
+    A module function to run the suite from the command line
+    ...
+    Parameters
+    ----------
+    arguments : [str]
+        the command line arguments, without the program name
+    ...
+    Returns
+    -------
+    int
+        the exit status, 1 if any timing regressed against the baseline and
+        0 otherwise
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite",
+                                     description="Times contactregister operations on synthetic registers.")
+    parser.add_argument("scales", nargs="*", type=int, default=SCALES, metavar="count",
+                        help="the numbers of contacts to run the suite with")
+    parser.add_argument("--seed", type=int, default=0, help="the random seed to generate contacts from")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="the number of runs to time each operation over")
+    parser.add_argument("--output", default="benchmark-results.json", help="the JSON file to write the results to")
+    parser.add_argument("--compare", metavar="baseline", help="an earlier results file to compare the timings with")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="the fraction a timing may grow by before it counts as a regression")
+    options = parser.parse_args(arguments)
+    results = run(options.scales, options.seed, options.repeat)
+    with open(options.output, 'w') as file:
+        json.dump(results, file, indent=4)
+    print(f'Results written to {options.output}')
+    if not options.compare:
+        return 0
+    with open(options.compare) as file:
+        baseline = json.load(file)
+    return 1 if compare_results(results, baseline, options.threshold) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -7,35 +7,87 @@ to various formats specified in its submodules.
 
 This script exposes the following API functions:
     * add_contact - adds a new contact to the system
+    * add_contacts - adds many new contacts to the system at once
     * get_all_contacts - returns all current system contacts
     * search_contacts - returns contacts based on a search query
+    * lookup_by_phone - returns the contacts with a given phone number
     * display_contacts - displays all contacts in a specified format
     * export_contacts - exports all contacts to a specified format
     * import_contacts - imports all contacts from a specified format
+    * import_contact_shards - imports contacts from many files in parallel
+    * use_store - keeps all contacts in a format's persistent store
+    * open_journal - loads contacts from a snapshot and journals new ones
+    * compact_journal - folds the journal into a fresh snapshot
+    * close_journal - flushes and closes the journal
+    * get_search_index - returns the search index, creating it on first use
+    * get_search_cache - returns the search cache, creating it on first use
+    * get_duplicate_index - returns the duplicate index, creating it on first use
+    * get_phone_index - returns the phone index, creating it on first use
+
+Stores able to search themselves, such as the SQLite store, answer
+queries directly rather than through the in-memory search indexes,
+though phone lookups on them still go through the phone index.
+
+While a journal is open, each added contact is appended to it and synced
+to disk by group commit, and the journal is compacted into a snapshot
+once it grows large or after a bulk import.
+
+Adds and imports can drop duplicates of stored contacts (those sharing a
+name, ignoring case, and normalised phone number), either skipping them or merging
+them into the stored contact. The number dropped is counted by
+get_duplicate_index().dropped.
+
+Fuzzy queries (field~=value) tolerate typos, returning the contacts
+within FUZZY_DISTANCE edits of the value ranked by similarity, and are
+answered through a BK-tree over each fuzzy field.
+
+Phone lookups go through a hash index keyed on the normalised number (its
+international digits, with national numbers taken to be in the country of
+helpers.COUNTRY_CODE). Like the search
+indexes, it is built by the first lookup and kept up to date on every add
+and import from then on.
+
+Search results are cached until the next write, and the cache's hit and
+miss counters are exposed through get_search_cache().info().
 
 This file can be imported as a module and additionally offers an
 interactive session mode for CLI operation using the following function:
     * run_interactive_session - starts the interactive CLI session
 
 If the file is invoked directly (as main) it will launch the interactive
-mode by default.
+mode by default, or run a non-interactive batch command (see batch.py) if
+given any arguments.
 """
 
 from helpers import MalformedQuery, UnknownQueryField, NonexistentFile
+from models.ContactStore import ContactStore
 from models.Contact import Contact
 import serialisation
+import itertools
 import display
 import helpers
-import importlib
-import fnmatch
+import time
 import sys
 
 
-# Initialise contact list
-contacts = []
+# Define module constants
+SEARCH_CACHE_SIZE = 128
+SNAPSHOT_FORMAT = "binary"
+DEDUP_MODES = ["skip", "merge"]
+FUZZY_DISTANCE = 2
 
+# Initialise the contact store, leaving the search indexes and cache kept over it to be
+# created on first use, as most sessions never search, look up or deduplicate
+contacts = ContactStore()
+search_index = None
+search_cache = None
+duplicate_index = None
+phone_index = None
+# Leave journaling off until a journal is opened
+journal = None
 
-def add_contact(name, address, phone) -> Contact:
+
+def add_contact(name, address, phone, dedup=None) -> Contact:
     """
     A module function to add a new contact
     ...
@@ -47,43 +99,117 @@ def add_contact(name, address, phone) -> Contact:
         the contact's address
     phone : str
         the contact's phone number
+    dedup : str
+        how to handle a duplicate of a stored contact, either "skip" to drop
+        it or "merge" to fill in the stored contact's missing fields from it
+        (default is None, which adds duplicates)
     ...
     Returns
     -------
     Contact
-        the newly created contact object
+        the newly created contact object, or the stored contact it duplicates
     """
-    # Create a new contact, add it to the list, and return it
-    contact = Contact(name, address, phone)
-    contacts.append(contact)
+    if dedup:
+        # Drop a duplicate in favour of the stored contact
+        revision = contacts.revision
+        duplicates = get_duplicate_index()
+        if not duplicates.filter(contacts, [Contact(name, address, phone)], check_dedup_mode(dedup)):
+            if contacts.revision != revision:
+                # Handle a merge, which changed a stored contact the journal cannot record
+                checkpoint_journal()
+            return contacts[duplicates.find(contacts, name, phone)]
+    # Add a new contact to the store, and return it
+    row = contacts.add(name, address, phone)
+    contact = contacts[row]
+    sync_search_index()
+    if journal:
+        # Record the contact in the journal, compacting it if it has grown too large
+        journal.append(row, contact.to_list())
+        if journal.should_compact():
+            compact_journal()
     return contact
 
 
-def get_all_contacts() -> [Contact]:
+def add_contacts(new_contacts, dedup=None) -> [Contact]:
     """
-    A module function to return all contacts
+    A module function to add many new contacts at once
+
+    The contacts are stored in a single operation, and the indexes, search
+    cache and journal are brought up to date once for the whole batch rather
+    than once per contact.
+    ...
+    Parameters
+    ----------
+    new_contacts : [object]
+        the contacts to add, each either a contact object, a dictionary as
+        taken by Contact.from_dict, or a tuple of name, address and phone
+    dedup : str
+        how to handle duplicates, either "skip" to drop them or "merge" to
+        fill in the missing fields of the contacts they duplicate from them
+        (default is None, which adds duplicates)
     ...
     Returns
     -------
     [Contact]
-        a list of all contact objects
+        a sequence of the newly added contacts
+    """
+    # Build a contact object from each record
+    batch = [record if isinstance(record, Contact) else
+             Contact.from_dict(record) if isinstance(record, dict) else
+             Contact(*record) for record in new_contacts]
+    if dedup:
+        # Drop the duplicates in favour of the stored contacts or the first of the batch
+        revision = contacts.revision
+        batch = get_duplicate_index().filter(contacts, batch, check_dedup_mode(dedup))
+        if contacts.revision != revision:
+            # Handle a merge, which changed a stored contact the journal cannot record
+            checkpoint_journal()
+    # Add the contacts to the store in one go, then bring the indexes up to date
+    start = len(contacts)
+    contacts.extend(batch)
+    sync_search_index()
+    if journal:
+        # Record the contacts in the journal, compacting it if it has grown too large
+        journal.extend(start, (contact.to_list() for contact in batch))
+        if journal.should_compact():
+            compact_journal()
+    return contacts.view(start)
+
+
+def get_all_contacts() -> ContactStore:
+    """
+    A module function to return all contacts
+    ...
+    Returns
+    -------
+    ContactStore
+        the store of all contacts, which builds contact objects as they are read
     """
     # Return all contacts
     return contacts
 
 
-def search_contacts(query) -> [Contact]:
+def search_contacts(query, distance=FUZZY_DISTANCE) -> [Contact]:
     """
     A module function to search through all contacts via globbing
 
     Globbing accepts both * and ? standard operations and supplied
     queries should be comma-separated and generally take the form of:
         field=pattern (e.g. name=Jon*, address=*A Street)
+
+    A single filter may instead take the form field~=value (e.g.
+    name~=Jonathon) to match values within an edit distance, ignoring
+    case, in which case results are ranked closest first.
+
+    Results are cached per normalised query until the next write.
     ...
     Parameters
     ----------
     query : str
         the query string to be filtered with
+    distance : int
+        the greatest edit distance a fuzzy filter accepts (default is
+        FUZZY_DISTANCE)
     ...
     Returns
     -------
@@ -96,17 +222,96 @@ def search_contacts(query) -> [Contact]:
     except IndexError:
         # Handle bad query case
         raise MalformedQuery(query)
-    # Iteratively filter through all contacts for each query filter specified
-    matches = contacts
+    fuzzy = [f for f in filters if f.fuzzy]
+    if len(fuzzy) > 1:
+        # Handle queries with more than one fuzzy filter, which could not be ranked
+        raise MalformedQuery(query)
     for f in filters:
-        if f.field not in Contact.supported_search_fields:
+        if f.field not in (Contact.supported_fuzzy_fields if f.fuzzy else Contact.supported_search_fields):
             # Handle unknown fields case
             raise UnknownQueryField(f.field)
-        # Filter previously matched contacts on a pattern/field basis
-        matches = [match for match in matches if fnmatch.fnmatch(getattr(match, f.field), f.pattern)]
+    # Answer repeated queries from the cache, ignoring filter order
+    key = tuple(sorted((f.field, f.fuzzy, f.pattern) for f in filters)) + ((distance,) if fuzzy else ())
+    cache = get_search_cache()
+    matches = cache.get(key, contacts.generation)
+    if matches is None:
+        # Import the query planner only once needed, as it pulls in the pattern compiler
+        from search.planner import plan_query
+        if fuzzy:
+            matches = rank_fuzzy_matches(fuzzy[0], [f for f in filters if not f.fuzzy], distance)
+        elif hasattr(contacts, 'search'):
+            # Push the query down to stores able to search themselves
+            matches = contacts.search(filters)
+        else:
+            # Catch the indexes up on any contacts added to the store directly, then plan
+            # the query around its most selective filter and run it
+            index = get_search_index()
+            index.sync(contacts)
+            matches = plan_query(filters, index).execute(contacts)
+        cache.put(key, contacts.generation, matches)
     return matches
 
 
+def rank_fuzzy_matches(fuzzy_filter, filters, distance) -> [Contact]:
+    """
+    A module function to find the contacts within an edit distance of a
+    fuzzy filter's value, which also match every one of a list of globbing
+    filters, ranked closest first
+    ...
+    Parameters
+    ----------
+    fuzzy_filter : QueryFilter
+        the parsed, validated fuzzy filter
+    filters : [QueryFilter]
+        the parsed, validated globbing filters
+    distance : int
+        the greatest edit distance to accept
+    ...
+    Returns
+    -------
+    [Contact]
+        a list of matching contacts, closest first and otherwise in row order
+    """
+    # Import the fuzzy matching and the query planner only once needed, as most sessions never use them
+    from search.planner import CompiledFilter
+    from search.fuzzy import rank_contacts
+    if hasattr(contacts, 'search'):
+        # Rank what stores able to search themselves return for the globbing filters
+        return rank_contacts(contacts.search(filters), fuzzy_filter.field, fuzzy_filter.pattern, distance)
+    # Find the rows in range through the BK-tree, then check them against the globbing filters
+    index = get_search_index()
+    index.sync(contacts)
+    rows = [row for _found, row in index.fuzzy[fuzzy_filter.field].search(fuzzy_filter.pattern, distance)]
+    for compiled in map(CompiledFilter, filters):
+        column = contacts.column(compiled.field)
+        rows = [row for row in rows if compiled.match(column[row])]
+    return [contacts[row] for row in rows]
+
+
+def lookup_by_phone(number) -> [Contact]:
+    """
+    A module function to look up contacts by phone number
+
+    Numbers are compared by their international digits (see
+    helpers.normalise_phone), so any formatting of a number, whether
+    national or international, finds the same contacts.
+    ...
+    Parameters
+    ----------
+    number : str
+        the phone number to look up
+    ...
+    Returns
+    -------
+    [Contact]
+        a list of the contacts with the number, in row order
+    """
+    # Catch the index up on any contacts added to the store directly, then look the number up
+    index = get_phone_index()
+    index.sync(contacts)
+    return [contacts[row] for row in index.lookup(number)]
+
+
 def display_contacts(display_format) -> None:
     """
     A module function to display all contacts
@@ -116,50 +321,405 @@ def display_contacts(display_format) -> None:
     display_format : str
         the name of the display format to use (text, html, etc.)
     """
-    # Dynamically import the specified display format module and run its display method
-    importlib.import_module(f'display.{display_format}').display_contacts(contacts)
+    # Look up the specified display format module, importing it on first use, and run its display method
+    display.formats.load(display_format).display_contacts(contacts)
 
 
-def export_contacts(export_format) -> str:
+def export_contacts(export_format, delta=False) -> str:
     """
     A module function to export all contacts
+
+    The store keeps a high-water mark of the rows each format last
+    exported. A delta export appends only the contacts added since then,
+    provided the format can append and its file is still as that export
+    left it, and otherwise falls back to rewriting the whole file.
     ...
     Parameters
     ----------
     export_format : str
         the name of the export format to use (csv, json, etc.)
+    delta : bool
+        whether to append only the contacts added since the last export
+        where possible (default is False)
     ...
     Returns
     -------
     str
         the string path of the exported file
     """
-    # Dynamically import the specified serialisation format module and run its export method
-    return importlib.import_module(f'serialisation.{export_format}').export_contacts(contacts)
-
-
-def import_contacts(import_format) -> [Contact]:
+    # Look up the specified serialisation format module, importing it on first use
+    module = serialisation.formats.load(export_format)
+    rows = len(contacts)
+    export_file = None
+    mark = contacts.exports.get(export_format)
+    data_file = getattr(module, 'DATA_FILE', None)
+    if delta and mark and data_file and hasattr(module, 'append_contacts') and \
+            mark[1] == helpers.file_signature(data_file):
+        # Append the contacts past the mark, unless the format would rather be rewritten
+        export_file = module.append_contacts(contacts.view(mark[0])) if mark[0] < rows else data_file
+    if export_file is None:
+        # Otherwise run the format's export method
+        export_file = module.export_contacts(contacts)
+    contacts.exports[export_format] = (rows, helpers.file_signature(export_file))
+    return export_file
+
+
+def import_contacts(import_format, progress=None, workers=None, dedup=None) -> [Contact]:
     """
     A module function to import contacts from a file
+
+    Formats able to open their file for lazy access are attached to the
+    store without being read, and their contacts are only decoded when
+    searched, displayed or exported. Formats able to stream their contacts
+    in batches are ingested one batch at a time, with the indexes updated
+    after each batch. Given a number of workers, formats able to parse
+    parts of their file in parallel are split across worker processes.
     ...
     Parameters
     ----------
     import_format : str
         the name of the import format to use (csv, json, etc.)
+    progress : callable
+        a function called after each streamed batch with the rows imported
+        so far, the bytes read so far and the rows imported per second
+        (default is None)
+    workers : int
+        the number of worker processes to parse the file with, where the
+        format supports it (default is None, which parses it in-process)
+    dedup : str
+        how to handle duplicates, either "skip" to drop them or "merge" to
+        fill in the missing fields of the contacts they duplicate from them
+        (default is None, which imports duplicates)
     ...
     Returns
     -------
     [Contact]
-        a list of the newly imported contacts
+        a sequence of the newly imported contacts
     """
+    # Look up the specified serialisation format module, importing it on first use
+    module = serialisation.formats.load(import_format)
+    start = len(contacts)
+    duplicates = get_duplicate_index()
+    dropped = duplicates.dropped
+    # Only formats naming their file can have an import marked as an export, as the mark records its state
+    data_file = getattr(module, 'DATA_FILE', None)
+    # Time streamed imports for progress reports
+    started = time.perf_counter()
+
+    def report_progress(rows, bytes_read):
+        progress(rows, bytes_read, rows / max(time.perf_counter() - started, 1e-9))
+
+    report = report_progress if progress else None
     try:
-        # Dynamically import the specified serialisation format module and run its import method
-        new_contacts = importlib.import_module(f'serialisation.{import_format}').import_contacts()
+        if dedup:
+            # Stream batches through the duplicate index, dropping duplicates before they are stored
+            merge = check_dedup_mode(dedup)
+            if hasattr(module, 'import_contact_batches'):
+                batches = module.import_contact_batches(progress=report)
+            else:
+                batches = [module.import_contacts()]
+            for contact_batch in batches:
+                contacts.extend(duplicates.filter(contacts, contact_batch, merge))
+                sync_search_index()
+        elif hasattr(module, 'open_contacts'):
+            # Attach the mapped file to the store, leaving its records undecoded until first searched
+            contacts.attach(module.open_contacts())
+            if not start and data_file:
+                # Mark a file attached to an empty store as exported, so it can be appended to
+                contacts.exports[import_format] = (len(contacts), helpers.file_signature(data_file))
+            checkpoint_journal()
+            return contacts.view(start)
+        elif workers and hasattr(module, 'import_contact_columns'):
+            # Merge each parallel parsed range into the store in file order
+            for columns in module.import_contact_columns(workers=workers, progress=report):
+                contacts.extend_columns(columns)
+        elif hasattr(module, 'import_contact_batches'):
+            # Stream batches straight into the store
+            for contact_batch in module.import_contact_batches(progress=report):
+                contacts.extend(contact_batch)
+                sync_search_index()
+        else:
+            # Otherwise run the format's import method and add its contacts to the store
+            contacts.extend(module.import_contacts())
     except FileNotFoundError:
         raise NonexistentFile(f'data/contacts.{import_format}')
-    # Add the new contacts to current contacts and return those newly created ones
-    contacts.extend(new_contacts)
-    return new_contacts
+    if not start and data_file and duplicates.dropped == dropped:
+        # Mark a file imported whole into an empty store as exported, so it can be appended to
+        contacts.exports[import_format] = (len(contacts), helpers.file_signature(data_file))
+    elif not start:
+        # Leave a file some of whose contacts were dropped or merged to be rewritten by the next export
+        contacts.exports.pop(import_format, None)
+    sync_search_index()
+    checkpoint_journal()
+    # Return a view of the newly imported contacts
+    return contacts.view(start)
+
+
+def import_contact_shards(import_format, pattern, workers=None) -> [Contact]:
+    """
+    A module function to import contacts from many files of one format,
+    parsing the files in parallel worker processes
+
+    Each worker hands its file back as one column of values per field,
+    which is far cheaper to send between processes than contact objects.
+    Files are merged into the store in path order as they finish, so the
+    result is the same as importing them one after another.
+    ...
+    Parameters
+    ----------
+    import_format : str
+        the name of the import format to use (csv, json, etc.)
+    pattern : str
+        a glob pattern matching the paths of the files to import
+    workers : int
+        the number of worker processes to use (default is None, which uses
+        one per CPU)
+    ...
+    Returns
+    -------
+    [Contact]
+        a sequence of the newly imported contacts
+    """
+    # Import glob only once needed, as only sharded imports use it
+    import glob
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise NonexistentFile(pattern)
+    start = len(contacts)
+    # Import the process pool only once needed, as it is slow to import and most sessions never use it
+    from concurrent.futures import ProcessPoolExecutor
+    # Parse the files across a pool of processes, merging each into the store in turn
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for columns in executor.map(read_shard, itertools.repeat(import_format), paths):
+            contacts.extend_columns(columns)
+    sync_search_index()
+    checkpoint_journal()
+    return contacts.view(start)
+
+
+def read_shard(import_format, path) -> [[str]]:
+    """
+    A module function to parse a single file in a worker process
+    ...
+    Parameters
+    ----------
+    import_format : str
+        the name of the import format to use (csv, json, etc.)
+    path : str
+        the path of the file to parse
+    ...
+    Returns
+    -------
+    [[str]]
+        the file's values of each field, in field order
+    """
+    shard = serialisation.formats.load(import_format).import_contacts(path)
+    return [[getattr(contact, field) for contact in shard] for field in Contact.supported_search_fields]
+
+
+def use_store(store_format):
+    """
+    A module function to keep all contacts in a format's persistent store
+    rather than in memory, carrying over any contacts already held
+    ...
+    Parameters
+    ----------
+    store_format : str
+        the name of a serialisation format providing open_store (sqlite)
+    ...
+    Returns
+    -------
+    object
+        the newly opened store
+    """
+    global contacts
+    # Look up the specified serialisation format module, importing it on first use, and open its store
+    store = serialisation.formats.load(store_format).open_store()
+    if len(contacts):
+        store.extend(contacts)
+    contacts = store
+    return store
+
+
+def open_journal(snapshot_format=SNAPSHOT_FORMAT, interval=None, compact_size=None) -> int:
+    """
+    A module function to load all contacts from a snapshot and its journal,
+    and to journal every contact added from then on
+
+    The store is replaced by the snapshot (the last export in the given
+    format), and any journaled contacts added since are replayed on top.
+    ...
+    Parameters
+    ----------
+    snapshot_format : str
+        the name of the serialisation format holding the snapshot (default
+        is SNAPSHOT_FORMAT)
+    interval : float
+        the number of seconds between group commits of the journal, or 0
+        to sync every added contact immediately (default is None, which uses
+        journal.FLUSH_INTERVAL)
+    compact_size : int
+        the number of journaled contacts after which the journal is folded
+        into a new snapshot (default is None, which uses journal.COMPACT_SIZE)
+    ...
+    Returns
+    -------
+    int
+        the number of contacts replayed from the journal
+    """
+    global contacts, journal
+    # Import the journal only once opened, as it is slow to import and journaling is off by default
+    from journal import Journal, FLUSH_INTERVAL, COMPACT_SIZE
+    close_journal()
+    # Load the snapshot, if there is one yet, into an empty store
+    contacts = ContactStore()
+    try:
+        import_contacts(snapshot_format)
+    except NonexistentFile:
+        pass
+    # Replay the journal on top of the snapshot and start appending to it
+    journal = Journal(interval=FLUSH_INTERVAL if interval is None else interval, snapshot_format=snapshot_format,
+                      compact_size=COMPACT_SIZE if compact_size is None else compact_size)
+    replayed = journal.replay(contacts)
+    sync_search_index()
+    return replayed
+
+
+def compact_journal() -> None:
+    """
+    A module function to fold the open journal into a new snapshot of all
+    contacts, and then empty it
+    """
+    # Write the snapshot, and make sure it is on disk, before emptying the journal, as replay
+    # skips whatever the snapshot holds
+    journal.flush()
+    helpers.sync_file(export_contacts(journal.snapshot_format, delta=True))
+    journal.reset()
+
+
+def checkpoint_journal() -> None:
+    """
+    A module function to compact the journal, if one is open, after contacts
+    have been added without being journaled (such as by an import)
+    """
+    if journal:
+        compact_journal()
+
+
+def close_journal() -> None:
+    """
+    A module function to flush and close the open journal, if there is one
+    """
+    global journal
+    if journal:
+        journal.close()
+        journal = None
+
+
+def check_dedup_mode(dedup) -> bool:
+    """
+    A module function to check a deduplication mode is supported
+    ...
+    Parameters
+    ----------
+    dedup : str
+        the deduplication mode to check
+    ...
+    Returns
+    -------
+    bool
+        whether the mode merges duplicates
+    """
+    if dedup not in DEDUP_MODES:
+        raise ValueError(f'Unknown deduplication mode "{dedup}", expected one of {DEDUP_MODES}')
+    return dedup == "merge"
+
+
+def sync_search_index() -> None:
+    """
+    A module function to catch the search and phone indexes up on the
+    store, leaving out the search index if the store answers its searches
+    itself
+
+    Only indexes already built over the store are caught up. Any others
+    are left to be built by the first search or lookup needing them, so
+    a store loaded from a mapped file is not decoded until then.
+    """
+    for index in (phone_index,) if hasattr(contacts, 'search') else (search_index, phone_index):
+        if index is not None and index.source is contacts:
+            index.sync(contacts)
+
+
+def get_search_index():
+    """
+    A module function to return the search index kept over the store,
+    creating it on first use
+    ...
+    Returns
+    -------
+    SearchIndex
+        the search index, which is only built over the store once synced
+    """
+    global search_index
+    if search_index is None:
+        # Import the search index only once needed, as most sessions never search
+        from search.index import SearchIndex
+        search_index = SearchIndex(Contact.supported_search_fields, Contact.supported_fuzzy_fields)
+    return search_index
+
+
+def get_search_cache():
+    """
+    A module function to return the cache of search results, creating it
+    on first use
+    ...
+    Returns
+    -------
+    SearchCache
+        the search cache, holding up to SEARCH_CACHE_SIZE results
+    """
+    global search_cache
+    if search_cache is None:
+        # Import the search cache only once needed, as most sessions never search
+        from search.cache import SearchCache
+        search_cache = SearchCache(SEARCH_CACHE_SIZE)
+    return search_cache
+
+
+def get_duplicate_index():
+    """
+    A module function to return the index of stored contacts by their
+    duplicate key, creating it on first use
+    ...
+    Returns
+    -------
+    DuplicateIndex
+        the duplicate index, which also counts the duplicates dropped
+    """
+    global duplicate_index
+    if duplicate_index is None:
+        # Import the duplicate index only once needed, as most sessions never deduplicate
+        from search.duplicates import DuplicateIndex
+        duplicate_index = DuplicateIndex()
+    return duplicate_index
+
+
+def get_phone_index():
+    """
+    A module function to return the index of stored contacts by their
+    normalised phone number, creating it on first use
+    ...
+    Returns
+    -------
+    PhoneIndex
+        the phone index, which is only built over the store once synced
+    """
+    global phone_index
+    if phone_index is None:
+        # Import the phone index only once needed, as most sessions never look a number up
+        from search.phones import PhoneIndex
+        phone_index = PhoneIndex()
+    return phone_index
 
 
 def run_interactive_session():
@@ -171,6 +731,7 @@ def run_interactive_session():
         * add - add a new contact
         * list - list all contacts
         * search - filter contacts via globbing
+        * fuzzy - find contacts by a misspelt name
         * display - display contacts in a specified format
         * export - export contacts to a specified format
         * import - import contacts from a specified format
@@ -229,6 +790,18 @@ def run_interactive_session():
                 _type, value, _traceback = sys.exc_info()
                 print(f'Could not search on malformed query "{value.query}"')
 
+        # FUZZY SEARCH CONTACTS
+        elif command == "fuzzy":
+            # Get a name from the user, and search for it allowing for typos
+            name = input("Name: ").strip()
+            try:
+                results = search_contacts(f'name~={name}')
+                print(f'Showing {len(results)} results within {FUZZY_DISTANCE} edits, closest first...')
+                [print(contact) for contact in results]
+            except MalformedQuery:
+                # Handle names which cannot be queried, such as those containing commas
+                print(f'Could not search for name "{name}"')
+
         # DISPLAY CONTACTS
         elif command == "display":
             # Get a list of supported display formats and have the user select one
@@ -254,10 +827,17 @@ def run_interactive_session():
             import_formats = serialisation.get_formats()
             helpers.display_command_options(import_formats, "Import format options:")
             selected_format = helpers.get_option_selection(import_formats, prompt="Format: ")
+            # Have the user select how duplicates of stored contacts should be handled
+            dedup_options = ["keep"] + DEDUP_MODES
+            helpers.display_command_options(dedup_options, "Duplicate handling options:")
+            selected_dedup = helpers.get_option_selection(dedup_options, prompt="Duplicates: ")
+            dropped = get_duplicate_index().dropped
             try:
-                # Import all contacts from the selected format
-                new_contacts = import_contacts(selected_format)
-                print(f'Successfully imported {len(new_contacts)} contacts')
+                # Import all contacts from the selected format, reporting progress as it streams in
+                new_contacts = import_contacts(selected_format, progress=helpers.print_import_progress,
+                                               dedup=None if selected_dedup == "keep" else selected_dedup)
+                print(f'Successfully imported {len(new_contacts)} contacts'
+                      f' ({get_duplicate_index().dropped - dropped} duplicates dropped)'.ljust(helpers.PROGRESS_WIDTH))
             except NonexistentFile:
                 # Handle bad query case
                 _type, value, _traceback = sys.exc_info()
@@ -271,6 +851,7 @@ def run_interactive_session():
                   "    * add     - ADD CONTACT: add a new contact\n"
                   "    * list    - LIST ALL CONTACTS: view all contacts\n"
                   "    * search  - SEARCH CONTACTS: search through contacts with globbing\n"
+                  "    * fuzzy   - FUZZY SEARCH CONTACTS: find contacts by a misspelt name\n"
                   "    * display - DISPLAY CONTACTS: display contacts in a given format\n"
                   "    * export  - EXPORT CONTACTS: export contacts to a given format\n"
                   "    * import  - IMPORT CONTACTS: import contacts from a given format\n"
@@ -291,6 +872,9 @@ def run_interactive_session():
             print(f'No such command "{command}", type "?" for a list of available commands')
 
 
-# Run module as script if it's invoked as main
+# Run module as script if it's invoked as main, running a batch command if one is given as arguments
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        import batch
+        sys.exit(batch.run_batch_session(sys.argv[1:]))
     run_interactive_session()
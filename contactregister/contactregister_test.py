@@ -1,12 +1,38 @@
-from contextlib import redirect_stdout
+from contextlib import redirect_stdout, redirect_stderr
+from serialisation import csv as csv_serialisation
+from search.fuzzy import BKTree, edit_distance
+from models.ContactStore import ContactStore
+from search.duplicates import DuplicateIndex
+from search.ordered import SortedIndex
+from search.planner import plan_query
+from benchmarks import generate_rows
+from search.phones import PhoneIndex
+from search.patterns import sql_glob
+from search.cache import SearchCache
+from search.index import SearchIndex
 from models.Contact import Contact
+from serialisation import binary
+from serialisation import sqlite
+from serialisation import ndjson
+from benchmarks import startup
+from benchmarks import suite
+from unittest import mock
 from display import html
+from display import text
 import contactregister
+import serialisation
+import tracemalloc
+import subprocess
 import unittest
 import helpers
+import fnmatch
+import sqlite3
+import journal
+import batch
 import json
 import glob
 import csv
+import sys
 import os
 import io
 
@@ -17,7 +43,7 @@ class ContactRegisterTestCase(unittest.TestCase):
         files = glob.glob('../data/*')
         for f in files:
             os.remove(f)
-        contactregister.contacts = []
+        contactregister.contacts = ContactStore()
 
 
 class AddContact(ContactRegisterTestCase):
@@ -31,6 +57,33 @@ class AddContact(ContactRegisterTestCase):
         contactregister.add_contact("Bon Bon", "124 Goodbye St", "+614090001")
         self.assertEqual(2, len(contactregister.contacts))
 
+    def test_add_bulk(self):
+        self.assertEqual(0, len(contactregister.search_contacts("name=*on*")))
+        new_contacts = contactregister.add_contacts([Contact("Jon Jon", "123 Hello Rd", "+614090000"),
+                                                     {"name": "Ron Ron", "address": "", "phone": "+614090002"},
+                                                     ("Bon Bon", "124 Goodbye St", "+614090001")])
+        self.assertEqual([Contact("Jon Jon", "123 Hello Rd", "+614090000"),
+                          Contact("Ron Ron", "-", "+614090002"),
+                          Contact("Bon Bon", "124 Goodbye St", "+614090001")], list(new_contacts))
+        self.assertEqual(3, len(contactregister.search_contacts("name=*on*")))
+        self.assertEqual(3, contactregister.search_index.size)
+
+    def test_add_bulk_dedup(self):
+        contactregister.add_contact("Jon Jon", "-", "+614090000")
+        new_contacts = contactregister.add_contacts([("Jon Jon", "123 Hello Rd", "+614090000"),
+                                                     ("Ron Ron", "125 Welcome Plc", "+614090002"),
+                                                     ("ron ron", "-", "+614090002")], dedup="merge")
+        self.assertEqual([Contact("Ron Ron", "125 Welcome Plc", "+614090002")], list(new_contacts))
+        self.assertEqual(Contact("Jon Jon", "123 Hello Rd", "+614090000"), contactregister.contacts[0])
+
+    def test_add_bulk_merge_leaves_input(self):
+        ron_ron = Contact("Ron Ron", "-", "+614090002")
+        held = {ron_ron}
+        contactregister.add_contacts([ron_ron, Contact("ron ron", "125 Welcome Plc", "+614090002")], dedup="merge")
+        self.assertEqual([Contact("Ron Ron", "125 Welcome Plc", "+614090002")], list(contactregister.contacts))
+        self.assertEqual("-", ron_ron.address)
+        self.assertIn(ron_ron, held)
+
 
 class ListContacts(ContactRegisterTestCase):
 
@@ -78,6 +131,248 @@ class SearchContacts(ContactRegisterTestCase):
         self.assertEqual(2, len(contactregister.search_contacts("address = *el*")))
 
 
+class CompactContacts(ContactRegisterTestCase):
+
+    def test_fixed_layout(self):
+        contact = Contact("Jon Jon", "123 Hello Rd", "+614090000")
+        self.assertFalse(hasattr(contact, "__dict__"))
+        with self.assertRaises(AttributeError):
+            contact.email = "jon@example.com"
+
+    @staticmethod
+    def get_bytes_per_contact(contact_class):
+        values = ["Jon Jon", "123 Hello Rd", "+614090000"]
+        tracemalloc.start()
+        contacts = [contact_class(*values) for _ in range(1000)]
+        size, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size / len(contacts)
+
+    def test_bytes_per_contact(self):
+        class UnslottedContact:
+            def __init__(self, name, address, phone):
+                self.name, self.address, self.phone = name, address, phone
+
+        # Object header sizes vary between Python versions, so compare against an unslotted equivalent
+        slotted, unslotted = self.get_bytes_per_contact(Contact), self.get_bytes_per_contact(UnslottedContact)
+        self.assertLessEqual(slotted, unslotted * 0.75)
+
+    def test_values_interned(self):
+        first = Contact.from_list(["Jon Jon", "".join(["123 Hello", " Rd"]), "".join(["-", ""])])
+        second = Contact.from_dict({"name": "Ron Ron", "address": "".join(["123 Hello", " Rd"]), "phone": "-"})
+        self.assertIs(first.address, second.address)
+        self.assertIs(first.phone, second.phone)
+
+
+class StoreContacts(ContactRegisterTestCase):
+
+    def test_columns_interned(self):
+        store = ContactStore()
+        store.add("Jon Jon", "".join(["123 Hello", " Rd"]), "")
+        store.append(Contact("Ron Ron", "".join(["123 Hello", " Rd"]), "+614090002"))
+        self.assertIs(store.column("address")[0], store.column("address")[1])
+        self.assertEqual(["Jon Jon", "Ron Ron"], store.column("name"))
+        self.assertEqual(["Jon Jon", "123 Hello Rd", "-"], store.row(0))
+
+    def test_contacts_built_on_read(self):
+        jon_jon = Contact("Jon Jon", "123 Hello Rd", "+614090000")
+        store = ContactStore()
+        store.extend([jon_jon, jon_jon])
+        self.assertEqual(2, len(store))
+        self.assertEqual(jon_jon, store[1])
+        self.assertIsNot(store[1], store[1])
+        self.assertEqual([jon_jon, jon_jon], list(store))
+
+    def test_generation_changes_on_write(self):
+        store, other = ContactStore(), ContactStore()
+        self.assertNotEqual(store.generation, other.generation)
+        generation = store.generation
+        store.add("Jon Jon", "123 Hello Rd", "+614090000")
+        self.assertNotEqual(generation, store.generation)
+
+
+class TrigramSearch(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact("Jon Smith", "123 Hello Rd", "+614090000"),
+                         Contact("Ron Smithers", "125 Welcome Plc", "+614090002"),
+                         Contact("Al", "[1] A Street", "+6404123"),
+                         Contact("Bon Bon", "124 Goodbye St", "+614090001")]
+        contactregister.contacts.extend(self.contacts)
+
+    def test_search_matches_full_scan(self):
+        for query in ["name=*mit*", "name=*on*", "name=*Smith", "name=A?", "address=*[1]*",
+                      "address=*[!1]*", "address=[*", "name=*S[m]ith*, phone=*0000",
+                      "address=*ell*Rd", "phone=*090*, name=*er*"]:
+            expected = [contact for contact in self.contacts if all(
+                fnmatch.fnmatch(getattr(contact, f.field), f.pattern) for f in helpers.parse_query_filters(query))]
+            self.assertEqual(expected, contactregister.search_contacts(query), query)
+
+    def test_candidates_narrowed(self):
+        index = SearchIndex(Contact.supported_search_fields)
+        index.sync(contactregister.contacts)
+        self.assertEqual([0, 1], list(index.trigrams["name"].candidates("*Smith*")))
+        self.assertEqual([1], list(index.trigrams["name"].candidates("*mithers*")))
+        self.assertEqual([], list(index.trigrams["name"].candidates("*xyz*")))
+        self.assertIsNone(index.trigrams["name"].candidates("*o?"))
+
+    def test_prefix_search_matches_full_scan(self):
+        for query in ["name=Jon*", "name=R*", "name=Jo?*", "phone=+6404*", "phone=+6140900??",
+                      "name=Al", "address=[1*", "name=Bon*, phone=+61*", "name=Z*"]:
+            expected = [contact for contact in self.contacts if all(
+                fnmatch.fnmatch(getattr(contact, f.field), f.pattern) for f in helpers.parse_query_filters(query))]
+            self.assertEqual(expected, contactregister.search_contacts(query), query)
+
+    def test_prefix_range(self):
+        index = SortedIndex()
+        index.extend(0, [contact.name for contact in self.contacts])
+        self.assertEqual(([0], True), (list(index.candidates("Jon*")[0]), index.candidates("Jon*")[1]))
+        self.assertEqual(([2], True), (list(index.candidates("Al")[0]), index.candidates("Al")[1]))
+        self.assertEqual(([0], False), (list(index.candidates("Jo?*")[0]), index.candidates("Jo?*")[1]))
+        self.assertEqual((None, False), index.candidates("*on"))
+        index.extend(4, ["Jon Jones"] * 100)
+        self.assertEqual(101, len(index.candidates("Jon*")[0]))
+
+    def test_suffix_search_matches_full_scan(self):
+        for query in ["address=*A Street", "address=*St", "name=*Smith", "phone=*0?",
+                      "address=*1]*Street", "name=Jon*Smith", "name=*on, address=*St", "address=*Avenue"]:
+            expected = [contact for contact in self.contacts if all(
+                fnmatch.fnmatch(getattr(contact, f.field), f.pattern) for f in helpers.parse_query_filters(query))]
+            self.assertEqual(expected, contactregister.search_contacts(query), query)
+
+    def test_suffix_range(self):
+        index = SortedIndex(reverse=True)
+        index.extend(0, [contact.address for contact in self.contacts])
+        self.assertEqual(([2], True), (list(index.candidates("*A Street")[0]), index.candidates("*A Street")[1]))
+        self.assertEqual(([3], True), (list(index.candidates("*St")[0]), index.candidates("*St")[1]))
+        self.assertEqual(([3], False), (list(index.candidates("*G?odbye St")[0]), index.candidates("*G?odbye St")[1]))
+        self.assertEqual((None, False), index.candidates("12*"))
+
+    def test_index_follows_new_contacts(self):
+        self.assertEqual(0, len(contactregister.search_contacts("name=*Jones*")))
+        contactregister.add_contact("Bob Jones", "1 Main Rd", "+6400")
+        self.assertEqual(1, len(contactregister.search_contacts("name=*Jones*")))
+
+
+class FuzzySearch(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact("Jon Smith", "123 Hello Rd", "+614090000"),
+                         Contact("Jonathan Smith", "125 Welcome Plc", "+614090002"),
+                         Contact("john  smith", "[1] A Street", "+6404123"),
+                         Contact("Bon Bon", "124 Goodbye St", "+614090001")]
+        contactregister.contacts.extend(self.contacts)
+
+    def test_edit_distance(self):
+        self.assertEqual(0, edit_distance("jon", "jon"))
+        self.assertEqual(3, edit_distance("kitten", "sitting"))
+        self.assertEqual(4, edit_distance("", "jon!"))
+
+    def test_search_ranked(self):
+        self.assertEqual([self.contacts[0], self.contacts[2]], contactregister.search_contacts("name~=Jon Smyth"))
+        self.assertEqual([self.contacts[2], self.contacts[0]], contactregister.search_contacts("name~=JOHN SMITH"))
+        self.assertEqual([self.contacts[0]], contactregister.search_contacts("name~=Jon Smyth", distance=1))
+        self.assertEqual([], contactregister.search_contacts("name~=Al Al"))
+
+    def test_search_with_glob_filters(self):
+        self.assertEqual([self.contacts[2]], contactregister.search_contacts("name~=Jon Smith, address=*Street"))
+
+    def test_tree_matches_full_scan(self):
+        names = ["jon", "john", "jonathan", "joan", "ron", "bon", "jo", "", "jonny", "johnny", "jon"]
+        tree = BKTree()
+        [tree.add(row, name) for row, name in enumerate(names)]
+        self.assertEqual(10, len(tree))
+        for query in ["jon", "jhon", "xyz", "jonathon", ""]:
+            for distance in range(4):
+                expected = sorted((edit_distance(query, name), row) for row, name in enumerate(names)
+                                  if edit_distance(query, name) <= distance)
+                self.assertEqual(expected, tree.search(query, distance), (query, distance))
+
+    def test_index_follows_new_contacts(self):
+        self.assertEqual(0, len(contactregister.search_contacts("name~=Bob Jones")))
+        contactregister.add_contact("Bob Jomes", "1 Main Rd", "+6400")
+        self.assertEqual(1, len(contactregister.search_contacts("name~=Bob Jones")))
+
+    def test_bad_queries(self):
+        with self.assertRaises(contactregister.UnknownQueryField):
+            contactregister.search_contacts("address~=123 Hello Rd")
+        with self.assertRaises(contactregister.MalformedQuery):
+            contactregister.search_contacts("name~=Jon, name~=Ron")
+
+    def test_search_sqlite(self):
+        contactregister.use_store("sqlite")
+        try:
+            self.assertEqual([self.contacts[0], self.contacts[2]], contactregister.search_contacts("name~=Jon Smyth"))
+        finally:
+            contactregister.contacts.close()
+
+
+class QueryPlanning(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(f"Person {i}", f"{i} Main St", f"+64{i:04}") for i in range(50)]
+        self.contacts.append(Contact("Jon Smith", "1 Side Rd", "+6100"))
+        self.store = ContactStore()
+        self.store.extend(self.contacts)
+        self.index = SearchIndex(Contact.supported_search_fields)
+        self.index.sync(self.store)
+
+    def test_most_selective_filter_drives(self):
+        plan = plan_query(helpers.parse_query_filters("address=*St, name=Jon*"), self.index)
+        self.assertEqual("name", plan.driver.field)
+        self.assertEqual(1, plan.estimate)
+        self.assertEqual(["address"], [f.field for f in plan.predicates])
+        self.assertEqual([], plan.execute(self.store))
+
+    def test_match_all_filters_dropped(self):
+        plan = plan_query(helpers.parse_query_filters("name=*, phone=**"), self.index)
+        self.assertIsNone(plan.driver)
+        self.assertEqual([], plan.predicates)
+        self.assertEqual(self.contacts, plan.execute(self.store))
+
+    def test_plan_matches_full_scan(self):
+        for query in ["name=Person 1*, address=*St", "phone=+64004?, name=*son*", "address=*Rd, name=J*",
+                      "name=*, address=1*", "phone=*0*, address=?? Main*"]:
+            expected = [contact for contact in self.contacts if all(
+                fnmatch.fnmatch(getattr(contact, f.field), f.pattern) for f in helpers.parse_query_filters(query))]
+            self.assertEqual(expected, plan_query(helpers.parse_query_filters(query), self.index)
+                             .execute(self.store), query)
+
+
+class SearchCaching(ContactRegisterTestCase):
+
+    def setUp(self):
+        contactregister.get_search_cache().clear()
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "+614090000")
+
+    def test_repeated_query_hits(self):
+        first = contactregister.search_contacts("name=Jon*, phone=+61*")
+        second = contactregister.search_contacts("phone = +61*, name = Jon*")
+        self.assertEqual(first, second)
+        self.assertEqual({"hits": 1, "misses": 1, "size": 1, "maxsize": contactregister.SEARCH_CACHE_SIZE},
+                         contactregister.get_search_cache().info())
+
+    def test_write_invalidates(self):
+        self.assertEqual(1, len(contactregister.search_contacts("name=Jon*")))
+        contactregister.add_contact("Jon Bon", "124 Goodbye St", "+614090001")
+        self.assertEqual(2, len(contactregister.search_contacts("name=Jon*")))
+        contactregister.contacts.append(Contact("Jon Ron", "125 Welcome Plc", "+614090002"))
+        self.assertEqual(3, len(contactregister.search_contacts("name=Jon*")))
+        self.assertEqual(0, contactregister.get_search_cache().hits)
+
+    def test_cached_result_copied(self):
+        contactregister.search_contacts("name=Jon*").clear()
+        self.assertEqual(1, len(contactregister.search_contacts("name=Jon*")))
+
+    def test_least_recently_used_evicted(self):
+        cache = SearchCache(maxsize=2)
+        cache.put("a", None, [1])
+        cache.put("b", None, [2])
+        cache.get("a", None)
+        cache.put("c", None, [3])
+        self.assertEqual(["a", "c"], list(cache.entries))
+
+
 class DisplayContacts(ContactRegisterTestCase):
 
     @staticmethod
@@ -118,6 +413,47 @@ class DisplayContacts(ContactRegisterTestCase):
                          "Ron Ron  125 Welcome Plc  +614090002\n"
                          "Bon Bon  124 Goodbye St   +614090001\n", output)
 
+    def test_display_text_streamed(self):
+        contactregister.contacts.append(Contact("Ron Ron", "125 Welcome Plc", "+614090002"))
+        contactregister.contacts.append(Contact("Bon Bon", "", "+614090001"))
+        limit, text.TABULATE_LIMIT = text.TABULATE_LIMIT, 1
+        try:
+            output = DisplayContacts.get_text_display_output()
+        finally:
+            text.TABULATE_LIMIT = limit
+        self.assertEqual("name     address          phone\n"
+                         "-------  ---------------  ----------\n"
+                         "Ron Ron  125 Welcome Plc  +614090002\n"
+                         "Bon Bon  -                +614090001\n", output)
+
+    def test_write_table_widened(self):
+        contacts = [Contact("Ron Ron", "", "+614090002"), Contact("Jonathan Jon", "125 Welcome Plc", "+64")]
+        chunk_size, text.CHUNK_SIZE = text.CHUNK_SIZE, 1
+        try:
+            f = io.StringIO()
+            text.write_table(contacts, f)
+        finally:
+            text.CHUNK_SIZE = chunk_size
+        self.assertEqual("name     address    phone\n"
+                         "-------  ---------  ----------\n"
+                         "Ron Ron  -          +614090002\n"
+                         "Jonathan Jon  125 Welcome Plc  +64\n", f.getvalue())
+
+    def test_write_table_header_first(self):
+        binary.export_contacts([Contact(f'Person {i}', "-", "-") for i in range(30)])
+        contactregister.contacts.attach(binary.open_contacts())
+        file = mock.Mock()
+        chunk_size, text.CHUNK_SIZE = text.CHUNK_SIZE, 10
+        try:
+            with mock.patch.object(binary.MappedRegister, "row", autospec=True,
+                                   side_effect=binary.MappedRegister.row) as row:
+                file.flush.side_effect = lambda: self.assertEqual(10, row.call_count)
+                text.write_table(contactregister.contacts, file)
+                self.assertEqual(30, row.call_count)
+        finally:
+            text.CHUNK_SIZE = chunk_size
+        file.flush.assert_called_once_with()
+
     def test_display_html_empty(self):
         contactregister.display_contacts("html")
         self.assertEqual(DisplayContacts.get_html_format(), DisplayContacts.get_html_file_output())
@@ -137,6 +473,32 @@ class DisplayContacts(ContactRegisterTestCase):
         self.assertEqual(DisplayContacts.get_html_format(html.contacts_to_list_items([jon_jon, ron_ron])),
                          DisplayContacts.get_html_file_output())
 
+    def test_display_html_escaped(self):
+        contactregister.contacts.append(Contact("<b>Jon</b>", "1 Hello & Goodbye Rd", "+614090000"))
+        contactregister.display_contacts("html")
+        self.assertEqual(DisplayContacts.get_html_format("<li>&lt;b&gt;Jon&lt;/b&gt; | 1 Hello &amp; Goodbye Rd"
+                                                         " | +614090000</li>"),
+                         DisplayContacts.get_html_file_output())
+
+    def test_display_html_paginated(self):
+        contacts = [Contact("Jon Jon", "123 Hello Rd", "+614090000"),
+                    Contact("Ron Ron", "125 Welcome Plc", "+614090002"),
+                    Contact("Bon Bon", "124 Goodbye St", "+614090001")]
+        contactregister.contacts.extend(contacts)
+        page_size, html.PAGE_SIZE = html.PAGE_SIZE, 2
+        try:
+            contactregister.display_contacts("html")
+        finally:
+            html.PAGE_SIZE = page_size
+        with open("../data/contacts-2.html", 'r', newline='') as file:
+            second_page = file.read()
+        self.assertEqual(DisplayContacts.get_html_format(html.contacts_to_list_items(contacts[:2])).replace(
+            '\t</body>', '\t\t<p>\n\t\t\tPage 1 of 2\n\t\t\t<a href="contacts-2.html">Next</a>\n\t\t</p>\n\t</body>'),
+            DisplayContacts.get_html_file_output())
+        self.assertEqual(DisplayContacts.get_html_format(html.contacts_to_list_items(contacts[2:])).replace(
+            '\t</body>', '\t\t<p>\n\t\t\t<a href="contacts.html">Previous</a>\n\t\t\tPage 2 of 2\n\t\t</p>\n\t</body>'),
+            second_page)
+
 
 class ExportContacts(ContactRegisterTestCase):
 
@@ -167,6 +529,17 @@ class ExportContacts(ContactRegisterTestCase):
         contactregister.export_contacts("json")
         self.assertEqual([jon_jon.to_dict(), ron_ron.to_dict()], ExportContacts.get_json_file_output())
 
+    def test_export_ndjson_multi(self):
+        jon_jon = Contact("Jon Jon", "124 Hello Rd", "+614090000")
+        ron_ron = Contact("Ron \"Ronny\" Ron", "125 Welcome Plc\nLevel 2", "+614090002")
+        contactregister.contacts.extend([jon_jon, ron_ron])
+        contactregister.export_contacts("ndjson")
+        with open("../data/contacts.ndjson", 'r', newline='') as file:
+            lines = file.read().split('\n')
+        self.assertEqual(3, len(lines))
+        self.assertEqual([jon_jon.to_dict(), ron_ron.to_dict(), ""],
+                         [json.loads(line) for line in lines[:2]] + [lines[2]])
+
     def test_export_csv_empty(self):
         contactregister.export_contacts("csv")
         self.assertEqual('"name","address","phone"\r\n', ExportContacts.get_csv_file_output())
@@ -222,6 +595,16 @@ class ImportContacts(ContactRegisterTestCase):
         contactregister.import_contacts("json")
         self.assertEqual(2, len(contactregister.contacts))
 
+    def test_import_ndjson_round_trip(self):
+        jon_jon = Contact("Jon Jon", "124 Hello Rd", "+614090000")
+        ron_ron = Contact("Ron \"Ronny\" Ron", "125 Welcome Plc\nLevel 2", "+614090002")
+        contactregister.contacts.extend([jon_jon, ron_ron])
+        contactregister.export_contacts("ndjson")
+        contactregister.contacts = ContactStore()
+        new_contacts = contactregister.import_contacts("ndjson")
+        self.assertEqual([jon_jon, ron_ron], list(new_contacts))
+        self.assertIn("ndjson", serialisation.get_formats())
+
     def test_import_csv_empty(self):
         ImportContacts.create_csv_file_with([])
         contactregister.import_contacts("csv")
@@ -241,5 +624,644 @@ class ImportContacts(ContactRegisterTestCase):
         self.assertEqual(2, len(contactregister.contacts))
 
 
+class TsvFormat:
+    DATA_FILE = "../data/contacts.tsv"
+
+    @staticmethod
+    def export_contacts(contacts, path=DATA_FILE):
+        with open(path, 'w') as file:
+            file.writelines("\t".join(contact.to_list()) + "\n" for contact in contacts)
+        return path
+
+    @staticmethod
+    def import_contacts(path=DATA_FILE):
+        with open(path) as file:
+            return [Contact(*line.rstrip("\n").split("\t")) for line in file]
+
+
+class PathlessFormat:
+
+    @staticmethod
+    def export_contacts(contacts):
+        return TsvFormat.export_contacts(contacts, "../data/contacts.psv")
+
+    @staticmethod
+    def import_contacts():
+        return TsvFormat.import_contacts("../data/contacts.psv")
+
+
+class FormatPlugins(ContactRegisterTestCase):
+
+    def tearDown(self):
+        super().tearDown()
+        for name in ["tsv", "psv"]:
+            serialisation.formats.discover().pop(name, None)
+            serialisation.formats.modules.pop(name, None)
+
+    def test_discovered_lazily(self):
+        registry = helpers.FormatRegistry(serialisation.__file__, "serialisation")
+        self.assertEqual(["binary", "csv", "json", "ndjson", "sqlite"], registry.names())
+        self.assertEqual({}, registry.modules)
+        self.assertIs(binary, registry.load("binary"))
+        self.assertEqual(["binary"], list(registry.modules))
+
+    def test_register_external_format(self):
+        jon_jon = Contact("Jon Jon", "123 Hello Rd", "+614090000")
+        serialisation.register_format("tsv", TsvFormat)
+        self.assertIn("tsv", serialisation.get_formats())
+        contactregister.contacts.append(jon_jon)
+        self.assertEqual(TsvFormat.DATA_FILE, contactregister.export_contacts("tsv"))
+        contactregister.contacts = ContactStore()
+        self.assertEqual([jon_jon], list(contactregister.import_contacts("tsv")))
+
+    def test_register_format_without_data_file(self):
+        jon_jon = Contact("Jon Jon", "123 Hello Rd", "+614090000")
+        serialisation.register_format("psv", PathlessFormat)
+        contactregister.contacts.append(jon_jon)
+        contactregister.export_contacts("psv")
+        contactregister.contacts = ContactStore()
+        self.assertEqual([jon_jon], list(contactregister.import_contacts("psv")))
+        self.assertNotIn("psv", contactregister.contacts.exports)
+        contactregister.add_contact("Ron Ron", "125 Welcome Plc", "+614090002")
+        contactregister.export_contacts("psv", delta=True)
+        self.assertEqual(list(contactregister.contacts), PathlessFormat.import_contacts())
+
+    def test_unknown_format(self):
+        with self.assertRaises(helpers.UnknownFormat):
+            contactregister.export_contacts("xml")
+
+
+class StartupImports(ContactRegisterTestCase):
+
+    def test_heavy_imports_deferred(self):
+        script = ("import contactregister, sys\n"
+                  "contactregister.display.formats.load('text')\n"
+                  "contactregister.display.formats.load('html')\n"
+                  "contactregister.serialisation.formats.load('csv')\n"
+                  "print(sorted({'tabulate', 'webbrowser', 'concurrent.futures'} & set(sys.modules)))")
+        output = subprocess.run([sys.executable, "-c", script], stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual("[]\n", output.stdout)
+
+    def test_startup_imports_light(self):
+        heavy = {"journal", "threading", "zlib", "pathlib", "sqlite3", "glob", "fnmatch", "concurrent.futures",
+                 "tabulate", "webbrowser", "json", "csv", "mmap", "array", "search.planner", "search.patterns",
+                 "search.trigram", "search.ordered", "search.fuzzy", "search.index", "search.cache",
+                 "search.duplicates", "search.phones", "re"}
+        heavy |= {f"serialisation.{name}" for name in serialisation.get_formats()}
+        heavy |= {f"display.{name}" for name in contactregister.display.get_formats()}
+        script = "import contactregister, sys\nprint(*sys.modules)"
+        output = subprocess.run([sys.executable, "-c", script], stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(set(), heavy & set(output.stdout.split()))
+
+    def test_startup_budget(self):
+        baseline = {"python": "3.8.0", "timings": {"bare": 0.01, "session": 0.02, "import": 0.005}}
+        results = {"python": "3.8.0", "timings": {"bare": 0.05, "session": 0.021, "import": 0.0065}}
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(["import"], startup.compare_results(results, baseline, threshold=0.2))
+            self.assertEqual([], startup.compare_results(baseline, baseline))
+
+
+class BenchmarkSuite(ContactRegisterTestCase):
+
+    def test_generate_reproducible(self):
+        rows = list(generate_rows(25000, seed=7))
+        self.assertEqual(25000, len(rows))
+        self.assertEqual(rows, list(generate_rows(25000, seed=7)))
+        self.assertNotEqual(rows[:100], list(generate_rows(100, seed=8)))
+        self.assertEqual(rows[:100], list(generate_rows(100, seed=7)))
+
+    def test_suite_results(self):
+        with redirect_stdout(io.StringIO()):
+            results = suite.run([200], seed=3, repeat=1)
+        scale = results["scales"]["200"]
+        self.assertEqual(3, results["seed"])
+        self.assertEqual({"add_contacts", "index.search", "index.phones", "index.duplicates", "display.text",
+                          "display.html"} |
+                         {f'search.{name}' for name in suite.QUERIES} |
+                         {f'{operation}.{name}' for operation in ("export", "import") for name in suite.FORMATS},
+                         set(scale["timings"]))
+        self.assertEqual(set(suite.QUERIES), set(scale["matches"]))
+        self.assertEqual([], glob.glob('../data/*'))
+        self.assertEqual(0, len(contactregister.contacts))
+
+    def test_compare_results(self):
+        baseline = {"seed": 0, "scales": {"1000": {"timings": {"export.csv": 1.0, "import.csv": 1.0}}}}
+        results = {"seed": 0, "scales": {"1000": {"timings": {"export.csv": 1.5, "import.csv": 1.05}},
+                                         "5000": {"timings": {"export.csv": 2.0}}}}
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(["1000/export.csv"], suite.compare_results(results, baseline, threshold=0.1))
+
+
+class BatchCommands(ContactRegisterTestCase):
+
+    @staticmethod
+    def run_batch(arguments, stdin=""):
+        f = io.StringIO()
+        with redirect_stdout(f), redirect_stderr(io.StringIO()), mock.patch("sys.stdin", io.StringIO(stdin)):
+            status = batch.run_batch_session(arguments)
+        return status, f.getvalue()
+
+    def test_add_stream(self):
+        records = ('name,address,phone\n'
+                   '"Jon Jon","123 Hello Rd","+614090000"\n'
+                   '"Ron, Ron","125 Welcome Plc","+614090002"\n'
+                   '"Jon Jon","-","+614090000"\n')
+        self.assertEqual((0, '{"added": 2, "dropped": 1}\n'),
+                         BatchCommands.run_batch(["add", "--dedup", "skip"], records))
+        self.assertEqual([Contact("Jon Jon", "123 Hello Rd", "+614090000"),
+                          Contact("Ron, Ron", "125 Welcome Plc", "+614090002")], list(contactregister.contacts))
+
+    def test_add_ndjson_stream_in_batches(self):
+        records = "".join(json.dumps(Contact(f"Jon {i}", "-", "+61").to_dict()) + "\n" for i in range(5))
+        self.assertEqual(2, len(list(batch.read_contact_batches(io.StringIO(records), "ndjson", 3))))
+        self.assertEqual((0, '{"added": 5, "dropped": 0}\n'),
+                         BatchCommands.run_batch(["add", "--input", "ndjson"], records))
+        self.assertEqual(5, len(contactregister.search_contacts("name=Jon*")))
+
+    def test_script(self):
+        script = ('add "Jon Jon" "123 Hello Rd" +614090000\n'
+                  '# comment\n'
+                  'add "Ron Ron" "125 Welcome Plc" +614090002\n'
+                  'search name=R* --output csv\n'
+                  'export json\n')
+        status, output = BatchCommands.run_batch(["script"], script)
+        self.assertEqual(0, status)
+        self.assertEqual('{"added": 1, "dropped": 0}\n'
+                         '{"added": 1, "dropped": 0}\n'
+                         '"name","address","phone"\r\n'
+                         '"Ron Ron","125 Welcome Plc","+614090002"\r\n', output[:output.rindex('{"exported"')])
+        self.assertTrue(os.path.exists("../data/contacts.json"))
+
+    def test_errors(self):
+        self.assertEqual((1, ""), BatchCommands.run_batch(["search", "bad"]))
+        self.assertEqual((1, ""), BatchCommands.run_batch(["import", "csv"]))
+        with self.assertRaises(SystemExit):
+            BatchCommands.run_batch(["script"], "add\n")
+
+
+class StreamContacts(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(f"Person {i}", f"{i} Main St", f"+64{i:04}") for i in range(25)]
+        ImportContacts.create_csv_file_with(self.contacts)
+
+    def test_batches(self):
+        reports = []
+        batches = list(csv_serialisation.import_contact_batches(batch_size=10,
+                                                                progress=lambda *report: reports.append(report)))
+        self.assertEqual([10, 10, 5], [len(batch) for batch in batches])
+        self.assertEqual(self.contacts, [contact for batch in batches for contact in batch])
+        self.assertEqual([10, 20, 25], [rows for rows, _bytes_read in reports])
+        self.assertEqual(os.path.getsize("../data/contacts.csv"), reports[-1][1])
+
+    def test_import_streamed_into_store(self):
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "+614090000")
+        reports = []
+        new_contacts = contactregister.import_contacts("csv", progress=lambda *report: reports.append(report))
+        self.assertEqual(25, len(new_contacts))
+        self.assertEqual(self.contacts, list(new_contacts))
+        self.assertEqual(26, len(contactregister.contacts))
+        self.assertEqual(25, reports[-1][0])
+        self.assertEqual(11, len(contactregister.search_contacts("name=Person 1*")))
+
+
+class RangedContacts(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(f'Person "{i}"\n', f"{i},\r\n\"A\" St" if i % 3 else "", f"+64{i:04}")
+                         for i in range(200)]
+        contactregister.contacts.extend(self.contacts)
+        contactregister.export_contacts("csv")
+        contactregister.contacts = ContactStore()
+
+    def test_ranges_on_record_boundaries(self):
+        with open("../data/contacts.csv", "rb") as file:
+            data = file.read()
+        ranges = csv_serialisation.split_ranges(data, 7)
+        self.assertEqual(7, len(ranges))
+        self.assertEqual(len(data), ranges[-1][1])
+        for start, end in ranges:
+            self.assertEqual(0, data[:start].count(b'"') % 2)
+            self.assertEqual(b"\n", data[start - 1:start])
+
+    def test_ranges_match_sequential(self):
+        sequential = csv_serialisation.import_contacts()
+        for workers in [1, 3, 8]:
+            columns = list(csv_serialisation.import_contact_columns(workers=workers))
+            self.assertEqual(sequential, [Contact(*row) for part in columns for row in zip(*part)])
+
+    def test_import_in_parallel(self):
+        reports = []
+        new_contacts = contactregister.import_contacts("csv", progress=lambda *report: reports.append(report),
+                                                       workers=2)
+        self.assertEqual(self.contacts, list(new_contacts))
+        self.assertEqual(200, reports[-1][0])
+        self.assertEqual(os.path.getsize("../data/contacts.csv"), reports[-1][1])
+
+
+class DeduplicateContacts(ContactRegisterTestCase):
+
+    def setUp(self):
+        contactregister.duplicate_index = DuplicateIndex()
+
+    def test_phone_digits(self):
+        self.assertEqual("6404123", helpers.phone_digits("+64 (04) 12-3"))
+
+    def test_add_skip(self):
+        stored = contactregister.add_contact("Jon Jon", "123 Hello Rd", "+64 4-123")
+        duplicate = contactregister.add_contact("jon  JON", "9 Other St", "644123", dedup="skip")
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "+64 4-124", dedup="skip")
+        self.assertEqual(stored, duplicate)
+        self.assertEqual(2, len(contactregister.contacts))
+        self.assertEqual(1, contactregister.duplicate_index.dropped)
+
+    def test_add_merge(self):
+        contactregister.add_contact("Jon Jon", "", "+644123")
+        self.assertEqual(0, len(contactregister.search_contacts("address=123*")))
+        merged = contactregister.add_contact("Jon Jon", "123 Hello Rd", "+64 4123", dedup="merge")
+        self.assertEqual(Contact("Jon Jon", "123 Hello Rd", "+644123"), merged)
+        self.assertEqual([merged], list(contactregister.contacts))
+        self.assertEqual([merged], contactregister.search_contacts("address=123*"))
+
+    def test_import_skip(self):
+        contactregister.add_contact("Ron Ron", "125 Welcome Plc", "+614090002")
+        ImportContacts.create_csv_file_with([Contact("Jon Jon", "123 Hello Rd", "+614090000"),
+                                             Contact("RON RON", "-", "+61 409 0002"),
+                                             Contact("Jon Jon", "-", "+614090000")])
+        new_contacts = contactregister.import_contacts("csv", dedup="skip")
+        self.assertEqual([Contact("Jon Jon", "123 Hello Rd", "+614090000")], list(new_contacts))
+        self.assertEqual(2, contactregister.duplicate_index.dropped)
+
+    def test_import_merge(self):
+        contactregister.add_contact("Ron Ron", "-", "+614090002")
+        ImportContacts.create_json_file_with([Contact("Jon Jon", "-", "+614090000"),
+                                              Contact("Ron Ron", "125 Welcome Plc", "+614090002"),
+                                              Contact("Jon Jon", "123 Hello Rd", "+614090000")])
+        contactregister.import_contacts("json", dedup="merge")
+        self.assertEqual([Contact("Ron Ron", "125 Welcome Plc", "+614090002"),
+                          Contact("Jon Jon", "123 Hello Rd", "+614090000")], list(contactregister.contacts))
+
+    def test_merge_into_attached(self):
+        binary.export_contacts([Contact("Jon Jon", "-", "+614090000"), Contact("Ron Ron", "-", "-")])
+        contactregister.import_contacts("binary")
+        with self.assertRaises(helpers.ReadOnlyRow):
+            contactregister.contacts.fill(0, ["Jon Jon", "123 Hello Rd", "+614090000"])
+        self.assertFalse(contactregister.contacts.fill(1, ["Ron Ron", "-", "-"]))
+        jon_jon = contactregister.add_contact("jon jon", "123 Hello Rd", "+61 409 0000", dedup="merge")
+        contactregister.add_contacts([("Jon Jon", "-", "+614090000"), ("Ron Ron", "-", "-")], dedup="merge")
+        self.assertEqual(Contact("jon jon", "123 Hello Rd", "+61 409 0000"), jon_jon)
+        self.assertEqual(3, len(contactregister.contacts))
+        self.assertEqual(2, contactregister.duplicate_index.dropped)
+
+    def test_sync_after_fill(self):
+        contactregister.add_contact("-", "123 Hello Rd", "+614090000", dedup="skip")
+        contactregister.add_contact("Ron Ron", "125 Welcome Plc", "+614090002", dedup="skip")
+        contactregister.contacts.fill(0, ["Jon Jon", "-", "-"])
+        contactregister.add_contact("Jon Jon", "-", "+614090000", dedup="skip")
+        self.assertEqual([Contact("Jon Jon", "123 Hello Rd", "+614090000"),
+                          Contact("Ron Ron", "125 Welcome Plc", "+614090002")], list(contactregister.contacts))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            contactregister.add_contact("Jon Jon", "123 Hello Rd", "+614090000", dedup="drop")
+
+
+class PhoneLookup(ContactRegisterTestCase):
+
+    def setUp(self):
+        contactregister.phone_index = PhoneIndex()
+
+    def test_normalise_phone(self):
+        self.assertEqual("644123", helpers.normalise_phone("0064 (04) 12-3"))
+        self.assertEqual(helpers.normalise_phone("+64 4-123"), helpers.normalise_phone("00644123"))
+        self.assertEqual(helpers.normalise_phone("+64 04 123 4567"), helpers.normalise_phone("+64 4 123 4567"))
+        self.assertEqual(helpers.normalise_phone("(04) 123 4567"), helpers.normalise_phone("+64 4 123 4567"))
+        self.assertEqual(helpers.normalise_phone("021 123 4567"), helpers.normalise_phone("+64 21 123 4567"))
+        self.assertEqual("61491570156", helpers.normalise_phone("0491 570 156", country_code="61"))
+        self.assertEqual("4123", helpers.normalise_phone("4123"))
+        self.assertEqual("644123", helpers.normalise_phone("6404123"))
+        self.assertEqual(helpers.normalise_phone("+64 04-123"), helpers.normalise_phone("6404123"))
+
+    def test_lookup_national_form(self):
+        jon = contactregister.add_contact("Jon Jon", "123 Hello Rd", "(04) 123 4567")
+        self.assertEqual([jon], contactregister.lookup_by_phone("+64 4 123 4567"))
+
+    def test_lookup_added(self):
+        jon = contactregister.add_contact("Jon Jon", "123 Hello Rd", "+64 4-123")
+        contactregister.add_contact("Ron Ron", "125 Welcome Plc", "+64 4-124")
+        jon_too = contactregister.add_contact("Jon Two", "-", "0064 4123")
+        self.assertEqual([jon, jon_too], contactregister.lookup_by_phone("+644123"))
+        self.assertEqual([], contactregister.lookup_by_phone("4123"))
+        self.assertEqual(3, contactregister.phone_index.size)
+
+    def test_lookup_missing_phone(self):
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "")
+        self.assertEqual([], contactregister.lookup_by_phone("-"))
+
+    def test_lookup_imported(self):
+        contactregister.add_contact("Ron Ron", "125 Welcome Plc", "+614090002")
+        ImportContacts.create_csv_file_with([Contact("Jon Jon", "123 Hello Rd", "+61 409 0000")])
+        contactregister.import_contacts("csv")
+        self.assertEqual([Contact("Jon Jon", "123 Hello Rd", "+61 409 0000")],
+                         contactregister.lookup_by_phone("00614090000"))
+        self.assertEqual(2, contactregister.phone_index.size)
+
+    def test_lookup_merged(self):
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "")
+        contactregister.contacts.fill(0, ["Jon Jon", "-", "+644123"])
+        self.assertEqual([Contact("Jon Jon", "123 Hello Rd", "+644123")], contactregister.lookup_by_phone("+644123"))
+
+    def test_lookup_sqlite(self):
+        contactregister.use_store("sqlite")
+        try:
+            contactregister.add_contact("Jon Jon", "123 Hello Rd", "+64 4-123")
+            self.assertEqual([Contact("Jon Jon", "123 Hello Rd", "+64 4-123")],
+                             contactregister.lookup_by_phone("00644123"))
+        finally:
+            contactregister.contacts.close()
+
+
+class DeltaExport(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(f"Person {i}", f"{i} Māin St", f"+64{i:04}") for i in range(12)]
+        contactregister.contacts.extend(self.contacts[:10])
+
+    def test_delta_appends_text_formats(self):
+        exported = {}
+        for module in [csv_serialisation, ndjson]:
+            with open(contactregister.export_contacts(module.__name__.split(".")[1]), "rb") as file:
+                exported[module] = file.read()
+        contactregister.contacts.extend(self.contacts[10:])
+        for module in [csv_serialisation, ndjson]:
+            with open(contactregister.export_contacts(module.__name__.split(".")[1], delta=True), "rb") as file:
+                self.assertTrue(file.read().startswith(exported[module]))
+            self.assertEqual(self.contacts, module.import_contacts())
+
+    def test_delta_appends_binary(self):
+        contactregister.export_contacts("binary")
+        register = binary.open_contacts()
+        contactregister.contacts.extend(self.contacts[10:])
+        inode = os.stat("../data/contacts.bin").st_ino
+        contactregister.export_contacts("binary", delta=True)
+        self.assertEqual(inode, os.stat("../data/contacts.bin").st_ino)
+        self.assertEqual(self.contacts, list(binary.open_contacts()))
+        self.assertEqual(self.contacts[:10], list(register))
+
+    def test_binary_slack_rewritten(self):
+        sizes = [os.path.getsize(contactregister.export_contacts("binary"))]
+        for i in range(5):
+            contactregister.add_contact(f"Extra {i}", "-", "-")
+            sizes.append(os.path.getsize(contactregister.export_contacts("binary", delta=True)))
+        self.assertTrue(any(after < before for before, after in zip(sizes, sizes[1:])))
+        self.assertEqual(list(contactregister.contacts), list(binary.open_contacts()))
+
+    def test_delta_after_dedup_import(self):
+        contactregister.contacts = ContactStore()
+        ImportContacts.create_csv_file_with([Contact("Jon Jon", "-", "+614090000"),
+                                             Contact("Jon Jon", "123 Hello Rd", "+614090000")])
+        contactregister.import_contacts("csv", dedup="merge")
+        contactregister.add_contact("Ron Ron", "125 Welcome Plc", "+614090002")
+        contactregister.export_contacts("csv", delta=True)
+        self.assertEqual(list(contactregister.contacts), csv_serialisation.import_contacts())
+
+    def test_delta_falls_back(self):
+        contactregister.export_contacts("csv")
+        with open("../data/contacts.csv", "a") as file:
+            file.write('"Someone","Else","-"\n')
+        contactregister.contacts.extend(self.contacts[10:])
+        contactregister.export_contacts("csv", delta=True)
+        contactregister.export_contacts("json", delta=True)
+        self.assertEqual(self.contacts, csv_serialisation.import_contacts())
+        self.assertEqual(ExportContacts.get_json_file_output(), [c.to_dict() for c in self.contacts])
+
+    def test_imported_file_appended(self):
+        contactregister.export_contacts("ndjson")
+        contactregister.contacts = ContactStore()
+        contactregister.import_contacts("ndjson")
+        contactregister.contacts.extend(self.contacts[10:])
+        contactregister.export_contacts("ndjson", delta=True)
+        self.assertEqual(self.contacts, ndjson.import_contacts())
+
+
+class JournaledContacts(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(f"Person {i}", f"{i} Māin St", f"+64{i:04}") for i in range(10)]
+
+    def tearDown(self):
+        contactregister.close_journal()
+        super().tearDown()
+
+    def test_replay_on_snapshot(self):
+        contactregister.contacts.extend(self.contacts[:5])
+        contactregister.export_contacts("binary")
+        self.assertEqual(0, contactregister.open_journal(interval=0))
+        [contactregister.add_contact(*contact.to_list()) for contact in self.contacts[5:]]
+        contactregister.close_journal()
+        contactregister.contacts = ContactStore()
+        self.assertEqual(5, contactregister.open_journal(interval=0))
+        self.assertEqual(self.contacts, list(contactregister.contacts))
+        self.assertEqual(1, len(contactregister.search_contacts("name=Person 9")))
+
+    def test_replay_bulk_add(self):
+        contactregister.contacts.extend(self.contacts[:5])
+        contactregister.export_contacts("binary")
+        contactregister.open_journal(interval=0)
+        contactregister.add_contacts(self.contacts[5:])
+        contactregister.close_journal()
+        contactregister.contacts = ContactStore()
+        self.assertEqual(5, contactregister.open_journal(interval=0))
+        self.assertEqual(self.contacts, list(contactregister.contacts))
+
+    def test_group_commit(self):
+        contactregister.open_journal(interval=60)
+        [contactregister.add_contact(*contact.to_list()) for contact in self.contacts]
+        self.assertEqual(0, os.path.getsize("../data/contacts.journal"))
+        contactregister.journal.flush()
+        self.assertEqual(10, len(journal.read_journal("../data/contacts.journal")[0]))
+
+    def test_torn_record_dropped(self):
+        contactregister.open_journal(interval=0)
+        [contactregister.add_contact(*contact.to_list()) for contact in self.contacts]
+        contactregister.close_journal()
+        size = os.path.getsize("../data/contacts.journal")
+        with open("../data/contacts.journal", "ab") as file:
+            file.write(b"\x20\x00\x00\x00torn")
+        self.assertEqual(10, contactregister.open_journal(interval=0))
+        self.assertEqual(size, os.path.getsize("../data/contacts.journal"))
+        self.assertEqual(self.contacts, list(contactregister.contacts))
+
+    def test_compaction(self):
+        contactregister.open_journal(interval=0, compact_size=4)
+        [contactregister.add_contact(*contact.to_list()) for contact in self.contacts]
+        self.assertEqual(2, contactregister.journal.records)
+        self.assertEqual(self.contacts[:8], list(binary.open_contacts()))
+        contactregister.close_journal()
+        self.assertEqual(2, contactregister.open_journal(interval=0))
+        self.assertEqual(self.contacts, list(contactregister.contacts))
+
+    def test_compaction_durable(self):
+        events = []
+        sync_file, reset = helpers.sync_file, journal.Journal.reset
+        with mock.patch("helpers.sync_file", side_effect=lambda path: events.append("sync") or sync_file(path)), \
+                mock.patch.object(journal.Journal, "reset", autospec=True,
+                                  side_effect=lambda log: events.append("reset") or reset(log)):
+            contactregister.open_journal(interval=0, compact_size=4)
+            [contactregister.add_contact(*contact.to_list()) for contact in self.contacts]
+        self.assertEqual(["sync", "reset"] * 2, events)
+
+    def test_import_checkpointed(self):
+        ImportContacts.create_csv_file_with(self.contacts[:3])
+        contactregister.open_journal(interval=0)
+        contactregister.add_contact(*self.contacts[3].to_list())
+        contactregister.import_contacts("csv")
+        contactregister.close_journal()
+        self.assertEqual(0, contactregister.open_journal(interval=0))
+        self.assertEqual([self.contacts[3]] + self.contacts[:3], list(contactregister.contacts))
+
+
+class ShardedContacts(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(f"Person {i}", f"{i} Main St", f"+64{i:04}") for i in range(30)]
+        for shard in range(3):
+            csv_serialisation.export_contacts(self.contacts[shard * 10:(shard + 1) * 10],
+                                              path=f"../data/shard-{shard}.csv")
+
+    def test_import_shards_in_order(self):
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "+614090000")
+        new_contacts = contactregister.import_contact_shards("csv", "../data/shard-*.csv", workers=2)
+        self.assertEqual(self.contacts, list(new_contacts))
+        self.assertEqual(31, len(contactregister.contacts))
+        self.assertEqual(11, len(contactregister.search_contacts("name=Person 1*")))
+
+    def test_import_shards_missing(self):
+        with self.assertRaises(helpers.NonexistentFile):
+            contactregister.import_contact_shards("json", "../data/shard-*.json")
+
+
+class MappedContacts(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(f"Person {i}", f"{i} Māin St", f"+64{i:04}") for i in range(20)]
+        contactregister.contacts.extend(self.contacts)
+        contactregister.export_contacts("binary")
+        contactregister.contacts = ContactStore()
+
+    def test_random_access(self):
+        register = binary.open_contacts()
+        self.assertEqual(20, len(register))
+        self.assertEqual(self.contacts[13], register[13])
+        self.assertEqual(self.contacts[-1], register[-1])
+        self.assertEqual("13 Māin St", register.value(13, 1))
+        self.assertEqual(self.contacts, list(register))
+
+    def test_import_attached_lazily(self):
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "+614090000")
+        new_contacts = contactregister.import_contacts("binary")
+        contactregister.add_contact("Ron Ron", "125 Welcome Plc", "+614090002")
+        self.assertEqual(3, len(contactregister.contacts.segments))
+        self.assertEqual(20, len(new_contacts))
+        self.assertEqual(22, len(contactregister.contacts))
+        self.assertEqual(self.contacts[0], contactregister.contacts[1])
+        self.assertEqual(["Person 19", "Ron Ron"], contactregister.contacts.column("name")[20:])
+        self.assertEqual(11, len(contactregister.search_contacts("name=Person 1*")))
+        self.assertEqual(2, len(contactregister.search_contacts("name=*on")))
+
+    def test_import_attached_undecoded(self):
+        with mock.patch.object(binary.MappedRegister, "value", autospec=True,
+                               side_effect=binary.MappedRegister.value) as value, \
+                mock.patch.object(binary.MappedRegister, "row", autospec=True,
+                                  side_effect=binary.MappedRegister.row) as row:
+            contactregister.open_journal()
+            contactregister.add_contact("Jon Jon", "123 Hello Rd", "+614090000")
+            self.assertEqual(0, value.call_count + row.call_count)
+            self.assertEqual(11, len(contactregister.search_contacts("name=Person 1*")))
+            self.assertLess(0, value.call_count + row.call_count)
+            contactregister.close_journal()
+
+    def test_export_over_mapped_file(self):
+        contactregister.import_contacts("binary")
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "+614090000")
+        contactregister.export_contacts("binary")
+        self.assertEqual(self.contacts + [Contact("Jon Jon", "123 Hello Rd", "+614090000")],
+                         list(binary.open_contacts()))
+        self.assertEqual(21, len(list(contactregister.contacts)))
+
+
+class SqliteContacts(ContactRegisterTestCase):
+
+    def setUp(self):
+        self.contacts = [Contact(f"Person {i}", f"{i} Main St", f"+64{i:04}") for i in range(20)]
+
+    def tearDown(self):
+        if isinstance(contactregister.contacts, sqlite.SqliteStore):
+            contactregister.contacts.close()
+        super().tearDown()
+
+    def test_export_indexed(self):
+        contactregister.contacts.extend(self.contacts)
+        contactregister.export_contacts("sqlite")
+        connection = sqlite3.connect("../data/contacts.sqlite")
+        indexes = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        connection.close()
+        self.assertEqual({f"contacts_{field}" for field in Contact.supported_search_fields}, indexes)
+        self.assertEqual(self.contacts, sqlite.import_contacts())
+
+    def test_glob_translation(self):
+        values = ["ab", "a\nb", "^b", "]b", "[b", "-b", "Ab", "b"]
+        connection = sqlite3.connect(":memory:")
+        for pattern in ["a*", "?b", "[!a]b", "[^a]b", "[]]b", "[!]a]b", "[b", "[a-]b", "[b-a]b", "*b", ""]:
+            glob_pattern = sql_glob(pattern)
+            if glob_pattern is None:
+                continue
+            for value in values:
+                matched = connection.execute("SELECT ? GLOB ?", (value, glob_pattern)).fetchone()[0]
+                self.assertEqual(fnmatch.fnmatch(value, pattern), bool(matched), (value, pattern))
+        connection.close()
+
+    def test_search_pushed_down(self):
+        contactregister.contacts.extend(self.contacts[:10])
+        contactregister.use_store("sqlite")
+        contactregister.contacts.extend(self.contacts[10:])
+        contactregister.add_contact("Jon Jon", "123 Hello Rd", "+614090000")
+        everyone = self.contacts + [Contact("Jon Jon", "123 Hello Rd", "+614090000")]
+        for query in ["name=Person 1*", "name=*on, phone=+61*", "address=[!1]* Main St", "name=[^P]*"]:
+            expected = [c for c in everyone if all(fnmatch.fnmatch(getattr(c, f.field), f.pattern)
+                                                   for f in helpers.parse_query_filters(query))]
+            self.assertEqual(expected, contactregister.search_contacts(query))
+        contactregister.contacts.close()
+        store = sqlite.open_store()
+        self.assertEqual(everyone, list(store))
+        self.assertEqual(everyone[-1], store[-1])
+        store.close()
+
+    def test_lookup_indexed(self):
+        contactregister.phone_index = PhoneIndex()
+        contactregister.contacts.extend(self.contacts)
+        contactregister.use_store("sqlite")
+        self.assertEqual([self.contacts[3]], contactregister.lookup_by_phone("+64 0003"))
+        self.assertIs(contactregister.contacts, contactregister.phone_index.source)
+        jon = contactregister.add_contact("Jon Jon", "123 Hello Rd", "(04) 123 4567")
+        self.assertEqual(21, contactregister.phone_index.size)
+        self.assertEqual([jon], contactregister.lookup_by_phone("+64 4 123 4567"))
+
+    def test_dedup_in_store(self):
+        contactregister.duplicate_index = DuplicateIndex()
+        contactregister.use_store("sqlite")
+        contactregister.add_contact("Jon Jon", "-", "+614090000")
+        ImportContacts.create_json_file_with([Contact("jon  jon", "123 Hello Rd", "+61 409 0000"),
+                                              Contact("Ron Ron", "125 Welcome Plc", "+614090002")])
+        contactregister.import_contacts("json", dedup="merge")
+        contactregister.add_contact("Ron Ron", "-", "+614090002", dedup="skip")
+        contactregister.add_contacts([("Bon Bon", "124 Goodbye St", "+614090001")] * 2, dedup="skip")
+        self.assertEqual([Contact("Jon Jon", "123 Hello Rd", "+614090000"),
+                          Contact("Ron Ron", "125 Welcome Plc", "+614090002"),
+                          Contact("Bon Bon", "124 Goodbye St", "+614090001")], list(contactregister.contacts))
+        self.assertEqual(["Ron Ron", "Bon Bon"], contactregister.contacts.column("name")[1:])
+        self.assertEqual(3, contactregister.duplicate_index.dropped)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,13 @@
-from helpers import get_module_files
+from helpers import FormatRegistry
+
+
+# Discover the formats in this package once, loading each on first use
+formats = FormatRegistry(__file__, __name__)
 
 
 def get_formats() -> [str]:
-    return get_module_files(__file__)
+    return formats.names()
+
+
+def register_format(name, module) -> None:
+    formats.register(name, module)
@@ -3,52 +3,139 @@ ContactRegister HTML Module
 
 This script defines display methods for the HTML format:
     * display_contacts - displays a list of contacts in HTML
+    * write_pages - writes contacts to as many HTML pages as they fill
+    * write_page - writes a page of contacts as an HTML file
+    * page_path - returns the path of a numbered page
     * contacts_to_list_items - formats list of contacts as an HTML list
+    * list_items - generates the HTML list items for contacts one at a time
+
+Contacts are written PAGE_SIZE to a page, each page being streamed out a
+contact at a time. Registers spanning several pages get Previous and Next
+links between them.
 
 This script should be imported wherever needed as module.
 """
 
 from pathlib import Path
-import webbrowser
+from html import escape
+import itertools
 import helpers
 import os
 
 
 # Define module constants
 DATA_FILE = Path(__file__).parent / "../../data/contacts.html"
+PAGE_SIZE = 1000
 
 
 def display_contacts(contacts) -> None:
     """
     A module function to display contacts in HTML, opening the
-    generated file in the default web-browser
+    first generated page in the default web-browser
     ...
     Parameters
     ----------
     contacts : [Contact]
         a list of contact objects to display
     """
-    # Try create the file directory and open the specified file for writing
-    helpers.try_create_dir(os.path.dirname(DATA_FILE))
-    with open(DATA_FILE, 'w', newline='') as file:
-        # Write the structure of the HTML file populated with contacts
-        file.write('<html>\n'
-                   '\t<head>\n'
-                   '\t\t<title>Data Value</title>\n'
-                   '\t</head>\n'
-                   '\t<body>\n'
-                   '\t\t<h1>All Contacts</h1>\n'
-                   '\t\t<ul>\n'
-                   f'{contacts_to_list_items(contacts)}\n'
-                   '\t\t</ul>\n'
-                   '\t</body>\n'
-                   '</html>')
-    print(f'Created new file at {DATA_FILE}')
+    pages = write_pages(contacts)
+    print(f'Created new file at {DATA_FILE}' if pages == 1 else f'Created {pages} new pages from {DATA_FILE}')
     print('Opening in browser...')
+    # Import webbrowser only once needed, as it is slow to import
+    import webbrowser
     # Open the file for viewing in the user's default web-browser
     webbrowser.open_new('file://' + os.path.realpath(DATA_FILE))
 
 
+def write_pages(contacts, path=DATA_FILE) -> int:
+    """
+    A module function to write contacts to as many HTML pages as they fill,
+    in a single pass over the contacts
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a list of contact objects to write
+    path : Path
+        the path of the first page (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    int
+        the number of pages written
+    """
+    # Try create the file directory, then write each page from a single pass over the contacts
+    helpers.try_create_dir(os.path.dirname(path))
+    pages = max(-(-len(contacts) // PAGE_SIZE), 1)
+    remaining = iter(contacts)
+    for page in range(1, pages + 1):
+        with open(page_path(page, path), 'w', newline='') as file:
+            write_page(file, itertools.islice(remaining, PAGE_SIZE), page, pages, path)
+    return pages
+
+
+def write_page(file, contacts, page, pages, path=DATA_FILE) -> None:
+    """
+    A module function to write a page of contacts as an HTML file, adding
+    links to its neighbouring pages if there is more than one
+    ...
+    Parameters
+    ----------
+    file : io.TextIOBase
+        the file to write the page to
+    contacts : iterator
+        the contact objects on the page
+    page : int
+        the number of the page, counting from 1
+    pages : int
+        the total number of pages
+    path : Path
+        the path of the first page (default is DATA_FILE)
+    """
+    # Write the structure of the HTML file, streaming the contacts into its list
+    file.write('<html>\n'
+               '\t<head>\n'
+               '\t\t<title>Data Value</title>\n'
+               '\t</head>\n'
+               '\t<body>\n'
+               '\t\t<h1>All Contacts</h1>\n'
+               '\t\t<ul>\n')
+    file.writelines(list_items(contacts))
+    file.write('\n'
+               '\t\t</ul>\n')
+    if pages > 1:
+        # Link to the neighbouring pages
+        file.write('\t\t<p>\n')
+        if page > 1:
+            file.write(f'\t\t\t<a href="{page_path(page - 1, path).name}">Previous</a>\n')
+        file.write(f'\t\t\tPage {page} of {pages}\n')
+        if page < pages:
+            file.write(f'\t\t\t<a href="{page_path(page + 1, path).name}">Next</a>\n')
+        file.write('\t\t</p>\n')
+    file.write('\t</body>\n'
+               '</html>')
+
+
+def page_path(page, path=DATA_FILE) -> Path:
+    """
+    A module function to return the path of a numbered page, the first
+    being the given path and the rest numbered alongside it
+    ...
+    Parameters
+    ----------
+    page : int
+        the number of the page, counting from 1
+    path : Path
+        the path of the first page (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    Path
+        the path of the page's file
+    """
+    return path if page == 1 else path.with_name(f'{path.stem}-{page}{path.suffix}')
+
+
 def contacts_to_list_items(contacts) -> str:
     """
     A module helper function to convert a list of contacts to
@@ -64,5 +151,26 @@ def contacts_to_list_items(contacts) -> str:
     str
         a string containing the formatted items
     """
-    # Generate a list of HTML <li> items and join them as a string
-    return "\n\t\t\t".join([f'<li>{contact}</li>' for contact in contacts])
+    # Generate the HTML <li> items and join them as a string
+    return "".join(list_items(contacts))
+
+
+def list_items(contacts):
+    """
+    A module helper function to generate the HTML unordered list items for
+    contacts one at a time, escaping their text
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a sequence of contact objects to transform
+    ...
+    Returns
+    -------
+    iterator
+        the formatted items, each after the separator from the last
+    """
+    separator = ''
+    for contact in contacts:
+        yield f'{separator}<li>{escape(str(contact))}</li>'
+        separator = '\n\t\t\t'
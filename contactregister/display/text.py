@@ -3,12 +3,26 @@ ContactRegister Text Module
 
 This script defines display methods for the Text format:
     * display_contacts - displays a list of contacts in output text
+    * write_table - streams contacts to a file as a plain text table
+    * widen - widens column widths to fit a chunk of rows
+
+Registers of up to TABULATE_LIMIT contacts are laid out by tabulate. Larger
+ones are streamed in chunks instead, with every column left-aligned and
+sized from the longest value of each field in the first chunk, so memory
+use stays flat and the header is written as soon as that chunk is read.
+Any later chunk holding a longer value widens its column from then on.
 
 This script should be imported wherever needed as module.
 """
 
 from models.Contact import Contact
-from tabulate import tabulate
+import itertools
+import sys
+
+
+# Define module constants
+TABULATE_LIMIT = 10000
+CHUNK_SIZE = 10000
 
 
 def display_contacts(contacts) -> None:
@@ -20,5 +34,60 @@ def display_contacts(contacts) -> None:
     contacts : [Contact]
         a list of contact objects to display
     """
+    if len(contacts) > TABULATE_LIMIT:
+        # Stream large registers rather than building the whole table in memory
+        write_table(contacts, sys.stdout)
+        return
+    # Import tabulate only once needed, as it is slow to import and large registers never use it
+    from tabulate import tabulate
     # Convert contact objects to lists and display them in table format using tabulate
     print(tabulate([contact.to_list() for contact in contacts], headers=Contact.supported_search_fields))
+
+
+def write_table(contacts, file) -> None:
+    """
+    A module function to stream contacts to a file as a plain text table,
+    laid out like tabulate's simple format, a chunk of rows at a time
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a list of contact objects to write, or a store able to iterate over
+        its rows
+    file : io.TextIOBase
+        the file to write the table to
+    """
+    fields = Contact.supported_search_fields
+    rows = contacts.rows() if hasattr(contacts, 'rows') else (contact.to_list() for contact in contacts)
+    # Size the columns from the first chunk, padding headers by two characters as tabulate does,
+    # and write the header out as soon as that chunk is read
+    chunk = list(itertools.islice(rows, CHUNK_SIZE))
+    widths = widen([len(field) + 2 for field in fields], chunk)
+    template = "  ".join(f'{{:<{width}}}' for width in widths)
+    file.write(template.format(*fields).rstrip() + "\n" + "  ".join("-" * width for width in widths) + "\n")
+    file.flush()
+    # Then format and write the rows a chunk at a time, widening any column a later chunk overflows
+    while chunk:
+        file.write("".join(template.format(*row).rstrip() + "\n" for row in chunk))
+        chunk = list(itertools.islice(rows, CHUNK_SIZE))
+        widths = widen(widths, chunk)
+        template = "  ".join(f'{{:<{width}}}' for width in widths)
+
+
+def widen(widths, chunk) -> [int]:
+    """
+    A module function to widen column widths to fit a chunk of rows
+    ...
+    Parameters
+    ----------
+    widths : [int]
+        the current width of each column
+    chunk : [[str]]
+        the field values of each row in the chunk
+    ...
+    Returns
+    -------
+    [int]
+        the width of each column, at least its current width
+    """
+    return [max(width, max(map(len, column))) for width, column in zip(widths, zip(*chunk))] if chunk else widths
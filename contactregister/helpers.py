@@ -5,10 +5,17 @@ This script contains various helper functions for the contactregister
 CLI program and should be imported wherever needed as module.
 """
 
+import importlib
 import errno
 import os
 
 
+# Define module constants
+PROGRESS_WIDTH = 72
+DIGITS = frozenset('0123456789')
+COUNTRY_CODE = "64"
+
+
 def get_module_files(file) -> [str]:
     """
     A helper function to return the names of all non-system
@@ -26,10 +33,146 @@ def get_module_files(file) -> [str]:
     """
     # Get the directory of the file
     dir_path = os.path.dirname(os.path.realpath(file))
-    # Get all files in the directory and filter out Python standard module files
-    module_files = list(filter(lambda x: not x.startswith("__"), os.listdir(dir_path)))
+    # Get all Python source files in the directory, filtering out Python standard module files
+    module_files = [filename for filename in os.listdir(dir_path)
+                    if filename.endswith(".py") and not filename.startswith("__")]
     # Return filenames stripped of extension
-    return [filename.strip('.py') for filename in module_files]
+    return [os.path.splitext(filename)[0] for filename in module_files]
+
+
+class FormatRegistry:
+    """
+    A class defining a registry of the format modules in a package
+
+    The package's directory is only listed the first time its formats are
+    needed, and each module is only imported the first time it is used,
+    after which looking it up is a single dict lookup. Formats defined
+    outside the package can be registered alongside the discovered ones.
+    ...
+    Attributes
+    ----------
+    file : str
+        the __file__ attribute of the package
+    package : str
+        the name of the package
+    sources : {str: object}
+        each format's module, or the dotted path to import it from, in
+        discovery then registration order (None until discovered)
+    modules : {str: object}
+        the module of each format loaded so far
+    ...
+    Methods
+    -------
+    names()
+        returns the names of all formats
+    register(name, module)
+        registers a format from outside the package
+    load(name)
+        returns the module of a format, importing it on first use
+    """
+
+    def __init__(self, file, package):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        file : str
+            the __file__ attribute of the package
+        package : str
+            the name of the package
+        Returns
+        -------
+        FormatRegistry
+            a new FormatRegistry object
+        """
+        self.file = file
+        self.package = package
+        self.sources = None
+        self.modules = {}
+
+    def discover(self) -> {str: object}:
+        """
+        Returns the source of each format, listing the package's modules on
+        the first call
+        """
+        if self.sources is None:
+            self.sources = {name: f'{self.package}.{name}' for name in sorted(get_module_files(self.file))}
+        return self.sources
+
+    def names(self) -> [str]:
+        """
+        Returns the names of all formats, discovered and registered
+        ...
+        Returns
+        -------
+        [str]
+            the list of format names
+        """
+        return list(self.discover())
+
+    def register(self, name, module) -> None:
+        """
+        Registers a format from outside the package, replacing any format of
+        the same name
+        ...
+        Parameters
+        ----------
+        name : str
+            the name of the format
+        module : object
+            the format's module (or any object providing the same functions),
+            or the dotted path to import it from on first use. Serialisation
+            formats may also name the file they write as DATA_FILE, without
+            which delta exports of the format always rewrite it in full
+        """
+        self.discover()[name] = module
+        self.modules.pop(name, None)
+
+    def load(self, name):
+        """
+        Returns the module of a format, importing it on first use
+        ...
+        Parameters
+        ----------
+        name : str
+            the name of the format
+        ...
+        Returns
+        -------
+        object
+            the format's module
+        """
+        try:
+            return self.modules[name]
+        except KeyError:
+            pass
+        source = self.discover().get(name)
+        if source is None:
+            # Handle unknown formats case
+            raise UnknownFormat(name)
+        module = importlib.import_module(source) if isinstance(source, str) else source
+        self.modules[name] = module
+        return module
+
+
+def print_import_progress(rows, bytes_read, rate) -> None:
+    """
+    A helper function to report the progress of a streaming import to
+    the user on a single, continually rewritten line (which should be
+    overwritten with a line at least PROGRESS_WIDTH characters wide)
+    ...
+    Parameters
+    ----------
+    rows : int
+        the number of rows imported so far
+    bytes_read : int
+        the number of bytes read so far
+    rate : float
+        the number of rows imported per second
+    """
+    print(f'Imported {rows} contacts ({rate:,.0f} rows/s, {bytes_read / 2 ** 20:,.1f} MiB read)'
+          .ljust(PROGRESS_WIDTH), end='\r', flush=True)
 
 
 def display_command_options(options, title="Options:") -> None:
@@ -92,7 +235,8 @@ class QueryFilter:
         Parameters
         ----------
         field : str
-            the field on which to perform the query
+            the field on which to perform the query, ending in ~ for a
+            fuzzy match on the pattern rather than a glob
         pattern : str
             the pattern to perform the query with
         Returns
@@ -100,7 +244,8 @@ class QueryFilter:
         QueryFilter
             a new QueryFilter object
         """
-        self.field = field.strip()
+        self.fuzzy = field.strip().endswith("~")
+        self.field = field.strip().rstrip("~").strip()
         self.pattern = pattern.strip()
 
 
@@ -112,7 +257,8 @@ def parse_query_filters(query) -> [QueryFilter]:
     Parameters
     ----------
     query : str
-        a comma-separated query string in the format of field=name
+        a comma-separated query string in the format of field=name, or
+        field~=name for fuzzy matches
     ...
     Returns
     -------
@@ -145,6 +291,130 @@ def try_create_dir(directory_path) -> None:
             raise
 
 
+def phone_digits(phone) -> str:
+    """
+    A helper function to reduce a phone number to its digits, so numbers
+    formatted differently (e.g. "+64 04-123" and "6404123") compare equal
+    ...
+    Parameters
+    ----------
+    phone : str
+        the phone number to reduce
+    ...
+    Returns
+    -------
+    str
+        the number's ASCII digits, in order
+    """
+    return ''.join(filter(DIGITS.__contains__, phone))
+
+
+def normalise_phone(phone, country_code=None) -> str:
+    """
+    A helper function to normalise a phone number for exact lookups as its
+    international digits, so "+64 4-123", "+64 (0)4 123", "0064 4123" and
+    "(04) 123" all normalise the same
+
+    International numbers (written with + or a leading 00) keep their
+    digits, less any trunk 0 written after the default country code.
+    National numbers (written with a leading 0) have the trunk 0 replaced
+    by the default country code. Bare digits starting with the country
+    code are taken to be international, so "6404123" normalises like
+    "+64 04-123". Any other number is left as its digits.
+    ...
+    Parameters
+    ----------
+    phone : str
+        the phone number to normalise
+    country_code : str
+        the country code of national numbers (default is None, which uses
+        COUNTRY_CODE)
+    ...
+    Returns
+    -------
+    str
+        the normalised number
+    """
+    country_code = country_code or COUNTRY_CODE
+    digits = phone_digits(phone)
+    if phone.lstrip().startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        # Handle the 00 international prefix, which stands in for +
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        # Handle national numbers, whose trunk 0 stands in for the country code
+        return country_code + digits[1:]
+    elif not digits.startswith(country_code):
+        # Handle numbers written without any prefix, such as local numbers
+        return digits
+    # Drop a trunk 0 kept after the country code, as in +64 (0)4 123
+    if digits.startswith(country_code + "0"):
+        digits = country_code + digits[len(country_code) + 1:]
+    return digits
+
+
+def file_signature(path) -> (int, int, int):
+    """
+    A helper function to return a signature of a file's current state,
+    which changes whenever the file is written to or replaced
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the file
+    ...
+    Returns
+    -------
+    (int, int, int)
+        the file's size, modification time and inode number, or None if
+        it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def sync_file(path) -> None:
+    """
+    A helper function to make a file, and its entry in its directory,
+    durable on disk
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the file
+    """
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+    sync_directory(os.path.dirname(os.path.realpath(path)))
+
+
+def sync_directory(directory_path) -> None:
+    """
+    A helper function to make the entries of a directory, such as a file
+    just renamed into it, durable on disk
+    ...
+    Parameters
+    ----------
+    directory_path : str
+        the string path of the directory
+    """
+    if os.name == 'nt':
+        # Handle Windows, where directories cannot be opened and renames are durable once done
+        return
+    descriptor = os.open(directory_path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
 class UnknownQueryField(Exception):
     """Raised when searched query field is unknown"""
 
@@ -200,3 +470,41 @@ class NonexistentFile(Exception):
             a new NonexistentFile object
         """
         self.filepath = filepath
+
+
+class UnknownFormat(Exception):
+    """Raised when a display or serialisation format is unknown"""
+
+    def __init__(self, format_name):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        format_name : str
+            the name of the offending format
+        Returns
+        -------
+        UnknownFormat
+            a new UnknownFormat object
+        """
+        self.format = format_name
+
+
+class ReadOnlyRow(Exception):
+    """Raised when attempting to change a row held in a read-only segment"""
+
+    def __init__(self, row):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        row : int
+            the row which could not be changed
+        Returns
+        -------
+        ReadOnlyRow
+            a new ReadOnlyRow object
+        """
+        self.row = row
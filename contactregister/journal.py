@@ -0,0 +1,301 @@
+"""
+ContactRegister Journal Module
+
+This script defines an append-only journal of added contacts, which lets
+new contacts be made durable without rewriting a full export:
+    * read_journal - reads the intact records of a journal file
+    * encode_record - encodes a journal record
+    * Journal - an append-only journal written with group commit
+
+Each record holds the row a contact was added at and its field values:
+    header - body length (I) and CRC-32 of the body (I), little-endian
+    body   - the row (Q), then per field a byte length (I) followed by
+             the UTF-8 bytes
+
+Records are only ever appended, so a crash can at worst leave a torn
+record at the end of the file, which the CRC exposes and which is then
+dropped. Journals follow on from a snapshot (a full export), and replay
+skips any record whose row the snapshot already holds, so a crash midway
+through compaction never duplicates contacts.
+
+This script should be imported wherever needed as module.
+"""
+
+from pathlib import Path
+import threading
+import helpers
+import struct
+import zlib
+import os
+
+
+# Define module constants
+JOURNAL_FILE = Path(__file__).parent / "../data/contacts.journal"
+FLUSH_INTERVAL = 0.05
+COMPACT_SIZE = 100000
+RECORD = struct.Struct('<II')
+ROW = struct.Struct('<Q')
+LENGTH = struct.Struct('<I')
+
+
+def read_journal(path) -> ([(int, [str])], int):
+    """
+    A module function to read the intact records of a journal file,
+    stopping at the first torn or corrupt record
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the journal file
+    ...
+    Returns
+    -------
+    ([(int, [str])], int)
+        the row and field values of each intact record, and the length
+        of the file they take up
+    """
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except FileNotFoundError:
+        return [], 0
+    records = []
+    position = 0
+    while position + RECORD.size <= len(data):
+        length, checksum = RECORD.unpack_from(data, position)
+        start, end = position + RECORD.size, position + RECORD.size + length
+        if end > len(data) or zlib.crc32(data[start:end]) != checksum:
+            # Handle a torn or corrupt record, which ends the intact part of the journal
+            break
+        row = ROW.unpack_from(data, start)[0]
+        start += ROW.size
+        values = []
+        while start < end:
+            size = LENGTH.unpack_from(data, start)[0]
+            start += LENGTH.size
+            values.append(data[start:start + size].decode('utf-8'))
+            start += size
+        records.append((row, values))
+        position = end
+    return records, position
+
+
+def encode_record(row, values) -> bytes:
+    """
+    A module function to encode a journal record, header and body
+    ...
+    Parameters
+    ----------
+    row : int
+        the row the contact was added at
+    values : [str]
+        the contact's field values
+    ...
+    Returns
+    -------
+    bytes
+        the encoded record
+    """
+    body = ROW.pack(row) + b''.join(LENGTH.pack(len(data)) + data
+                                    for data in (value.encode('utf-8') for value in values))
+    return RECORD.pack(len(body), zlib.crc32(body)) + body
+
+
+class Journal:
+    """
+    A class defining an append-only journal of added contacts
+
+    Appended records are buffered in memory and written out by a
+    background thread every flush interval, with a single fsync covering
+    every record gathered since the last one (group commit). An interval
+    of 0 instead writes and syncs each record as it is appended.
+    ...
+    Attributes
+    ----------
+    path : str
+        the path of the journal file
+    interval : float
+        the number of seconds between group commits
+    snapshot_format : str
+        the serialisation format of the snapshot the journal follows on from
+    compact_size : int
+        the number of records after which the journal should be compacted
+    records : int
+        the number of records in the journal
+    file : io.BufferedWriter
+        the journal file, opened for appending
+    pending : bytearray
+        the records appended since the last group commit
+    ...
+    Methods
+    -------
+    run()
+        runs the group commit loop until the journal is closed
+    replay(store)
+        adds every record the store does not hold yet to it
+    append(row, values)
+        adds a record to the journal
+    extend(start, rows)
+        adds a record for each of a run of consecutive rows
+    flush()
+        writes and syncs every pending record
+    should_compact()
+        returns whether the journal has grown enough to compact
+    reset()
+        empties the journal once its records are held by a new snapshot
+    close()
+        flushes the journal and stops its background thread
+    """
+
+    def __init__(self, path=JOURNAL_FILE, interval=FLUSH_INTERVAL, snapshot_format='binary',
+                 compact_size=COMPACT_SIZE):
+        """
+        Initialises the class by opening the journal file, dropping any torn
+        record from its end, and starting the group commit thread
+        ...
+        Parameters
+        ----------
+        path : str
+            the path of the journal file (default is JOURNAL_FILE)
+        interval : float
+            the number of seconds between group commits (default is
+            FLUSH_INTERVAL)
+        snapshot_format : str
+            the serialisation format of the snapshot (default is binary)
+        compact_size : int
+            the number of records after which the journal should be
+            compacted (default is COMPACT_SIZE)
+        ...
+        Returns
+        -------
+        Journal
+            a new Journal object
+        """
+        self.path = path
+        self.interval = interval
+        self.snapshot_format = snapshot_format
+        self.compact_size = compact_size
+        helpers.try_create_dir(os.path.dirname(path))
+        records, length = read_journal(path)
+        self.records = len(records)
+        self.file = open(path, 'ab')
+        self.file.truncate(length)
+        self.pending = bytearray()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        if interval > 0:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def run(self) -> None:
+        """
+        Runs the group commit loop until the journal is closed
+        """
+        while not self.stopped.wait(self.interval):
+            self.flush()
+
+    def replay(self, store) -> int:
+        """
+        Adds every journaled contact the store does not hold yet to it
+        ...
+        Parameters
+        ----------
+        store : ContactStore
+            the store loaded from the journal's snapshot
+        ...
+        Returns
+        -------
+        int
+            the number of contacts added
+        """
+        added = 0
+        for row, values in read_journal(self.path)[0]:
+            if row < len(store):
+                # Skip records the snapshot already holds
+                continue
+            if row > len(store):
+                raise ValueError(f'{self.path} does not follow on from its {self.snapshot_format} snapshot')
+            store.add(*values)
+            added += 1
+        return added
+
+    def append(self, row, values) -> None:
+        """
+        Adds a record to the journal, to be written by the next group commit
+        ...
+        Parameters
+        ----------
+        row : int
+            the row the contact was added at
+        values : [str]
+            the contact's field values
+        """
+        record = encode_record(row, values)
+        with self.lock:
+            self.pending += record
+            self.records += 1
+        if self.thread is None:
+            self.flush()
+
+    def extend(self, start, rows) -> None:
+        """
+        Adds a record for each of a run of consecutive rows to the journal,
+        all to be written by the next group commit
+        ...
+        Parameters
+        ----------
+        start : int
+            the row the first contact was added at
+        rows : [[str]]
+            the field values of each contact, in row order
+        """
+        records = bytearray()
+        row = start
+        for values in rows:
+            records += encode_record(row, values)
+            row += 1
+        with self.lock:
+            self.pending += records
+            self.records += row - start
+        if self.thread is None:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes every pending record to the journal file and syncs it to disk
+        """
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, bytearray()
+            if pending:
+                self.file.write(pending)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def should_compact(self) -> bool:
+        """
+        Returns whether the journal holds at least compact_size records
+        """
+        return self.records >= self.compact_size
+
+    def reset(self) -> None:
+        """
+        Empties the journal, once a new snapshot holds all of its records
+        """
+        with self.flush_lock, self.lock:
+            self.pending = bytearray()
+            self.file.truncate(0)
+            os.fsync(self.file.fileno())
+            self.records = 0
+
+    def close(self) -> None:
+        """
+        Flushes the journal, stops its group commit thread and closes its file
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+        self.file.close()
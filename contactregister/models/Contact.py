@@ -1,14 +1,38 @@
 from models import Contact, NULL_FIELD
+import sys
+
+
+def intern_value(value):
+    """
+    A module function to intern a field value, so repeated values (such
+    as street names and NULL_FIELD) share a single string object
+    ...
+    Parameters
+    ----------
+    value : str
+        the field value to intern
+    ...
+    Returns
+    -------
+    str
+        the interned value, or the value unchanged if it is not a string
+    """
+    return sys.intern(value) if type(value) is str else value
 
 
 class Contact:
     """
     A class defining contacts
+
+    Contacts use a fixed slot layout rather than a per-instance __dict__
+    to keep their memory footprint small in large registers.
     ...
     Attributes
     ----------
     supported_search_fields : [str]
         a list of fields that support searching
+    supported_fuzzy_fields : [str]
+        a list of fields that support fuzzy searching
     name : str
         the name of the contact
     address : str
@@ -22,13 +46,18 @@ class Contact:
         returns the object as a dictionary
     to_list()
         returns the object as a list
+    fill(other)
+        fills in missing fields from another contact
     from_dict(contact_dict)
         returns a dictionary as a contact
     from_list(contact_list)
         returns a list as a contact
     """
 
+    __slots__ = ("name", "address", "phone")
+
     supported_search_fields = ["name", "address", "phone"]
+    supported_fuzzy_fields = ["name"]
 
     def __init__(self, name, address, phone):
         """
@@ -63,6 +92,35 @@ class Contact:
         """
         return f'{self.name} | {self.address} | {self.phone}'
 
+    def __eq__(self, other):
+        """
+        Returns whether another object is a contact with the same values
+        ...
+        Parameters
+        ----------
+        other : object
+            the object to compare against
+        ...
+        Returns
+        -------
+        bool
+            whether the objects hold equal contact data
+        """
+        if not isinstance(other, Contact):
+            return NotImplemented
+        return self.to_list() == other.to_list()
+
+    def __hash__(self):
+        """
+        Returns a hash of the contact's values
+        ...
+        Returns
+        -------
+        int
+            the hash of the object's field values
+        """
+        return hash((self.name, self.address, self.phone))
+
     def to_dict(self) -> {str: str}:
         """
         Returns a dictionary representation of the class
@@ -85,10 +143,23 @@ class Contact:
         """
         return [self.name, self.address, self.phone]
 
+    def fill(self, other) -> None:
+        """
+        Fills in any fields holding the NULL_FIELD string from another contact
+        ...
+        Parameters
+        ----------
+        other : Contact
+            the contact to take missing values from
+        """
+        for field in self.__slots__:
+            if getattr(self, field) == NULL_FIELD:
+                setattr(self, field, getattr(other, field))
+
     @staticmethod
     def from_dict(contact_dict) -> Contact:
         """
-        Returns a contact object from dictionary values
+        Returns a contact object from dictionary values, interning them
 
         Assumes dictionary format to be:
         {
@@ -107,12 +178,13 @@ class Contact:
         Contact
             a newly created contact object
         """
-        return Contact(contact_dict["name"], contact_dict["address"], contact_dict["phone"])
+        return Contact(intern_value(contact_dict["name"]), intern_value(contact_dict["address"]),
+                       intern_value(contact_dict["phone"]))
 
     @staticmethod
     def from_list(contact_list) -> Contact:
         """
-        Returns a contact object from list values
+        Returns a contact object from list values, interning them
 
         Assumes list format to be:
         ["<contact name>", "<contact address>", "<contact phone>"]
@@ -127,4 +199,4 @@ class Contact:
         Contact
             a newly created contact object
         """
-        return Contact(contact_list[0], contact_list[1], contact_list[2])
+        return Contact(intern_value(contact_list[0]), intern_value(contact_list[1]), intern_value(contact_list[2]))
@@ -0,0 +1,488 @@
+from models.Contact import Contact, intern_value
+from helpers import ReadOnlyRow
+from bisect import bisect_right
+from models import NULL_FIELD
+import itertools
+
+
+# Issue generations from one shared counter so that no two stores, nor two
+# states of the same store, are ever stamped with the same generation
+generations = itertools.count()
+
+
+class ContactStore:
+    """
+    A class defining column-oriented contact storage
+
+    Each field is held as its own column of interned strings, and contacts
+    are addressed by integer row. Contact objects are only built when a
+    row is actually read.
+
+    Rows are kept in a sequence of segments. Contacts added to the store
+    are held in ColumnSegments, while read-only segments backed by a file
+    (such as a memory-mapped register) can be attached and are only
+    decoded as their rows are read.
+    ...
+    Attributes
+    ----------
+    fields : [str]
+        the names of the stored fields, in Contact constructor order
+    segments : [object]
+        the segments holding the store's rows, in row order
+    starts : [int]
+        the first row of each segment
+    generation : int
+        a stamp which changes on every write to the store
+    revision : int
+        a count of the changes made to rows already stored
+    exports : {str: (int, tuple)}
+        the high-water mark of each format's last export, as the number of
+        rows written and the signature of the file left behind
+    ...
+    Methods
+    -------
+    add(name, address, phone)
+        stores a new contact from its field values
+    append(contact)
+        stores a contact object
+    extend(contacts)
+        stores a sequence of contact objects
+    extend_columns(columns)
+        stores rows given as one list of values per field
+    fill(row, values)
+        fills in the missing fields of a stored row
+    attach(segment)
+        adds the rows of a read-only segment to the store
+    column(field)
+        returns the column of values for a field
+    row(row)
+        returns a list of the field values of a row
+    rows()
+        returns an iterator over the field values of every row
+    view(start, stop)
+        returns a lazy view over a range of rows
+    """
+
+    def __init__(self):
+        """
+        Initialises the class with a single empty column segment
+        ...
+        Returns
+        -------
+        ContactStore
+            a new ContactStore object
+        """
+        self.fields = Contact.supported_search_fields
+        self.segments = [ColumnSegment(self.fields)]
+        self.starts = [0]
+        self.generation = next(generations)
+        self.revision = 0
+        self.exports = {}
+
+    def __len__(self):
+        """
+        Returns the number of stored contacts
+        ...
+        Returns
+        -------
+        int
+            the number of rows in the store
+        """
+        return self.starts[-1] + len(self.segments[-1])
+
+    def __getitem__(self, row):
+        """
+        Returns the contact stored at a row, building it on demand
+        ...
+        Parameters
+        ----------
+        row : int
+            the row of the contact
+        ...
+        Returns
+        -------
+        Contact
+            a new contact object holding the row's values
+        """
+        return Contact(*self.row(row))
+
+    def __iter__(self):
+        """
+        Returns an iterator building each stored contact in turn
+        ...
+        Returns
+        -------
+        iterator
+            an iterator over contact objects in row order
+        """
+        return itertools.starmap(Contact, self.rows())
+
+    def writable_segment(self):
+        """
+        Returns the segment new contacts should be added to, starting a
+        new column segment if the last one is read-only
+        ...
+        Returns
+        -------
+        ColumnSegment
+            the last segment of the store
+        """
+        if not isinstance(self.segments[-1], ColumnSegment):
+            self.starts.append(len(self))
+            self.segments.append(ColumnSegment(self.fields))
+        return self.segments[-1]
+
+    def add(self, name, address, phone) -> int:
+        """
+        Stores a new contact from its field values
+        ...
+        Parameters
+        ----------
+        name : str
+            the contact's full name
+        address : str
+            the contact's address
+        phone : str
+            the contact's phone number
+        ...
+        Returns
+        -------
+        int
+            the row of the new contact
+        """
+        segment = self.writable_segment()
+        for field, value in zip(self.fields, (name, address, phone)):
+            segment.columns[field].append(intern_value(value or NULL_FIELD))
+        self.generation = next(generations)
+        return len(self) - 1
+
+    def append(self, contact) -> int:
+        """
+        Stores a contact object
+        ...
+        Parameters
+        ----------
+        contact : Contact
+            the contact to store
+        ...
+        Returns
+        -------
+        int
+            the row of the stored contact
+        """
+        return self.add(*contact.to_list())
+
+    def extend(self, contacts) -> None:
+        """
+        Stores a sequence of contact objects, one column at a time
+        ...
+        Parameters
+        ----------
+        contacts : [Contact]
+            the contacts to store
+        """
+        contacts = contacts if isinstance(contacts, (list, tuple)) else list(contacts)
+        segment = self.writable_segment()
+        for field in self.fields:
+            segment.columns[field].extend(intern_value(getattr(contact, field)) for contact in contacts)
+        self.generation = next(generations)
+
+    def extend_columns(self, columns) -> None:
+        """
+        Stores rows given as one list of values per field, such as those
+        parsed by another process
+        ...
+        Parameters
+        ----------
+        columns : [[str]]
+            the values of each field in field order, all of equal length
+        """
+        segment = self.writable_segment()
+        for field, values in zip(self.fields, columns):
+            segment.columns[field].extend(map(intern_value, values))
+        self.generation = next(generations)
+
+    def fill(self, row, values) -> bool:
+        """
+        Fills in the fields of a stored row which hold the NULL_FIELD string
+
+        Since this changes a stored row, indexes built over the store must be
+        rebuilt, and exports already holding the row can no longer be appended to.
+        Rows held in a read-only segment cannot be filled in, so filling in any
+        of their fields raises ReadOnlyRow rather than losing the values.
+        ...
+        Parameters
+        ----------
+        row : int
+            the row to fill in
+        values : [str]
+            the values to fill in from, in field order
+        ...
+        Returns
+        -------
+        bool
+            whether any field was filled in
+        """
+        segment, position = self.locate(row)
+        stored = segment.row(position)
+        missing = [i for i, (old, value) in enumerate(zip(stored, values))
+                   if old == NULL_FIELD and value and value != NULL_FIELD]
+        if not missing:
+            return False
+        if not isinstance(segment, ColumnSegment):
+            raise ReadOnlyRow(row)
+        for i in missing:
+            segment.columns[self.fields[i]][position] = intern_value(values[i])
+        self.generation = next(generations)
+        self.revision += 1
+        self.exports = {name: mark for name, mark in self.exports.items() if mark[0] <= row}
+        return True
+
+    def attach(self, segment) -> None:
+        """
+        Adds the rows of a read-only segment to the end of the store
+        without reading them
+        ...
+        Parameters
+        ----------
+        segment : object
+            the segment to attach, providing __len__, column(field),
+            row(row) and rows() in the same way as a ColumnSegment
+        """
+        if not len(self.segments[-1]):
+            # Replace an empty trailing segment rather than keeping it around
+            self.segments.pop()
+            self.starts.pop()
+        self.starts.append(len(self) if self.segments else 0)
+        self.segments.append(segment)
+        self.generation = next(generations)
+
+    def locate(self, row) -> (object, int):
+        """
+        Returns the segment holding a row and the row's position within it
+        ...
+        Parameters
+        ----------
+        row : int
+            the row to locate, which may be negative to count from the end
+        ...
+        Returns
+        -------
+        (object, int)
+            the segment and the row's position within it
+        """
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('store row out of range')
+        position = bisect_right(self.starts, row) - 1
+        return self.segments[position], row - self.starts[position]
+
+    def column(self, field) -> [str]:
+        """
+        Returns the column of values for a field
+        ...
+        Parameters
+        ----------
+        field : str
+            the name of the field
+        ...
+        Returns
+        -------
+        [str]
+            the field's values in row order
+        """
+        if len(self.segments) == 1:
+            # Handle the common single segment case by handing out its column directly
+            return self.segments[0].column(field)
+        return StoreColumn(self, field)
+
+    def row(self, row) -> [str]:
+        """
+        Returns a list of the field values of a row
+        ...
+        Parameters
+        ----------
+        row : int
+            the row to read
+        ...
+        Returns
+        -------
+        [str]
+            the row's values in field order
+        """
+        segment, position = self.locate(row)
+        return segment.row(position)
+
+    def rows(self):
+        """
+        Returns an iterator over the field values of every row
+        ...
+        Returns
+        -------
+        iterator
+            an iterator of value tuples in row order
+        """
+        return itertools.chain.from_iterable(segment.rows() for segment in self.segments)
+
+    def view(self, start, stop=None):
+        """
+        Returns a lazy view over a range of rows
+        ...
+        Parameters
+        ----------
+        start : int
+            the first row of the view
+        stop : int
+            the row after the end of the view (default is the store's end)
+        ...
+        Returns
+        -------
+        ContactView
+            a view building contacts from the store as they are read
+        """
+        return ContactView(self, range(start, len(self) if stop is None else stop))
+
+
+class ColumnSegment:
+    """
+    A class defining a block of rows held in memory as one column of
+    interned values per field
+    ...
+    Attributes
+    ----------
+    fields : [str]
+        the names of the stored fields
+    columns : {str: [str]}
+        a column of interned values for each field
+    """
+
+    def __init__(self, fields):
+        """
+        Initialises the class with empty columns
+        ...
+        Parameters
+        ----------
+        fields : [str]
+            the names of the fields to store
+        ...
+        Returns
+        -------
+        ColumnSegment
+            a new ColumnSegment object
+        """
+        self.fields = fields
+        self.columns = {field: [] for field in fields}
+
+    def __len__(self):
+        """Returns the number of rows in the segment"""
+        return len(self.columns[self.fields[0]])
+
+    def column(self, field) -> [str]:
+        """Returns the column of values for a field"""
+        return self.columns[field]
+
+    def row(self, row) -> [str]:
+        """Returns a list of the field values of a row"""
+        return [self.columns[field][row] for field in self.fields]
+
+    def rows(self):
+        """Returns an iterator over the field values of every row"""
+        return zip(*(self.columns[field] for field in self.fields))
+
+
+class StoreColumn:
+    """
+    A class defining a read-only column of one field spanning every
+    segment of a store
+    ...
+    Attributes
+    ----------
+    store : ContactStore
+        the store the column belongs to
+    field : str
+        the name of the field
+    """
+
+    def __init__(self, store, field):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        store : ContactStore
+            the store the column belongs to
+        field : str
+            the name of the field
+        ...
+        Returns
+        -------
+        StoreColumn
+            a new StoreColumn object
+        """
+        self.store = store
+        self.field = field
+
+    def __len__(self):
+        """Returns the number of rows in the column"""
+        return len(self.store)
+
+    def __getitem__(self, index):
+        """Returns the value at a row, or a list of values for a slice of rows"""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self.store))
+            if step != 1:
+                return [self[row] for row in range(start, stop, step)]
+            # Gather each segment's part of the slice in one go
+            values = []
+            for segment, first in zip(self.store.segments, self.store.starts):
+                low, high = max(start - first, 0), min(stop - first, len(segment))
+                if low < high:
+                    values.extend(segment.column(self.field)[low:high])
+            return values
+        segment, position = self.store.locate(index)
+        return segment.column(self.field)[position]
+
+
+class ContactView:
+    """
+    A class defining a read-only view over a range of store rows
+    ...
+    Attributes
+    ----------
+    store : ContactStore
+        the store being viewed
+    span : range
+        the rows covered by the view
+    """
+
+    def __init__(self, store, span):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        store : ContactStore
+            the store to view
+        span : range
+            the rows to cover
+        ...
+        Returns
+        -------
+        ContactView
+            a new ContactView object
+        """
+        self.store = store
+        self.span = span
+
+    def __len__(self):
+        """Returns the number of rows in the view"""
+        return len(self.span)
+
+    def __getitem__(self, index):
+        """Returns the contact at a position in the view"""
+        return self.store[self.span[index]]
+
+    def __iter__(self):
+        """Returns an iterator building each contact in the view in turn"""
+        return map(self.store.__getitem__, self.span)
@@ -0,0 +1,132 @@
+"""
+ContactRegister Search Cache Module
+
+This script defines a cache for repeated search results:
+    * SearchCache - a bounded LRU cache invalidated by a generation counter
+
+This script should be imported wherever needed as module.
+"""
+
+from collections import OrderedDict
+
+
+class SearchCache:
+    """
+    A class defining a bounded least-recently-used cache of search results
+
+    Entries are only valid for the generation of the contact store they
+    were computed against, so bumping the generation on every write
+    invalidates the whole cache without touching any entries.
+    ...
+    Attributes
+    ----------
+    maxsize : int
+        the maximum number of results to keep
+    generation : int
+        the store generation the cached results belong to
+    entries : OrderedDict
+        the cached results, from least to most recently used
+    hits : int
+        the number of lookups answered from the cache
+    misses : int
+        the number of lookups not answered from the cache
+    ...
+    Methods
+    -------
+    get(key, generation)
+        returns a cached result, or None if there is none
+    put(key, generation, result)
+        caches a result
+    clear()
+        empties the cache and resets its counters
+    info()
+        returns the cache's counters and sizes
+    """
+
+    def __init__(self, maxsize=128):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        maxsize : int
+            the maximum number of results to keep (default is 128)
+        ...
+        Returns
+        -------
+        SearchCache
+            a new SearchCache object
+        """
+        self.maxsize = maxsize
+        self.generation = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, generation) -> list:
+        """
+        Returns a cached result, or None if there is none
+        ...
+        Parameters
+        ----------
+        key : tuple
+            the normalised query to look up
+        generation : int
+            the current store generation
+        ...
+        Returns
+        -------
+        list
+            a copy of the cached result, or None on a miss
+        """
+        if generation != self.generation:
+            # Drop every entry computed against an older generation
+            self.entries.clear()
+            self.generation = generation
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        # Mark the entry as most recently used and hand back a copy callers can modify
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return list(result)
+
+    def put(self, key, generation, result) -> None:
+        """
+        Caches a result, evicting the least recently used entry if full
+        ...
+        Parameters
+        ----------
+        key : tuple
+            the normalised query the result belongs to
+        generation : int
+            the store generation the result was computed against
+        result : list
+            the result to cache
+        """
+        if generation != self.generation or self.maxsize <= 0:
+            return
+        self.entries[key] = list(result)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets its counters
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> {str: int}:
+        """
+        Returns the cache's counters and sizes
+        ...
+        Returns
+        -------
+        {str: int}
+            the hits, misses, current size and maximum size of the cache
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
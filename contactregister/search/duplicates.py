@@ -0,0 +1,185 @@
+"""
+ContactRegister Duplicates Module
+
+This script defines a hash index for spotting duplicate contacts:
+    * contact_key - returns the normalised key two duplicates share
+    * DuplicateIndex - maps the key of every stored contact to its row
+
+This script should be imported wherever needed as module.
+"""
+
+from helpers import ReadOnlyRow
+from models.Contact import Contact
+import helpers
+
+
+def contact_key(name, phone) -> (str, str):
+    """
+    A module function to return the key duplicate contacts share, made of
+    the casefolded name (with runs of whitespace collapsed) and the
+    normalised phone number
+    ...
+    Parameters
+    ----------
+    name : str
+        the contact's full name
+    phone : str
+        the contact's phone number
+    ...
+    Returns
+    -------
+    (str, str)
+        the normalised name and phone number
+    """
+    return " ".join(name.split()).casefold(), helpers.normalise_phone(phone)
+
+
+class DuplicateIndex:
+    """
+    A class defining a hash index from the key of each stored contact to
+    the first row holding it
+
+    Like the search indexes, the index catches up with rows appended to
+    the store whenever it is used, and is rebuilt if the store is replaced
+    or its stored rows change other than through the index's own merges.
+    ...
+    Attributes
+    ----------
+    source : ContactStore
+        the contact store the index was built from
+    size : int
+        the number of rows from the source indexed so far
+    revision : int
+        the revision of the source the index is up to date with
+    rows : {(str, str): int}
+        the first row holding each key
+    dropped : int
+        the number of duplicates dropped so far
+    ...
+    Methods
+    -------
+    sync(contacts)
+        brings the index up to date with a contact store
+    find(contacts, name, phone)
+        returns the row of a stored duplicate of a contact
+    filter(contacts, new_contacts, merge)
+        drops the duplicates from a sequence of incoming contacts
+    """
+
+    def __init__(self):
+        """
+        Initialises the class with an empty index
+        ...
+        Returns
+        -------
+        DuplicateIndex
+            a new DuplicateIndex object
+        """
+        self.source = None
+        self.size = 0
+        self.revision = 0
+        self.rows = {}
+        self.dropped = 0
+
+    def sync(self, contacts) -> None:
+        """
+        Brings the index up to date with a contact store
+        ...
+        Parameters
+        ----------
+        contacts : ContactStore
+            the contact store to index
+        """
+        if contacts is not self.source or len(contacts) < self.size or contacts.revision != self.revision:
+            # Start over when the store has been replaced, truncated or changed
+            self.source = contacts
+            self.size = 0
+            self.revision = contacts.revision
+            self.rows = {}
+        if len(contacts) == self.size:
+            return
+        # Index each new row, keeping the first row of any key seen before
+        names, phones = contacts.column("name")[self.size:], contacts.column("phone")[self.size:]
+        for row, name, phone in zip(range(self.size, len(contacts)), names, phones):
+            self.rows.setdefault(contact_key(name, phone), row)
+        self.size = len(contacts)
+
+    def find(self, contacts, name, phone) -> int:
+        """
+        Returns the row of a stored duplicate of a contact
+        ...
+        Parameters
+        ----------
+        contacts : ContactStore
+            the contact store to look in
+        name : str
+            the contact's full name
+        phone : str
+            the contact's phone number
+        ...
+        Returns
+        -------
+        int
+            the row of the first duplicate, or None if there is none
+        """
+        self.sync(contacts)
+        return self.rows.get(contact_key(name, phone))
+
+    def filter(self, contacts, new_contacts, merge=False) -> [Contact]:
+        """
+        Drops the duplicates from a sequence of incoming contacts, whether
+        of stored contacts or of contacts earlier in the sequence
+        ...
+        Parameters
+        ----------
+        contacts : ContactStore
+            the contact store the contacts are headed for
+        new_contacts : [Contact]
+            the incoming contacts
+        merge : bool
+            whether to fill in the missing fields of the contact each
+            duplicate is dropped in favour of, copying incoming contacts
+            rather than changing them (default is False)
+        ...
+        Returns
+        -------
+        [Contact]
+            the incoming contacts which are not duplicates, in order, along
+            with any duplicate whose merge into a read-only stored row was
+            refused
+        """
+        self.sync(contacts)
+        kept = []
+        pending = {}
+        for contact in new_contacts:
+            key = contact_key(contact.name, contact.phone)
+            row = self.rows.get(key)
+            if row is None and key not in pending:
+                pending[key] = len(kept)
+                kept.append(contact)
+                continue
+            if merge and key in pending:
+                # Merge into a copy of the earlier incoming contact, which is not stored yet, leaving
+                # the caller's contact objects (which may be held in sets or as keys) unchanged
+                merged = Contact(*kept[pending[key]].to_list())
+                merged.fill(contact)
+                kept[pending[key]] = merged
+            elif merge:
+                try:
+                    filled = contacts.fill(row, contact.to_list())
+                except ReadOnlyRow:
+                    # Keep the contact rather than lose the fields it would fill in, as its stored
+                    # duplicate is held in a read-only segment, and merge any later duplicates into it
+                    pending[key] = len(kept)
+                    kept.append(contact)
+                    continue
+                if filled:
+                    # Carry on from the store's new revision where the merge left the row's key
+                    # unchanged, and otherwise re-index the store under the row's new key
+                    name, _address, phone = contacts.row(row)
+                    if contact_key(name, phone) == key:
+                        self.revision = contacts.revision
+                    else:
+                        self.sync(contacts)
+            self.dropped += 1
+        return kept
@@ -0,0 +1,220 @@
+"""
+ContactRegister Fuzzy Search Module
+
+This script defines a BK-tree for finding values within an edit distance:
+    * fuzzy_key - returns the form values are compared in
+    * edit_distance - returns the Levenshtein distance between two strings
+    * rank_contacts - ranks contacts by how closely a field matches a value
+    * BKTree - a metric tree over the distinct values of one field
+
+This script should be imported wherever needed as module.
+"""
+
+from models.Contact import Contact
+
+
+def fuzzy_key(value) -> str:
+    """
+    A module function to return the form values are compared in, which
+    ignores case and runs of whitespace
+    ...
+    Parameters
+    ----------
+    value : str
+        the field value to normalise
+    ...
+    Returns
+    -------
+    str
+        the normalised value
+    """
+    return " ".join(value.split()).casefold()
+
+
+def edit_distance(first, second) -> int:
+    """
+    A module function to return the Levenshtein distance between two
+    strings, the fewest single-character insertions, deletions and
+    substitutions turning one into the other
+    ...
+    Parameters
+    ----------
+    first : str
+        the first string
+    second : str
+        the second string
+    ...
+    Returns
+    -------
+    int
+        the edit distance between the strings
+    """
+    if len(first) < len(second):
+        first, second = second, first
+    # Keep a single row of the distance table, sized by the shorter string
+    previous = list(range(len(second) + 1))
+    for i, char in enumerate(first, 1):
+        current = [i]
+        for j, other in enumerate(second, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+
+def rank_contacts(contacts, field, value, distance) -> [Contact]:
+    """
+    A module function to rank contacts by how closely a field matches a
+    value, checking every contact in turn
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        the contacts to rank
+    field : str
+        the field to compare
+    value : str
+        the value to compare against
+    distance : int
+        the greatest edit distance to accept
+    ...
+    Returns
+    -------
+    [Contact]
+        the contacts within the distance, closest first and otherwise in order
+    """
+    key = fuzzy_key(value)
+    ranked = []
+    for contact in contacts:
+        found = edit_distance(key, fuzzy_key(getattr(contact, field)))
+        if found <= distance:
+            ranked.append((found, len(ranked), contact))
+    return [contact for _found, _order, contact in sorted(ranked)]
+
+
+class BKTree:
+    """
+    A class defining a BK-tree over the distinct values of one field
+
+    Each node holds a value and the rows holding it, and each child hangs
+    off its parent by their edit distance. By the triangle inequality, a
+    search within distance d of a query at distance n from a node need only
+    visit the children between n - d and n + d, leaving most of the tree
+    unvisited for small distances.
+
+    Adding a row only files it under its value, so indexing stays cheap.
+    Values new to the tree are queued, and only placed in the tree (which
+    takes an edit distance per level) once the tree is next searched.
+    ...
+    Attributes
+    ----------
+    root : list
+        the root node as its value, its rows and its children by distance
+        (None while the tree is empty)
+    values : {str: [int]}
+        the ascending rows holding each distinct value
+    pending : [str]
+        the distinct values not yet placed in the tree
+    ...
+    Methods
+    -------
+    add(row, value)
+        indexes a field value under the given row number
+    insert(key)
+        places a distinct value in the tree
+    search(value, distance)
+        returns the rows within an edit distance of a value
+    """
+
+    def __init__(self):
+        """
+        Initialises the class with an empty tree
+        ...
+        Returns
+        -------
+        BKTree
+            a new BKTree object
+        """
+        self.root = None
+        self.values = {}
+        self.pending = []
+
+    def __len__(self):
+        """Returns the number of distinct values indexed"""
+        return len(self.values)
+
+    def add(self, row, value) -> None:
+        """
+        Indexes a field value under the given row number
+        ...
+        Parameters
+        ----------
+        row : int
+            the row holding the value
+        value : str
+            the field value to index
+        """
+        key = fuzzy_key(value)
+        rows = self.values.get(key)
+        if rows is None:
+            # Queue values new to the tree to be placed in it by the next search
+            self.values[key] = [row]
+            self.pending.append(key)
+        else:
+            rows.append(row)
+
+    def insert(self, key) -> None:
+        """
+        Places a distinct value in the tree, under the node at its distance
+        from each node along the way
+        ...
+        Parameters
+        ----------
+        key : str
+            the normalised value to place, already filed in values
+        """
+        node = [key, self.values[key], {}]
+        if self.root is None:
+            self.root = node
+            return
+        parent = self.root
+        while True:
+            found = edit_distance(key, parent[0])
+            child = parent[2].get(found)
+            if child is None:
+                parent[2][found] = node
+                return
+            parent = child
+
+    def search(self, value, distance) -> [(int, int)]:
+        """
+        Returns the rows within an edit distance of a value
+        ...
+        Parameters
+        ----------
+        value : str
+            the value to search for
+        distance : int
+            the greatest edit distance to accept
+        ...
+        Returns
+        -------
+        [(int, int)]
+            the edit distance and row of each match, closest first and
+            otherwise in row order
+        """
+        for pending in self.pending:
+            self.insert(pending)
+        self.pending = []
+        if self.root is None:
+            return []
+        key = fuzzy_key(value)
+        matches = []
+        nodes = [self.root]
+        while nodes:
+            node_key, rows, children = nodes.pop()
+            found = edit_distance(key, node_key)
+            if found <= distance:
+                matches.extend((found, row) for row in rows)
+            # Only visit the children the triangle inequality leaves in range
+            nodes.extend(child for gap, child in children.items() if found - distance <= gap <= found + distance)
+        return sorted(matches)
@@ -0,0 +1,157 @@
+"""
+ContactRegister Search Index Module
+
+This script defines the index kept alongside the contact store:
+    * SearchIndex - maintains per-field indexes over a contact store
+
+This script should be imported wherever needed as module.
+"""
+
+from functools import partial
+
+
+class SearchIndex:
+    """
+    A class defining the set of per-field indexes over a contact store
+    ...
+    Attributes
+    ----------
+    fields : [str]
+        the contact fields being indexed
+    fuzzy_fields : [str]
+        the contact fields indexed for fuzzy searching
+    source : ContactStore
+        the contact store the indexes were built from
+    size : int
+        the number of rows from the source indexed so far
+    revision : int
+        the revision of the source the indexes were built from
+    trigrams : {str: TrigramIndex}
+        a trigram index for each field
+    prefixes : {str: SortedIndex}
+        a sorted index for each field, used for prefix range scans
+    suffixes : {str: SortedIndex}
+        a reversed sorted index for each field, used for suffix range scans
+    fuzzy : {str: BKTree}
+        a BK-tree for each fuzzy field, used for edit distance searches
+    ...
+    Methods
+    -------
+    sync(contacts)
+        brings the indexes up to date with a contact store
+    access_path(query_filter)
+        returns the cheapest way to find the rows which may match a filter
+    """
+
+    def __init__(self, fields, fuzzy_fields=()):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        fields : [str]
+            the contact fields to index
+        fuzzy_fields : [str]
+            the contact fields to index for fuzzy searching (default is none)
+        ...
+        Returns
+        -------
+        SearchIndex
+            a new SearchIndex object
+        """
+        self.fields = fields
+        self.fuzzy_fields = fuzzy_fields
+        self.source = None
+        self.size = 0
+        self.revision = 0
+        self.trigrams = {}
+        self.prefixes = {}
+        self.suffixes = {}
+        self.fuzzy = {}
+
+    def sync(self, contacts) -> bool:
+        """
+        Brings the indexes up to date with a contact store
+
+        Rows appended since the last sync are indexed incrementally,
+        while a different or shrunken store, or one whose stored rows have
+        changed, triggers a full rebuild.
+        ...
+        Parameters
+        ----------
+        contacts : ContactStore
+            the contact store to index
+        ...
+        Returns
+        -------
+        bool
+            whether the indexes changed
+        """
+        changed = False
+        if contacts is not self.source or len(contacts) < self.size or contacts.revision != self.revision:
+            # Start over when the store has been replaced, truncated or changed, importing the index
+            # structures only once first built, as they are slow to import and many sessions never search
+            from search.ordered import SortedIndex
+            from search.trigram import TrigramIndex
+            from search.fuzzy import BKTree
+            self.source = contacts
+            self.size = 0
+            self.revision = contacts.revision
+            self.trigrams = {field: TrigramIndex() for field in self.fields}
+            self.prefixes = {field: SortedIndex() for field in self.fields}
+            self.suffixes = {field: SortedIndex(reverse=True) for field in self.fields}
+            self.fuzzy = {field: BKTree() for field in self.fuzzy_fields}
+            changed = True
+        if len(contacts) == self.size:
+            return changed
+        # Index each new row one column at a time
+        for field in self.fields:
+            values = contacts.column(field)[self.size:]
+            trigrams = self.trigrams[field]
+            for row, value in enumerate(values, self.size):
+                trigrams.add(row, value)
+            self.prefixes[field].extend(self.size, values)
+            self.suffixes[field].extend(self.size, values)
+            if field in self.fuzzy:
+                fuzzy = self.fuzzy[field]
+                for row, value in enumerate(values, self.size):
+                    fuzzy.add(row, value)
+        self.size = len(contacts)
+        return True
+
+    def access_path(self, query_filter) -> (int, bool, partial):
+        """
+        Returns the cheapest way to find the rows which may match a filter
+
+        The sorted and reversed indexes give exact range sizes, and the
+        trigram index bounds its candidates by its shortest posting list.
+        The smallest estimate wins, preferring ranges needing no verification.
+        ...
+        Parameters
+        ----------
+        query_filter : QueryFilter
+            the filter to look up
+        ...
+        Returns
+        -------
+        (int, bool, partial)
+            the estimated number of candidate rows, whether every candidate
+            is a match, and a function returning the ascending candidate rows
+            (or None if the filter can only be answered by a full scan)
+        """
+        field, pattern = query_filter.field, query_filter.pattern
+        best = (self.size, False, None)
+        # Consider a range scan of the sorted and reversed indexes
+        for index in (self.prefixes[field], self.suffixes[field]):
+            found = index.lookup(pattern)
+            if found is None:
+                continue
+            low, high, exact = found
+            if (high - low, not exact) < (best[0], not best[1]):
+                best = (high - low, exact, partial(index.rows_between, low, high))
+        # Consider intersecting the trigram posting lists
+        trigrams = self.trigrams[field]
+        estimate = trigrams.estimate(pattern)
+        if estimate is not None and (estimate, True) < (best[0], not best[1]):
+            best = (estimate, False, partial(trigrams.candidates, pattern))
+        return best
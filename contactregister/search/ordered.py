@@ -0,0 +1,248 @@
+"""
+ContactRegister Ordered Index Module
+
+This script defines a sorted, bisect-searchable index over a single field:
+    * SortedIndex - keeps field values (or their reversals) in order for
+      prefix (or suffix) range scans
+
+This script should be imported wherever needed as module.
+"""
+
+from search.patterns import normalise, parse_pattern
+from bisect import bisect_left, bisect_right
+from array import array
+
+
+# Define module constants
+MAX_CHAR = chr(0x10FFFF)
+BULK_THRESHOLD = 64
+
+
+def successor(prefix) -> str:
+    """
+    A module function to return the smallest string greater than every
+    string starting with the given prefix
+    ...
+    Parameters
+    ----------
+    prefix : str
+        the prefix to find the successor of
+    ...
+    Returns
+    -------
+    str
+        the successor string, or None if no such string exists
+    """
+    # Drop trailing characters that cannot be incremented
+    prefix = prefix.rstrip(MAX_CHAR)
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class SortedIndex:
+    """
+    A class defining a sorted index of field values
+
+    A reversed index stores each value back to front, so that values
+    ending with a suffix are contiguous in the same way prefixes are.
+    ...
+    Attributes
+    ----------
+    reverse : bool
+        whether keys are stored reversed
+    keys : [str]
+        the normalised (and possibly reversed) field values in ascending order
+    rows : array
+        the row number holding each key, in key order
+    pending : [(str, int)]
+        the (key, row) entries added since the keys were last merged
+    ...
+    Methods
+    -------
+    extend(start, values)
+        indexes field values under consecutive row numbers
+    flush()
+        merges any pending entries into the sorted keys
+    key_range(prefix)
+        returns the key positions of keys starting with a prefix
+    lookup(pattern)
+        returns the key positions which may match a glob pattern
+    rows_between(low, high)
+        returns the rows of a range of key positions in ascending order
+    candidates(pattern)
+        returns the rows which may match a glob pattern
+    """
+
+    def __init__(self, reverse=False):
+        """
+        Initialises the class with empty keys and rows
+        ...
+        Parameters
+        ----------
+        reverse : bool
+            whether to index values back to front (default is False)
+        ...
+        Returns
+        -------
+        SortedIndex
+            a new SortedIndex object
+        """
+        self.reverse = reverse
+        self.keys = []
+        self.rows = array('L')
+        self.pending = []
+
+    def to_key(self, value) -> str:
+        """
+        Returns the key a field value is stored under
+        ...
+        Parameters
+        ----------
+        value : str
+            the field value to convert
+        ...
+        Returns
+        -------
+        str
+            the normalised, and possibly reversed, key
+        """
+        key = normalise(value)
+        return key[::-1] if self.reverse else key
+
+    def extend(self, start, values) -> None:
+        """
+        Indexes field values under consecutive row numbers
+
+        Entries are held as pending until the next lookup, so a stream of
+        batches costs one merge rather than one merge per batch.
+        ...
+        Parameters
+        ----------
+        start : int
+            the row number of the first value
+        values : [str]
+            the field values to index
+        """
+        to_key = self.to_key
+        self.pending.extend((to_key(value), row) for row, value in enumerate(values, start))
+
+    def flush(self) -> None:
+        """
+        Merges any pending entries into the sorted keys
+
+        Small batches are inserted in place, while larger ones are merged
+        by re-sorting, which is close to linear for two sorted runs.
+        """
+        if not self.pending:
+            return
+        if len(self.pending) < BULK_THRESHOLD:
+            # Insert after any equal keys so rows stay ascending within a key
+            for key, row in self.pending:
+                position = bisect_right(self.keys, key)
+                self.keys.insert(position, key)
+                self.rows.insert(position, row)
+        else:
+            # Merge the new entries with the existing ones in a single sort
+            entries = list(zip(self.keys, self.rows))
+            entries.extend(self.pending)
+            entries.sort()
+            self.keys = [key for key, _row in entries]
+            self.rows = array('L', [row for _key, row in entries])
+        self.pending = []
+
+    def key_range(self, prefix) -> (int, int):
+        """
+        Returns the key positions of keys starting with a prefix
+        ...
+        Parameters
+        ----------
+        prefix : str
+            the key prefix to look up
+        ...
+        Returns
+        -------
+        (int, int)
+            the start and end positions of the matching keys
+        """
+        self.flush()
+        upper = successor(prefix)
+        low = bisect_left(self.keys, prefix)
+        high = len(self.keys) if upper is None else bisect_left(self.keys, upper, low)
+        return low, high
+
+    def lookup(self, pattern) -> (int, int, bool):
+        """
+        Returns the key positions which may match a glob pattern
+
+        Patterns starting with literal text (or ending with it, for a
+        reversed index) resolve to a range of keys. When that literal is
+        followed by nothing, or only by a trailing *, the range is exact
+        and needs no further verification.
+        ...
+        Parameters
+        ----------
+        pattern : str
+            the glob pattern to look up
+        ...
+        Returns
+        -------
+        (int, int, bool)
+            the start and end positions of the candidate keys and whether
+            every candidate is a match, or None if the pattern has no
+            literal text to anchor the range on
+        """
+        self.flush()
+        runs = parse_pattern(normalise(pattern))
+        if self.reverse:
+            # Read the pattern back to front to match the reversed keys
+            runs = [(is_literal, text[::-1] if is_literal else text) for is_literal, text in reversed(runs)]
+        if not runs or not runs[0][0]:
+            # Handle patterns starting with a wildcard
+            return None
+        anchor = runs[0][1]
+        if len(runs) == 1:
+            # Handle fully literal patterns as an exact key lookup
+            low = bisect_left(self.keys, anchor)
+            return low, bisect_right(self.keys, anchor, low), True
+        low, high = self.key_range(anchor)
+        return low, high, all(text == "*" for _is_literal, text in runs[1:])
+
+    def rows_between(self, low, high) -> array:
+        """
+        Returns the rows of a range of key positions in ascending order
+        ...
+        Parameters
+        ----------
+        low : int
+            the first key position of the range
+        high : int
+            the key position after the end of the range
+        ...
+        Returns
+        -------
+        array
+            an ascending list of rows
+        """
+        return array('L', sorted(self.rows[low:high]))
+
+    def candidates(self, pattern) -> (array, bool):
+        """
+        Returns the rows which may match a glob pattern
+        ...
+        Parameters
+        ----------
+        pattern : str
+            the glob pattern to look up
+        ...
+        Returns
+        -------
+        (array, bool)
+            an ascending list of candidate rows, or None if the pattern has
+            no literal text to anchor on, and whether every candidate is a match
+        """
+        found = self.lookup(pattern)
+        if found is None:
+            return None, False
+        low, high, exact = found
+        return self.rows_between(low, high), exact
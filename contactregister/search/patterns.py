@@ -0,0 +1,173 @@
+"""
+ContactRegister Search Patterns Module
+
+This script defines helper functions for inspecting glob patterns:
+    * normalise - normalises a value or pattern the same way fnmatch does
+    * parse_pattern - splits a glob pattern into literal and wildcard runs
+    * literal_fragments - returns the literal text runs of a glob pattern
+    * compile_pattern - compiles a glob pattern to a reusable matcher
+    * sql_glob - translates a glob pattern to an equivalent SQL GLOB pattern
+
+This script should be imported wherever needed as module.
+"""
+
+from functools import lru_cache
+import posixpath
+import fnmatch
+import os
+import re
+
+
+def normalise(value) -> str:
+    """
+    A module function to normalise a value or pattern so index lookups
+    agree with fnmatch (which applies os.path.normcase to both sides)
+    ...
+    Parameters
+    ----------
+    value : str
+        the field value or glob pattern to normalise
+    ...
+    Returns
+    -------
+    str
+        the normalised string
+    """
+    return os.path.normcase(value)
+
+
+def parse_pattern(pattern) -> [(bool, str)]:
+    """
+    A module function to split a glob pattern into runs of literal
+    text and individual wildcard tokens (*, ? and [...] classes)
+
+    Character classes are recognised using the same rules as
+    fnmatch.translate, so an unterminated [ is treated as a literal.
+    ...
+    Parameters
+    ----------
+    pattern : str
+        the glob pattern to split
+    ...
+    Returns
+    -------
+    [(bool, str)]
+        a list of (is_literal, text) runs in pattern order
+    """
+    runs = []
+    literal = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c in "*?":
+            token = c
+        elif c == "[":
+            # Find the end of the character class, mirroring fnmatch.translate
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                # Handle unterminated class case, which fnmatch matches literally
+                literal.append(c)
+                continue
+            token = pattern[i - 1:j + 1]
+            i = j + 1
+        else:
+            literal.append(c)
+            continue
+        # Close off any pending literal run before recording the wildcard
+        if literal:
+            runs.append((True, "".join(literal)))
+            literal = []
+        runs.append((False, token))
+    if literal:
+        runs.append((True, "".join(literal)))
+    return runs
+
+
+def literal_fragments(pattern) -> [str]:
+    """
+    A module function to return the literal text runs of a glob pattern,
+    every one of which must appear in any value matching the pattern
+    ...
+    Parameters
+    ----------
+    pattern : str
+        the glob pattern to inspect
+    ...
+    Returns
+    -------
+    [str]
+        a list of literal text fragments
+    """
+    return [text for is_literal, text in parse_pattern(pattern) if is_literal]
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern):
+    """
+    A module function to compile a glob pattern once into a matcher
+    giving the same results as fnmatch.fnmatch
+    ...
+    Parameters
+    ----------
+    pattern : str
+        the glob pattern to compile
+    ...
+    Returns
+    -------
+    callable
+        a function taking a field value and returning a truthy value
+        if it matches the pattern
+    """
+    match = re.compile(fnmatch.translate(normalise(pattern))).match
+    if os.path is posixpath:
+        # Handle POSIX platforms, where normcase is a no-op and can be skipped
+        return match
+    return lambda value: match(normalise(value))
+
+
+def sql_glob(pattern) -> str:
+    """
+    A module function to translate a glob pattern to an SQLite GLOB
+    pattern matching exactly the same values as fnmatch
+
+    GLOB is case-sensitive and does not normalise its operands, so no
+    translation is given on platforms where normcase changes values.
+    Classes whose meaning differs between the two (those starting with ^
+    or a negated ], and those holding reversed ranges) are not translated
+    either, and such patterns have to be checked by a matcher instead.
+    ...
+    Parameters
+    ----------
+    pattern : str
+        the glob pattern to translate
+    ...
+    Returns
+    -------
+    str
+        the equivalent GLOB pattern, or None if there is none
+    """
+    if os.path is not posixpath:
+        return None
+    parts = []
+    for is_literal, text in parse_pattern(pattern):
+        if is_literal:
+            # Escape the one special character a literal run can hold (an unterminated [)
+            parts.append(text.replace("[", "[[]"))
+        elif text[0] == "[":
+            negated = text[1] == "!"
+            body = text[2:-1] if negated else text[1:-1]
+            if body.startswith("^") or (negated and body.startswith("]")):
+                return None
+            if any(body[i] == "-" and body[i - 1] > body[i + 1] for i in range(1, len(body) - 1)):
+                return None
+            parts.append("[^" + body + "]" if negated else text)
+        else:
+            parts.append(text)
+    return "".join(parts)
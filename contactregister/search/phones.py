@@ -0,0 +1,93 @@
+"""
+ContactRegister Phones Module
+
+This script defines an index for exact phone number lookups:
+    * PhoneIndex - maps each normalised phone number to the rows holding it
+
+This script should be imported wherever needed as module.
+"""
+
+import helpers
+
+
+class PhoneIndex:
+    """
+    A class defining a hash index from each normalised phone number to the
+    rows holding it, so exact lookups take constant time
+
+    Like the search indexes, the index catches up with rows appended to
+    the store incrementally, and is rebuilt if the store is replaced or
+    its stored rows change.
+    ...
+    Attributes
+    ----------
+    source : ContactStore
+        the contact store the index was built from
+    size : int
+        the number of rows from the source indexed so far
+    revision : int
+        the revision of the source the index was built from
+    rows : {str: [int]}
+        the ascending rows holding each normalised number
+    ...
+    Methods
+    -------
+    sync(contacts)
+        brings the index up to date with a contact store
+    lookup(number)
+        returns the rows holding a phone number
+    """
+
+    def __init__(self):
+        """
+        Initialises the class with an empty index
+        ...
+        Returns
+        -------
+        PhoneIndex
+            a new PhoneIndex object
+        """
+        self.source = None
+        self.size = 0
+        self.revision = 0
+        self.rows = {}
+
+    def sync(self, contacts) -> None:
+        """
+        Brings the index up to date with a contact store
+        ...
+        Parameters
+        ----------
+        contacts : ContactStore
+            the contact store to index
+        """
+        if contacts is not self.source or len(contacts) < self.size or contacts.revision != self.revision:
+            # Start over when the store has been replaced, truncated or changed
+            self.source = contacts
+            self.size = 0
+            self.revision = contacts.revision
+            self.rows = {}
+        if len(contacts) == self.size:
+            return
+        # Index each new row under its normalised number, leaving out rows without one
+        for row, phone in enumerate(contacts.column("phone")[self.size:], self.size):
+            number = helpers.normalise_phone(phone)
+            if number:
+                self.rows.setdefault(number, []).append(row)
+        self.size = len(contacts)
+
+    def lookup(self, number) -> [int]:
+        """
+        Returns the rows holding a phone number
+        ...
+        Parameters
+        ----------
+        number : str
+            the phone number to look up, formatted in any way
+        ...
+        Returns
+        -------
+        [int]
+            the ascending rows holding the number
+        """
+        return self.rows.get(helpers.normalise_phone(number), [])
@@ -0,0 +1,153 @@
+"""
+ContactRegister Query Planner Module
+
+This script defines how a parsed query is turned into an executable plan:
+    * CompiledFilter - a query filter with its pattern compiled to a matcher
+    * QueryPlan - an index lookup followed by a single fused predicate
+    * plan_query - builds the cheapest plan for a list of query filters
+
+This script should be imported wherever needed as module.
+"""
+
+from search.patterns import compile_pattern
+from models.Contact import Contact
+
+
+class CompiledFilter:
+    """
+    A class defining a query filter compiled for repeated matching
+    ...
+    Attributes
+    ----------
+    field : str
+        the field on which to perform the query
+    pattern : str
+        the pattern to perform the query with
+    match : callable
+        the compiled matcher for the pattern
+    """
+
+    def __init__(self, query_filter):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        query_filter : QueryFilter
+            the parsed filter to compile
+        ...
+        Returns
+        -------
+        CompiledFilter
+            a new CompiledFilter object
+        """
+        self.field = query_filter.field
+        self.pattern = query_filter.pattern
+        self.match = compile_pattern(query_filter.pattern)
+
+
+class QueryPlan:
+    """
+    A class defining an executable query plan
+    ...
+    Attributes
+    ----------
+    driver : CompiledFilter
+        the most selective filter, used to find candidates (None if every
+        contact is a candidate)
+    estimate : int
+        the estimated number of candidates the driver yields
+    fetch : callable
+        a function returning the ascending candidate rows, or None to scan
+    predicates : [CompiledFilter]
+        the filters each candidate still needs to match
+    ...
+    Methods
+    -------
+    execute(contacts)
+        runs the plan over a contact store
+    """
+
+    def __init__(self, driver, estimate, fetch, predicates):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        driver : CompiledFilter
+            the filter used to find candidates
+        estimate : int
+            the estimated number of candidates
+        fetch : callable
+            a function returning the ascending candidate rows
+        predicates : [CompiledFilter]
+            the filters candidates still need to match
+        ...
+        Returns
+        -------
+        QueryPlan
+            a new QueryPlan object
+        """
+        self.driver = driver
+        self.estimate = estimate
+        self.fetch = fetch
+        self.predicates = predicates
+
+    def execute(self, contacts) -> [Contact]:
+        """
+        Runs the plan over a contact store, fetching candidate rows through
+        the driver and checking their column values in a single pass, so
+        contact objects are only built for the matches
+        ...
+        Parameters
+        ----------
+        contacts : ContactStore
+            the contact store the plan's indexes were built from
+        ...
+        Returns
+        -------
+        [Contact]
+            a list of matching contacts, in row order
+        """
+        rows = range(len(contacts)) if self.fetch is None else self.fetch()
+        checks = [(contacts.column(f.field), f.match) for f in self.predicates]
+        if len(checks) == 1:
+            # Handle the common single predicate case without the per-row loop
+            column, match = checks[0]
+            rows = [row for row in rows if match(column[row])]
+        elif checks:
+            rows = [row for row in rows if all(match(column[row]) for column, match in checks)]
+        return [contacts[row] for row in rows]
+
+
+def plan_query(filters, index) -> QueryPlan:
+    """
+    A module function to build the cheapest plan for a list of filters
+
+    Filters made up only of * match everything and are dropped. The rest
+    are ranked by their estimated candidate count from the index, and the
+    most selective one drives the lookup.
+    ...
+    Parameters
+    ----------
+    filters : [QueryFilter]
+        the parsed, validated query filters
+    index : SearchIndex
+        the synced index to estimate selectivity and find candidates with
+    ...
+    Returns
+    -------
+    QueryPlan
+        the plan for the query
+    """
+    compiled = [CompiledFilter(f) for f in filters if not f.pattern or f.pattern.strip("*")]
+    # Pick the filter with the fewest estimated candidates to drive the lookup
+    driver, best = None, (index.size, False, None)
+    for f in compiled:
+        path = index.access_path(f)
+        if (path[0], not path[1]) < (best[0], not best[1]):
+            driver, best = f, path
+    estimate, exact, fetch = best
+    # Check candidates against every other filter, and the driver itself unless its lookup is exact
+    predicates = [f for f in compiled if f is not driver or not exact]
+    return QueryPlan(driver, estimate, fetch, predicates)
@@ -0,0 +1,177 @@
+"""
+ContactRegister Trigram Index Module
+
+This script defines an inverted trigram index over a single contact field:
+    * TrigramIndex - maps each three-character substring to the rows holding it
+    * intersect - intersects two ascending lists of row numbers
+
+This script should be imported wherever needed as module.
+"""
+
+from search.patterns import literal_fragments, normalise
+from bisect import bisect_left
+from array import array
+
+
+# Define module constants
+GRAM_SIZE = 3
+
+
+def intersect(small, large) -> array:
+    """
+    A module function to intersect two ascending lists of row numbers,
+    binary searching the larger list for each entry of the smaller one
+    ...
+    Parameters
+    ----------
+    small : array
+        the shorter ascending list of row numbers
+    large : array
+        the longer ascending list of row numbers
+    ...
+    Returns
+    -------
+    array
+        an ascending list of the row numbers present in both
+    """
+    result = array('L')
+    position = 0
+    for row in small:
+        # Resume each search from the previous hit since both lists are ascending
+        position = bisect_left(large, row, position)
+        if position == len(large):
+            break
+        if large[position] == row:
+            result.append(row)
+    return result
+
+
+class TrigramIndex:
+    """
+    A class defining an inverted trigram index over one field
+    ...
+    Attributes
+    ----------
+    postings : {str: array}
+        a mapping of each trigram to the ascending rows containing it
+    ...
+    Methods
+    -------
+    add(row, value)
+        indexes a field value under the given row number
+    pattern_grams(pattern)
+        returns the trigrams every value matching a glob pattern contains
+    estimate(pattern)
+        returns an upper bound on the rows matching a glob pattern
+    candidates(pattern)
+        returns the rows which may match a glob pattern
+    """
+
+    def __init__(self):
+        """
+        Initialises the class with an empty posting map
+        ...
+        Returns
+        -------
+        TrigramIndex
+            a new TrigramIndex object
+        """
+        self.postings = {}
+
+    def add(self, row, value) -> None:
+        """
+        Indexes a field value under the given row number
+
+        Rows must be added in ascending order so posting lists stay sorted.
+        ...
+        Parameters
+        ----------
+        row : int
+            the row number of the contact holding the value
+        value : str
+            the field value to index
+        """
+        value = normalise(value)
+        # Record the row once against every distinct trigram in the value
+        for gram in {value[i:i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1)}:
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('L')
+            posting.append(row)
+
+    @staticmethod
+    def pattern_grams(pattern) -> {str}:
+        """
+        Returns the trigrams every value matching a glob pattern contains
+        ...
+        Parameters
+        ----------
+        pattern : str
+            the glob pattern to inspect
+        ...
+        Returns
+        -------
+        {str}
+            the set of trigrams in the pattern's literal fragments
+        """
+        grams = set()
+        for fragment in literal_fragments(normalise(pattern)):
+            grams.update(fragment[i:i + GRAM_SIZE] for i in range(len(fragment) - GRAM_SIZE + 1))
+        return grams
+
+    def estimate(self, pattern) -> int:
+        """
+        Returns an upper bound on the rows matching a glob pattern,
+        being the length of its shortest posting list
+        ...
+        Parameters
+        ----------
+        pattern : str
+            the glob pattern to look up
+        ...
+        Returns
+        -------
+        int
+            the candidate row bound, or None if the index does not apply
+        """
+        grams = TrigramIndex.pattern_grams(pattern)
+        if not grams:
+            return None
+        return min(len(self.postings.get(gram, ())) for gram in grams)
+
+    def candidates(self, pattern) -> array:
+        """
+        Returns the rows which may match a glob pattern
+
+        Every literal fragment of the pattern must appear in a matching
+        value, so only rows holding all of its trigrams are candidates.
+        Candidates still need verifying against the full pattern.
+        ...
+        Parameters
+        ----------
+        pattern : str
+            the glob pattern to look up
+        ...
+        Returns
+        -------
+        array
+            an ascending list of candidate rows, or None if the pattern
+            has no literal fragment long enough to use the index
+        """
+        grams = TrigramIndex.pattern_grams(pattern)
+        if not grams:
+            # Handle patterns that are too short or too wild to narrow down
+            return None
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                # Handle trigrams that no value contains
+                return array('L')
+            postings.append(posting)
+        # Intersect the posting lists starting from the shortest
+        postings.sort(key=len)
+        rows = postings[0]
+        for posting in postings[1:]:
+            rows = intersect(rows, posting)
+        return rows
@@ -0,0 +1,401 @@
+"""
+ContactRegister Binary Module
+
+This script defines serialisation methods for a memory-mapped binary
+register format:
+    * export_contacts - exports a list of contacts as a .bin file
+    * append_contacts - appends contacts to an exported .bin file
+    * write_records - writes contacts as records, noting their positions
+    * write_table - writes an offset table followed by its slack
+    * import_contacts - imports contacts from a .bin file as a list
+    * open_contacts - maps a .bin file for lazy, random access to its records
+    * MappedRegister - a read-only, memory-mapped view of a .bin file
+
+The file starts with a fixed header, followed by each record's fields as
+length-prefixed UTF-8, and ends with a table of record offsets:
+    header  - magic (4s), version (H), field count (H), record count (Q),
+              offset table position (Q), all little-endian
+    records - per field, a byte length (I) followed by the UTF-8 bytes
+    table   - the position of each record (Q)
+    slack   - the bytes taken up by superseded tables (Q)
+
+Appending writes the new records and a whole new table after the old one,
+and only then points the header at it. Existing bytes are never changed,
+so a crash midway leaves the previous register intact and registers
+already mapped from the file stay readable. Superseded tables are counted
+as slack, and the file is rewritten in full once they make up half of it.
+
+This script should be imported wherever needed as module.
+"""
+
+from models.Contact import Contact
+from pathlib import Path
+from array import array
+import helpers
+import struct
+import mmap
+import sys
+import os
+
+
+# Define module constants
+DATA_FILE = Path(__file__).parent / "../../data/contacts.bin"
+MAGIC = b'CREG'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+LENGTH = struct.Struct('<I')
+OFFSET = struct.Struct('<Q')
+SLACK = struct.Struct('<Q')
+
+
+def export_contacts(contacts, path=DATA_FILE) -> str:
+    """
+    A module function to export contacts to a binary register file
+
+    The file is written alongside the old one and then swapped in, so any
+    register still mapped from the old file remains readable.
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a list of contact objects to export
+    path : str
+        the path of the file to export to (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    str
+        the name of the export file
+    """
+    # Try create the file directory and open a temporary file beside it for writing
+    helpers.try_create_dir(os.path.dirname(path))
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as file:
+        # Reserve space for the header, then write the records, the offset table and its slack
+        file.write(bytes(HEADER.size))
+        offsets = array('Q')
+        table = write_records(file, contacts, HEADER.size, offsets)
+        write_table(file, offsets, 0)
+        # Finally write the header pointing at the table
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, len(Contact.supported_search_fields), len(offsets), table))
+        file.flush()
+        os.fsync(file.fileno())
+    # Swap the file in once it is on disk, and then make the swap itself durable
+    os.replace(temp_path, path)
+    helpers.sync_directory(os.path.dirname(os.path.realpath(path)))
+    return path
+
+
+def append_contacts(contacts, path=DATA_FILE) -> str:
+    """
+    A module function to append contacts to an exported binary register
+    file, writing only the new records and a new offset table
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a list of contact objects to append
+    path : str
+        the path of the file to append to (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    str
+        the name of the export file, or None if it should be rewritten in
+        full instead
+    """
+    with open(path, 'r+b') as file:
+        magic, version, field_count, count, table = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or field_count != len(Contact.supported_search_fields):
+            return None
+        # Read the current table, and the slack after it if the file has any
+        size = file.seek(0, os.SEEK_END)
+        file.seek(table)
+        offsets = array('Q', file.read(OFFSET.size * count))
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        trailer = file.read(SLACK.size)
+        slack = SLACK.unpack(trailer)[0] if len(trailer) == SLACK.size else 0
+        # Supersede the current table, unless the superseded tables would make up half the file
+        slack += size - table
+        if slack * 2 > size:
+            return None
+        file.seek(size)
+        new_table = write_records(file, contacts, size, offsets)
+        write_table(file, offsets, slack)
+        file.flush()
+        os.fsync(file.fileno())
+        # Only point the header at the new table once everything it refers to is on disk
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, field_count, len(offsets), new_table))
+        file.flush()
+        os.fsync(file.fileno())
+    return path
+
+
+def write_records(file, contacts, position, offsets) -> int:
+    """
+    A module function to write contacts as records, noting their positions
+    ...
+    Parameters
+    ----------
+    file : io.BufferedWriter
+        the file to write to, positioned where the records should start
+    contacts : [Contact]
+        a list of contact objects to write
+    position : int
+        the position the records start at
+    offsets : array
+        the offset table to add each record's position to
+    ...
+    Returns
+    -------
+    int
+        the position after the last record
+    """
+    for contact in contacts:
+        offsets.append(position)
+        record = b''.join(LENGTH.pack(len(data)) + data
+                          for data in (value.encode('utf-8') for value in contact.to_list()))
+        file.write(record)
+        position += len(record)
+    return position
+
+
+def write_table(file, offsets, slack) -> None:
+    """
+    A module function to write an offset table followed by its slack
+    ...
+    Parameters
+    ----------
+    file : io.BufferedWriter
+        the file to write to, positioned after the last record
+    offsets : array
+        the position of each record
+    slack : int
+        the bytes taken up by superseded tables
+    """
+    if sys.byteorder != 'little':
+        offsets = array('Q', offsets)
+        offsets.byteswap()
+    file.write(offsets.tobytes())
+    file.write(SLACK.pack(slack))
+
+
+def import_contacts(path=DATA_FILE) -> [Contact]:
+    """
+    A module function to import contacts from a binary register file
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the file to import from (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    [Contact]
+        a list of imported contacts
+    """
+    return list(open_contacts(path))
+
+
+def open_contacts(path=DATA_FILE):
+    """
+    A module function to map a binary register file for lazy access
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the file to map (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    MappedRegister
+        a register decoding each record only when it is read
+    """
+    return MappedRegister(path)
+
+
+class MappedRegister:
+    """
+    A class defining a read-only, memory-mapped binary register
+
+    Opening a register only reads its header. Records are located through
+    the offset table and decoded on demand, so any record can be read
+    without parsing the rest of the file.
+    ...
+    Attributes
+    ----------
+    fields : [str]
+        the names of the fields in each record
+    buffer : mmap
+        the mapped file contents
+    count : int
+        the number of records in the register
+    table : int
+        the position of the offset table
+    ...
+    Methods
+    -------
+    offset(record)
+        returns the position of a record
+    value(record, field_index)
+        decodes a single field of a record
+    row(record)
+        decodes every field of a record
+    rows()
+        returns an iterator decoding every record in turn
+    column(field)
+        returns a lazily decoded column of one field
+    """
+
+    def __init__(self, path):
+        """
+        Initialises the class by mapping the given file
+        ...
+        Parameters
+        ----------
+        path : str
+            the path of the register file
+        ...
+        Returns
+        -------
+        MappedRegister
+            a new MappedRegister object
+        """
+        self.fields = Contact.supported_search_fields
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, field_count, self.count, self.table = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION or field_count != len(self.fields):
+            raise ValueError(f'{path} is not a version {VERSION} contact register')
+
+    def __len__(self):
+        """Returns the number of records in the register"""
+        return self.count
+
+    def __getitem__(self, record):
+        """Returns the contact held in a record, decoding it on demand"""
+        return Contact(*self.row(record))
+
+    def __iter__(self):
+        """Returns an iterator decoding each contact in turn"""
+        return (Contact(*row) for row in self.rows())
+
+    def offset(self, record) -> int:
+        """
+        Returns the position of a record
+        ...
+        Parameters
+        ----------
+        record : int
+            the number of the record, which may be negative to count from the end
+        ...
+        Returns
+        -------
+        int
+            the position of the record's first field
+        """
+        if record < 0:
+            record += self.count
+        if not 0 <= record < self.count:
+            raise IndexError('register record out of range')
+        return OFFSET.unpack_from(self.buffer, self.table + OFFSET.size * record)[0]
+
+    def value(self, record, field_index) -> str:
+        """
+        Decodes a single field of a record, skipping over those before it
+        ...
+        Parameters
+        ----------
+        record : int
+            the number of the record
+        field_index : int
+            the position of the field within the record
+        ...
+        Returns
+        -------
+        str
+            the decoded field value
+        """
+        position = self.offset(record)
+        for _field in range(field_index):
+            position += LENGTH.size + LENGTH.unpack_from(self.buffer, position)[0]
+        length = LENGTH.unpack_from(self.buffer, position)[0]
+        position += LENGTH.size
+        return self.buffer[position:position + length].decode('utf-8')
+
+    def row(self, record) -> [str]:
+        """
+        Decodes every field of a record
+        ...
+        Parameters
+        ----------
+        record : int
+            the number of the record
+        ...
+        Returns
+        -------
+        [str]
+            the record's values in field order
+        """
+        position = self.offset(record)
+        values = []
+        for _field in self.fields:
+            length = LENGTH.unpack_from(self.buffer, position)[0]
+            position += LENGTH.size
+            values.append(self.buffer[position:position + length].decode('utf-8'))
+            position += length
+        return values
+
+    def rows(self):
+        """Returns an iterator decoding every record in turn"""
+        return (self.row(record) for record in range(self.count))
+
+    def column(self, field) -> 'MappedColumn':
+        """Returns a lazily decoded column of one field"""
+        return MappedColumn(self, self.fields.index(field))
+
+
+class MappedColumn:
+    """
+    A class defining a lazily decoded column of one field of a register
+    ...
+    Attributes
+    ----------
+    register : MappedRegister
+        the register the column belongs to
+    field_index : int
+        the position of the field within each record
+    """
+
+    def __init__(self, register, field_index):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        register : MappedRegister
+            the register the column belongs to
+        field_index : int
+            the position of the field within each record
+        ...
+        Returns
+        -------
+        MappedColumn
+            a new MappedColumn object
+        """
+        self.register = register
+        self.field_index = field_index
+
+    def __len__(self):
+        """Returns the number of values in the column"""
+        return len(self.register)
+
+    def __getitem__(self, index):
+        """Returns the value of a record, or a list of values for a slice of records"""
+        if isinstance(index, slice):
+            return [self.register.value(record, self.field_index)
+                    for record in range(*index.indices(len(self.register)))]
+        return self.register.value(index, self.field_index)
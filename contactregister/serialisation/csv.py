@@ -3,23 +3,37 @@ ContactRegister CSV Module
 
 This script defines serialisation methods for the CSV format:
     * export_contacts - exports a list of contacts as a .csv file
+    * append_contacts - appends contacts to an exported .csv file
     * import_contacts - imports contacts from a .csv file as a list
+    * import_contact_batches - streams contacts from a .csv file in batches
+    * import_contact_columns - parses byte ranges of a .csv file in parallel
+    * split_ranges - splits a mapped .csv file into whole-record byte ranges
+    * record_end - finds the end of the record containing a byte position
+    * count_quotes - counts the quote characters in a byte range
+    * parse_range - parses one byte range of a .csv file into columns
 
 This script should be imported wherever needed as module.
 """
 
 from models.Contact import Contact
+from models import NULL_FIELD
 from pathlib import Path
+import itertools
 import helpers
+import locale
+import mmap
 import csv
 import os
+import io
 
 
 # Define module constants
 DATA_FILE = Path(__file__).parent / "../../data/contacts.csv"
+BATCH_SIZE = 10000
+BLOCK_SIZE = 2 ** 24
 
 
-def export_contacts(contacts) -> str:
+def export_contacts(contacts, path=DATA_FILE) -> str:
     """
     A module function to export contacts to a CSV file
     ...
@@ -27,6 +41,8 @@ def export_contacts(contacts) -> str:
     ----------
     contacts : [Contact]
         a list of contact objects to export
+    path : str
+        the path of the file to export to (default is DATA_FILE)
     ...
     Returns
     -------
@@ -34,30 +50,254 @@ def export_contacts(contacts) -> str:
         the name of the export file
     """
     # Try create the file directory and open the specified file for writing
-    helpers.try_create_dir(os.path.dirname(DATA_FILE))
-    with open(DATA_FILE, 'w', newline='') as file:
+    helpers.try_create_dir(os.path.dirname(path))
+    with open(path, 'w', newline='') as file:
         # Set it up for CSV writing
         writer = csv.writer(file, quoting=csv.QUOTE_ALL)
         # Write the header row, and then rows for each contact
         writer.writerow(Contact.supported_search_fields)
         [writer.writerow(contact.to_list()) for contact in contacts]
-    return DATA_FILE
+    return path
 
 
-def import_contacts() -> [Contact]:
+def append_contacts(contacts, path=DATA_FILE) -> str:
+    """
+    A module function to append contacts to an exported CSV file
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a list of contact objects to append
+    path : str
+        the path of the file to append to (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    str
+        the name of the export file
+    """
+    with open(path, 'a', newline='') as file:
+        # Set it up for CSV writing, and write rows for each contact after the existing ones
+        writer = csv.writer(file, quoting=csv.QUOTE_ALL)
+        [writer.writerow(contact.to_list()) for contact in contacts]
+    return path
+
+
+def import_contacts(path=DATA_FILE) -> [Contact]:
     """
     A module function to import contacts from a CSV file
     ...
+    Parameters
+    ----------
+    path : str
+        the path of the file to import from (default is DATA_FILE)
+    ...
     Returns
     -------
     [Contact]
         a list of imported contacts
     """
-    # Open the specified file for reading
-    with open(DATA_FILE, 'r', newline='') as file:
+    # Gather every streamed batch into a single list
+    return [contact for batch in import_contact_batches(path=path) for contact in batch]
+
+
+def import_contact_batches(batch_size=BATCH_SIZE, progress=None, path=DATA_FILE):
+    """
+    A module generator to stream contacts from a CSV file in fixed-size
+    batches, so the whole file is never held in memory at once
+    ...
+    Parameters
+    ----------
+    batch_size : int
+        the maximum number of contacts per batch (default is BATCH_SIZE)
+    progress : callable
+        a function called with the rows and bytes read so far after each
+        batch has been consumed (default is None)
+    path : str
+        the path of the file to import from (default is DATA_FILE)
+    ...
+    Yields
+    ------
+    [Contact]
+        the next batch of imported contacts
+    """
+    # Open the specified file for reading, keeping hold of the raw file to track bytes read
+    with io.TextIOWrapper(open(path, 'rb'), newline='') as file:
         # Set it up for CSV reading
         reader = csv.reader(file, delimiter=',', quotechar='"')
         # Skip the header row, and read in each entry as a contact
-        next(reader)
-        contacts = [Contact.from_list(row) for row in reader]
-    return contacts
+        next(reader, None)
+        rows = 0
+        batch = []
+        for row in reader:
+            batch.append(Contact.from_list(row))
+            if len(batch) == batch_size:
+                rows += len(batch)
+                yield batch
+                batch = []
+                if progress:
+                    progress(rows, file.buffer.tell())
+        # Yield whatever is left over as a final, shorter batch
+        if batch:
+            rows += len(batch)
+            yield batch
+        if progress:
+            progress(rows, file.buffer.tell())
+
+
+def import_contact_columns(workers=None, progress=None, path=DATA_FILE):
+    """
+    A module generator to parse a CSV file across worker processes,
+    yielding each byte range's contacts in file order
+
+    The file is split into byte ranges on record boundaries, each parsed by
+    a worker into one column of values per field, so the contacts come out
+    identical to, and in the same order as, those of import_contact_batches.
+    ...
+    Parameters
+    ----------
+    workers : int
+        the number of worker processes to use (default is None, which uses
+        one per CPU)
+    progress : callable
+        a function called with the rows and bytes read so far after each
+        range has been consumed (default is None)
+    path : str
+        the path of the file to import from (default is DATA_FILE)
+    ...
+    Yields
+    ------
+    [[str]]
+        the next range's values of each field, in field order
+    """
+    with open(path, 'rb') as file:
+        if not os.fstat(file.fileno()).st_size:
+            # Handle an empty file, which cannot be mapped
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            ranges = split_ranges(buffer, workers or os.cpu_count() or 1)
+    starts, ends = [start for start, _end in ranges], [end for _start, end in ranges]
+    # Import the process pool only once needed, as it is slow to import and most imports never use it
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        rows = 0
+        for end, columns in zip(ends, executor.map(parse_range, itertools.repeat(path), starts, ends)):
+            rows += len(columns[0])
+            yield columns
+            if progress:
+                progress(rows, end)
+
+
+def split_ranges(buffer, parts) -> [(int, int)]:
+    """
+    A module function to split a mapped CSV file into byte ranges of
+    whole records, skipping its header row
+
+    Ranges are cut at the first newline after each evenly spaced offset
+    which lies outside any quoted field. As every quote in a field is
+    doubled, a newline is outside quotes exactly when the number of quote
+    characters before it is even.
+    ...
+    Parameters
+    ----------
+    buffer : mmap
+        the mapped file contents
+    parts : int
+        the number of ranges to aim for
+    ...
+    Returns
+    -------
+    [(int, int)]
+        the start and end offsets of each non-empty range, in file order
+    """
+    size = len(buffer)
+    boundaries = [record_end(buffer, 0, False)]
+    position, quoted = 0, False
+    for part in range(1, parts):
+        target = boundaries[0] + (size - boundaries[0]) * part // parts
+        if target < boundaries[-1]:
+            # Handle offsets landing inside a record already covered by the last range
+            continue
+        # Track quote parity up to the offset, then find the next record boundary after it
+        quoted ^= count_quotes(buffer, position, target) % 2 == 1
+        position = target
+        boundaries.append(record_end(buffer, target, quoted))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+
+def record_end(buffer, position, quoted) -> int:
+    """
+    A module function to find the end of the record containing a position
+    ...
+    Parameters
+    ----------
+    buffer : mmap
+        the mapped file contents
+    position : int
+        the position to search from
+    quoted : bool
+        whether the position lies inside a quoted field
+    ...
+    Returns
+    -------
+    int
+        the position after the first newline outside quotes, or the end
+        of the file if there is none
+    """
+    while True:
+        newline = buffer.find(b'\n', position)
+        if newline < 0:
+            return len(buffer)
+        quoted ^= count_quotes(buffer, position, newline) % 2 == 1
+        if not quoted:
+            return newline + 1
+        position = newline + 1
+
+
+def count_quotes(buffer, start, end) -> int:
+    """
+    A module function to count the quote characters in a byte range, a
+    block at a time so memory use stays bounded
+    ...
+    Parameters
+    ----------
+    buffer : mmap
+        the mapped file contents
+    start : int
+        the first position to count from
+    end : int
+        the position to count up to
+    ...
+    Returns
+    -------
+    int
+        the number of quote characters in the range
+    """
+    return sum(buffer[block:min(block + BLOCK_SIZE, end)].count(b'"') for block in range(start, end, BLOCK_SIZE))
+
+
+def parse_range(path, start, end) -> [[str]]:
+    """
+    A module function to parse one byte range of a CSV file in a worker
+    process, decoding and splitting lines as import_contact_batches does
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the file to parse
+    start : int
+        the position of the range's first record
+    end : int
+        the position after the range's last record
+    ...
+    Returns
+    -------
+    [[str]]
+        the range's values of each field, in field order
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(locale.getpreferredencoding(False))
+    rows = list(csv.reader(io.StringIO(text, newline=''), delimiter=',', quotechar='"'))
+    return [[row[i] or NULL_FIELD for row in rows] for i in range(len(Contact.supported_search_fields))]
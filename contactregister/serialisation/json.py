@@ -19,7 +19,7 @@ import os
 DATA_FILE = Path(__file__).parent / "../../data/contacts.json"
 
 
-def export_contacts(contacts) -> str:
+def export_contacts(contacts, path=DATA_FILE) -> str:
     """
     A module function to export contacts to a JSON file
     ...
@@ -27,6 +27,8 @@ def export_contacts(contacts) -> str:
     ----------
     contacts : [Contact]
         a list of contact objects to export
+    path : str
+        the path of the file to export to (default is DATA_FILE)
     ...
     Returns
     -------
@@ -34,24 +36,29 @@ def export_contacts(contacts) -> str:
         the name of the export file
     """
     # Try create the file directory and open the specified file for writing
-    helpers.try_create_dir(os.path.dirname(DATA_FILE))
-    with open(DATA_FILE, 'w', newline='') as file:
+    helpers.try_create_dir(os.path.dirname(path))
+    with open(path, 'w', newline='') as file:
         # Convert the contacts to dictionaries and dump them to the file as JSON
         json.dump([contact.to_dict() for contact in contacts], file, indent=4)
-    return DATA_FILE
+    return path
 
 
-def import_contacts() -> [Contact]:
+def import_contacts(path=DATA_FILE) -> [Contact]:
     """
     A module function to import contacts from a JSON file
     ...
+    Parameters
+    ----------
+    path : str
+        the path of the file to import from (default is DATA_FILE)
+    ...
     Returns
     -------
     [Contact]
         a list of imported contacts
     """
     # Open the specified file for writing
-    with open(DATA_FILE, 'r', newline='') as file:
+    with open(path, 'r', newline='') as file:
         # Load the JSON file to dictionaries, creating contact objects from them
         contacts = [Contact.from_dict(data) for data in json.load(file)]
     return contacts
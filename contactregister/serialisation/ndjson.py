@@ -0,0 +1,138 @@
+"""
+ContactRegister NDJSON Module
+
+This script defines serialisation methods for the newline-delimited JSON
+format, which holds one JSON contact object per line:
+    * export_contacts - exports a list of contacts as a .ndjson file
+    * append_contacts - appends contacts to an exported .ndjson file
+    * import_contacts - imports contacts from a .ndjson file as a list
+    * import_contact_batches - streams contacts from a .ndjson file in batches
+
+Files are written and read one line at a time, so memory use does not grow
+with the size of the register, and files can be appended to or split at
+any line boundary.
+
+This script should be imported wherever needed as module.
+"""
+
+from models.Contact import Contact
+from pathlib import Path
+import helpers
+import json
+import os
+import io
+
+
+# Define module constants
+DATA_FILE = Path(__file__).parent / "../../data/contacts.ndjson"
+BATCH_SIZE = 10000
+
+
+def export_contacts(contacts, path=DATA_FILE) -> str:
+    """
+    A module function to export contacts to an NDJSON file
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a list of contact objects to export
+    path : str
+        the path of the file to export to (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    str
+        the name of the export file
+    """
+    # Try create the file directory and open the specified file for writing
+    helpers.try_create_dir(os.path.dirname(path))
+    with open(path, 'w', newline='') as file:
+        # Write each contact as a JSON object on its own line
+        encode = json.JSONEncoder().encode
+        [file.write(encode(contact.to_dict()) + '\n') for contact in contacts]
+    return path
+
+
+def append_contacts(contacts, path=DATA_FILE) -> str:
+    """
+    A module function to append contacts to an exported NDJSON file
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a list of contact objects to append
+    path : str
+        the path of the file to append to (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    str
+        the name of the export file
+    """
+    with open(path, 'a', newline='') as file:
+        # Write each contact as a JSON object on its own line after the existing ones
+        encode = json.JSONEncoder().encode
+        [file.write(encode(contact.to_dict()) + '\n') for contact in contacts]
+    return path
+
+
+def import_contacts(path=DATA_FILE) -> [Contact]:
+    """
+    A module function to import contacts from an NDJSON file
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the file to import from (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    [Contact]
+        a list of imported contacts
+    """
+    # Gather every streamed batch into a single list
+    return [contact for batch in import_contact_batches(path=path) for contact in batch]
+
+
+def import_contact_batches(batch_size=BATCH_SIZE, progress=None, path=DATA_FILE):
+    """
+    A module generator to stream contacts from an NDJSON file in
+    fixed-size batches, decoding one line at a time
+    ...
+    Parameters
+    ----------
+    batch_size : int
+        the maximum number of contacts per batch (default is BATCH_SIZE)
+    progress : callable
+        a function called with the rows and bytes read so far after each
+        batch has been consumed (default is None)
+    path : str
+        the path of the file to import from (default is DATA_FILE)
+    ...
+    Yields
+    ------
+    [Contact]
+        the next batch of imported contacts
+    """
+    # Open the specified file for reading, keeping hold of the raw file to track bytes read
+    with io.TextIOWrapper(open(path, 'rb'), newline='') as file:
+        decode = json.JSONDecoder().decode
+        rows = 0
+        batch = []
+        for line in file:
+            # Skip blank lines, such as a trailing newline at the end of the file
+            if not line.strip():
+                continue
+            batch.append(Contact.from_dict(decode(line)))
+            if len(batch) == batch_size:
+                rows += len(batch)
+                yield batch
+                batch = []
+                if progress:
+                    progress(rows, file.buffer.tell())
+        # Yield whatever is left over as a final, shorter batch
+        if batch:
+            rows += len(batch)
+            yield batch
+        if progress:
+            progress(rows, file.buffer.tell())
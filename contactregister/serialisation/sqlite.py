@@ -0,0 +1,474 @@
+"""
+ContactRegister SQLite Module
+
+This script defines serialisation methods for an SQLite database file,
+which can also serve as the register's store in place of memory:
+    * export_contacts - exports a list of contacts as a .sqlite file
+    * import_contacts - imports contacts from a .sqlite file as a list
+    * open_store - opens a .sqlite file as a persistent contact store
+    * SqliteStore - a contact store kept in an SQLite database
+    * SqliteColumn - a column of one field read from an SQLite store
+
+Contacts are held in a single table keyed by their row in the register,
+with an index on each searchable field.
+
+This script should be imported wherever needed as module.
+"""
+
+from search.patterns import compile_pattern, sql_glob
+from models.ContactStore import ContactView, generations
+from models.Contact import Contact
+from models import NULL_FIELD
+from pathlib import Path
+import itertools
+import helpers
+import sqlite3
+import os
+
+
+# Define module constants
+DATA_FILE = Path(__file__).parent / "../../data/contacts.sqlite"
+FIELDS = Contact.supported_search_fields
+CREATE_TABLE = f'CREATE TABLE IF NOT EXISTS contacts (id INTEGER PRIMARY KEY, {", ".join(FIELDS)})'
+CREATE_INDEXES = [f'CREATE INDEX IF NOT EXISTS contacts_{field} ON contacts ({field})' for field in FIELDS]
+INSERT_ROW = f'INSERT INTO contacts (id, {", ".join(FIELDS)}) VALUES (?{", ?" * len(FIELDS)})'
+SELECT_ROWS = f'SELECT {", ".join(FIELDS)} FROM contacts'
+COUNT_ROWS = 'SELECT COALESCE(MAX(id) + 1, 0) FROM contacts'
+UPDATE_ROW = f'UPDATE contacts SET {", ".join(f"{field} = ?" for field in FIELDS)} WHERE id = ?'
+
+
+def export_contacts(contacts, path=DATA_FILE) -> str:
+    """
+    A module function to export contacts to an SQLite database file
+
+    The table is replaced and refilled within a single transaction, and its
+    indexes are only built once every row has been inserted.
+    ...
+    Parameters
+    ----------
+    contacts : [Contact]
+        a list of contact objects to export
+    path : str
+        the path of the file to export to (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    str
+        the name of the export file
+    """
+    if isinstance(contacts, SqliteStore) and Path(contacts.path).resolve() == Path(path).resolve():
+        # Handle a store already kept in the export file, which only needs committing
+        contacts.connection.commit()
+        return path
+    # Try create the file directory and connect to the specified file
+    helpers.try_create_dir(os.path.dirname(path))
+    connection = sqlite3.connect(str(path))
+    try:
+        with connection:
+            # Recreate the table, insert every row in one go, and then index each field
+            connection.execute('DROP TABLE IF EXISTS contacts')
+            connection.execute(CREATE_TABLE)
+            connection.executemany(INSERT_ROW, ((row, *contact.to_list()) for row, contact in enumerate(contacts)))
+            [connection.execute(statement) for statement in CREATE_INDEXES]
+    finally:
+        connection.close()
+    return path
+
+
+def import_contacts(path=DATA_FILE) -> [Contact]:
+    """
+    A module function to import contacts from an SQLite database file
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the file to import from (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    [Contact]
+        a list of imported contacts
+    """
+    if not os.path.exists(path):
+        # Handle a missing file, which sqlite3 would otherwise create empty
+        raise FileNotFoundError(path)
+    connection = sqlite3.connect(str(path))
+    try:
+        return [Contact.from_list(row) for row in connection.execute(SELECT_ROWS + ' ORDER BY id')]
+    finally:
+        connection.close()
+
+
+def open_store(path=DATA_FILE):
+    """
+    A module function to open an SQLite database file as a contact store,
+    creating it if it does not exist yet
+    ...
+    Parameters
+    ----------
+    path : str
+        the path of the database file (default is DATA_FILE)
+    ...
+    Returns
+    -------
+    SqliteStore
+        a store reading and writing contacts through the database
+    """
+    return SqliteStore(path)
+
+
+class SqliteStore:
+    """
+    A class defining a contact store kept in an SQLite database
+
+    The store offers the same reading and writing methods as a ContactStore,
+    but holds none of its rows in memory. Writes are committed as they are
+    made, and searches are answered by the database itself.
+    ...
+    Attributes
+    ----------
+    fields : [str]
+        the names of the stored fields, in Contact constructor order
+    path : str
+        the path of the database file
+    connection : sqlite3.Connection
+        the open connection to the database
+    count : int
+        the number of rows in the store
+    generation : int
+        a stamp which changes on every write to the store
+    revision : int
+        a count of the changes made to stored rows
+    exports : {str: (int, tuple)}
+        the high-water mark of each format's last export, as the number of
+        rows written and the signature of the file left behind
+    ...
+    Methods
+    -------
+    add(name, address, phone)
+        stores a new contact from its field values
+    append(contact)
+        stores a contact object
+    extend(contacts)
+        stores a sequence of contact objects in a single transaction
+    extend_columns(columns)
+        stores rows given as one list of values per field
+    attach(segment)
+        copies the rows of a read-only segment into the store
+    fill(row, values)
+        fills in the missing fields of a stored row
+    insert_rows(rows)
+        inserts rows of field values after the last row of the store
+    column(field)
+        returns a lazily read column of values for a field
+    row(row)
+        returns a list of the field values of a row
+    rows()
+        returns an iterator over the field values of every row
+    view(start, stop)
+        returns a lazy view over a range of rows
+    search(filters)
+        returns the contacts matching every one of a list of query filters
+    close()
+        closes the connection to the database
+    """
+
+    def __init__(self, path):
+        """
+        Initialises the class by connecting to the given database file and
+        creating its table and indexes if they are missing
+        ...
+        Parameters
+        ----------
+        path : str
+            the path of the database file
+        ...
+        Returns
+        -------
+        SqliteStore
+            a new SqliteStore object
+        """
+        self.fields = FIELDS
+        self.path = path
+        helpers.try_create_dir(os.path.dirname(path))
+        self.connection = sqlite3.connect(str(path))
+        with self.connection:
+            self.connection.execute(CREATE_TABLE)
+            [self.connection.execute(statement) for statement in CREATE_INDEXES]
+        self.count = self.connection.execute(COUNT_ROWS).fetchone()[0]
+        self.generation = next(generations)
+        self.revision = 0
+        self.exports = {}
+
+    def __len__(self):
+        """Returns the number of stored contacts"""
+        return self.count
+
+    def __getitem__(self, row):
+        """Returns the contact stored at a row, reading it on demand"""
+        return Contact(*self.row(row))
+
+    def __iter__(self):
+        """Returns an iterator reading each stored contact in turn"""
+        return itertools.starmap(Contact, self.rows())
+
+    def add(self, name, address, phone) -> int:
+        """
+        Stores a new contact from its field values
+        ...
+        Parameters
+        ----------
+        name : str
+            the contact's full name
+        address : str
+            the contact's address
+        phone : str
+            the contact's phone number
+        ...
+        Returns
+        -------
+        int
+            the row of the new contact
+        """
+        values = [value or NULL_FIELD for value in (name, address, phone)]
+        with self.connection:
+            self.connection.execute(INSERT_ROW, (self.count, *values))
+        self.count += 1
+        self.generation = next(generations)
+        return self.count - 1
+
+    def append(self, contact) -> int:
+        """
+        Stores a contact object
+        ...
+        Parameters
+        ----------
+        contact : Contact
+            the contact to store
+        ...
+        Returns
+        -------
+        int
+            the row of the stored contact
+        """
+        return self.add(*contact.to_list())
+
+    def extend(self, contacts) -> None:
+        """
+        Stores a sequence of contact objects in a single transaction
+        ...
+        Parameters
+        ----------
+        contacts : [Contact]
+            the contacts to store
+        """
+        self.insert_rows(contact.to_list() for contact in contacts)
+
+    def extend_columns(self, columns) -> None:
+        """
+        Stores rows given as one list of values per field
+        ...
+        Parameters
+        ----------
+        columns : [[str]]
+            the values of each field in field order, all of equal length
+        """
+        self.insert_rows(zip(*columns))
+
+    def attach(self, segment) -> None:
+        """
+        Copies the rows of a read-only segment into the store, as the
+        database cannot refer to rows kept elsewhere
+        ...
+        Parameters
+        ----------
+        segment : object
+            the segment to copy, providing rows() in the same way as a
+            ColumnSegment
+        """
+        self.insert_rows(segment.rows())
+
+    def fill(self, row, values) -> bool:
+        """
+        Fills in the fields of a stored row which hold the NULL_FIELD string
+
+        Since this changes a stored row, exports already holding the row can
+        no longer be appended to.
+        ...
+        Parameters
+        ----------
+        row : int
+            the row to fill in
+        values : [str]
+            the values to fill in from, in field order
+        ...
+        Returns
+        -------
+        bool
+            whether any field was filled in
+        """
+        if row < 0:
+            row += self.count
+        stored = self.row(row)
+        filled = [value if old == NULL_FIELD and value and value != NULL_FIELD else old
+                  for old, value in zip(stored, values)]
+        if filled == stored:
+            return False
+        with self.connection:
+            self.connection.execute(UPDATE_ROW, (*filled, row))
+        self.generation = next(generations)
+        self.revision += 1
+        self.exports = {name: mark for name, mark in self.exports.items() if mark[0] <= row}
+        return True
+
+    def insert_rows(self, rows) -> None:
+        """
+        Inserts rows of field values after the last row of the store
+        ...
+        Parameters
+        ----------
+        rows : iterator
+            the field values of each row to insert
+        """
+        numbered = ((row, *values) for row, values in enumerate(rows, self.count))
+        with self.connection:
+            self.connection.executemany(INSERT_ROW, numbered)
+        self.count = self.connection.execute(COUNT_ROWS).fetchone()[0]
+        self.generation = next(generations)
+
+    def column(self, field) -> 'SqliteColumn':
+        """Returns a column of values for a field, read from the database as accessed"""
+        return SqliteColumn(self, field)
+
+    def row(self, row) -> [str]:
+        """
+        Returns a list of the field values of a row
+        ...
+        Parameters
+        ----------
+        row : int
+            the row to read, which may be negative to count from the end
+        ...
+        Returns
+        -------
+        [str]
+            the row's values in field order
+        """
+        if row < 0:
+            row += self.count
+        if not 0 <= row < self.count:
+            raise IndexError('store row out of range')
+        return list(self.connection.execute(SELECT_ROWS + ' WHERE id = ?', (row,)).fetchone())
+
+    def rows(self):
+        """Returns an iterator over the field values of every row, read from a cursor"""
+        return self.connection.execute(SELECT_ROWS + ' ORDER BY id')
+
+    def view(self, start, stop=None):
+        """
+        Returns a lazy view over a range of rows
+        ...
+        Parameters
+        ----------
+        start : int
+            the first row of the view
+        stop : int
+            the row after the end of the view (default is the store's end)
+        ...
+        Returns
+        -------
+        ContactView
+            a view reading contacts from the store as they are accessed
+        """
+        return ContactView(self, range(start, self.count if stop is None else stop))
+
+    def search(self, filters) -> [Contact]:
+        """
+        Returns the contacts matching every one of a list of query filters
+
+        Filters are pushed down to the database as GLOB clauses, which can
+        use the field indexes for patterns with a literal prefix. Any filter
+        without an exact GLOB translation is checked against the rows the
+        database returns instead.
+        ...
+        Parameters
+        ----------
+        filters : [QueryFilter]
+            the parsed, validated query filters
+        ...
+        Returns
+        -------
+        [Contact]
+            a list of matching contacts, in row order
+        """
+        clauses, parameters, checks = [], [], []
+        for f in filters:
+            if f.pattern and not f.pattern.strip("*"):
+                # Handle match-all filters, which need no clause
+                continue
+            pattern = sql_glob(f.pattern)
+            if pattern is None:
+                checks.append((self.fields.index(f.field), compile_pattern(f.pattern)))
+            else:
+                # Field names are interpolated, so only ever use the store's own
+                clauses.append(f'{self.fields[self.fields.index(f.field)]} GLOB ?')
+                parameters.append(pattern)
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        cursor = self.connection.execute(SELECT_ROWS + where + ' ORDER BY id', parameters)
+        return [Contact(*row) for row in cursor if all(match(row[i]) for i, match in checks)]
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database
+        """
+        self.connection.close()
+
+
+class SqliteColumn:
+    """
+    A class defining a read-only column of one field of an SQLite store,
+    read from the database as it is accessed
+    ...
+    Attributes
+    ----------
+    store : SqliteStore
+        the store the column belongs to
+    field : str
+        the name of the field
+    """
+
+    def __init__(self, store, field):
+        """
+        Initialises the class with relevant parameters
+        ...
+        Parameters
+        ----------
+        store : SqliteStore
+            the store the column belongs to
+        field : str
+            the name of the field
+        ...
+        Returns
+        -------
+        SqliteColumn
+            a new SqliteColumn object
+        """
+        self.store = store
+        self.field = field
+
+    def __len__(self):
+        """Returns the number of rows in the column"""
+        return len(self.store)
+
+    def __getitem__(self, index):
+        """Returns the value at a row, or a list of values for a slice of rows"""
+        position = self.store.fields.index(self.field)
+        if not isinstance(index, slice):
+            return self.store.row(index)[position]
+        start, stop, step = index.indices(len(self.store))
+        if step != 1:
+            return [self[row] for row in range(start, stop, step)]
+        # Read the slice in a single query, only ever interpolating the store's own field names
+        cursor = self.store.connection.execute(f'SELECT {self.store.fields[position]} FROM contacts '
+                                               f'WHERE id >= ? AND id < ? ORDER BY id', (start, stop))
+        return [value for value, in cursor]